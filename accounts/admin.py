@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django import forms
-from .models import User, StudentProfile
+from .models import User, StudentProfile, QuizAttempt, Enrollment
 
 
 # 🔹 User creation form
@@ -54,3 +54,17 @@ class StudentProfileAdmin(admin.ModelAdmin):
 
 # Register User separately
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ("user", "quiz_id", "score", "total", "submitted_at")
+    list_filter = ("submitted_at",)
+    search_fields = ("user__email",)
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ("student", "subject", "board", "class_level", "created_at")
+    list_filter = ("board", "class_level")
+    search_fields = ("student__student_name", "subject__name")
@@ -0,0 +1,271 @@
+"""
+Write-behind ingestion of quiz attempts.
+
+Submissions are not inserted one by one. record_attempts() appends the graded
+attempt to an on-disk journal segment and to an in-memory buffer; a
+background thread bulk-inserts the buffer into QuizAttempt/AttemptAnswer
+every FLUSH_INTERVAL seconds or as soon as MAX_BATCH attempts are waiting.
+
+Durability:
+  * A journal line is written to the OS before record_attempts() returns, so
+    a crashed or killed worker loses nothing: its segments are replayed by
+    the next buffer that starts (or by `manage.py flush_attempts`).
+  * The journal is fsynced every FSYNC_EVERY records and on every flush, so
+    a power loss / kernel crash loses at most FSYNC_EVERY - 1 acknowledged
+    attempts, and never more than FLUSH_INTERVAL seconds' worth.
+  * Replays are idempotent: QuizAttempt.uid is unique and already-stored
+    uids are skipped.
+
+Each process writes its own segments (journal dir / <pid>-<token>-<seq>.jsonl)
+and holds an flock on each from creation until the transaction holding its
+attempts commits and the file is deleted, so replay_journal() in another
+process never picks up a segment that is still being written or flushed.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: no cross-process segment locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "JOURNAL_DIR": Path(settings.BASE_DIR) / "var" / "attempt_journal",
+    "MAX_BATCH": 500,
+    "FLUSH_INTERVAL": 2.0,
+    "FSYNC_EVERY": 32,
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "ATTEMPT_BUFFER", {})}
+
+
+def write_attempts(records):
+    """
+    Insert attempt records (as produced by make_record) in one transaction.
+    Records whose uid is already stored are skipped. Returns the number inserted.
+    """
+    from .models import QuizAttempt, AttemptAnswer
+
+    by_uid = {r["uid"]: r for r in records}
+    if not by_uid:
+        return 0
+    with transaction.atomic():
+        stored = set(
+            str(u) for u in QuizAttempt.objects.filter(uid__in=list(by_uid)).values_list("uid", flat=True)
+        )
+        fresh = [r for uid, r in by_uid.items() if uid not in stored]
+        attempts = QuizAttempt.objects.bulk_create([
+            QuizAttempt(
+                uid=r["uid"],
+                user_id=r["user_id"],
+                quiz_id=r["quiz_id"],
+                score=r["score"],
+                total=r["total"],
+                submitted_at=parse_datetime(r["submitted_at"]),
+            )
+            for r in fresh
+        ])
+        AttemptAnswer.objects.bulk_create(
+            [
+                AttemptAnswer(attempt_id=attempt.pk, question_id=qid, choice_id=cid, correct=correct)
+                for attempt, r in zip(attempts, fresh)
+                for qid, cid, correct in r["answers"]
+            ],
+            batch_size=2000,
+        )
+    return len(fresh)
+
+
+def make_record(user, quiz_id, score, total, details):
+    """
+    Build a journal record from the output of content.grading.grade().
+    """
+    return {
+        "uid": str(uuid.uuid4()),
+        "user_id": user.pk,
+        "quiz_id": int(quiz_id),
+        "score": score,
+        "total": total,
+        "submitted_at": timezone.now().isoformat(),
+        "answers": [(d["question_id"], d["selected_choice_id"], d["correct"]) for d in details],
+    }
+
+
+def _read_segment(path):
+    records = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write was never acknowledged
+                logger.warning("Skipping torn journal line in %s", path)
+    return records
+
+
+def replay_journal(journal_dir=None):
+    """
+    Insert attempts from journal segments that no live process holds, then
+    delete those segments. Returns the number of attempts inserted.
+    """
+    journal_dir = Path(journal_dir or _config()["JOURNAL_DIR"])
+    if not journal_dir.is_dir():
+        return 0
+    inserted = 0
+    for path in sorted(journal_dir.glob("*.jsonl")):
+        with open(path, "a+") as fh:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # segment belongs to a running process
+            inserted += write_attempts(_read_segment(path))
+            path.unlink(missing_ok=True)
+    return inserted
+
+
+class AttemptBuffer:
+    """
+    In-process write-behind buffer backed by an append-only journal.
+    """
+
+    def __init__(self, journal_dir, max_batch, flush_interval, fsync_every):
+        self.journal_dir = Path(journal_dir)
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync_every = max(1, fsync_every)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = []
+        self._sealed = []  # [(segment path, open locked file, records)] waiting for the DB
+        self._segment = None
+        self._segment_path = None
+        self._seq = 0
+        self._token = uuid.uuid4().hex[:8]
+        self._unsynced = 0
+        self._thread = None
+
+    # -------- journal --------
+    def _open_segment(self):
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        self._segment_path = self.journal_dir / f"{os.getpid()}-{self._token}-{self._seq:08d}.jsonl"
+        # Created and locked under a name replay_journal() ignores, then renamed,
+        # so no other process can lock the segment before we do
+        new_path = self._segment_path.with_name(self._segment_path.name + ".new")
+        self._segment = open(new_path, "a", encoding="utf-8")
+        if fcntl is not None:
+            fcntl.flock(self._segment, fcntl.LOCK_EX)
+        os.replace(new_path, self._segment_path)
+
+    def _sync(self):
+        if self._segment is not None and self._unsynced:
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self._unsynced = 0
+
+    def _seal_segment(self):
+        """
+        Hand the active segment, with its records, to the flusher. The file stays
+        open (and locked) until flush() has committed its records and deleted it.
+        """
+        if self._segment is None:
+            return
+        self._sync()
+        self._sealed.append((self._segment_path, self._segment, self._pending))
+        self._segment = self._segment_path = None
+        self._pending = []
+
+    # -------- public API --------
+    def start(self):
+        if self._thread is None:
+            replay_journal(self.journal_dir)
+            self._thread = threading.Thread(target=self._run, name="attempt-buffer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def submit(self, record):
+        """Journal and buffer one attempt; returns once the journal line is written."""
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(line)
+            self._segment.flush()
+            self._pending.append(record)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._sync()
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write every buffered attempt to the database and drop its segments."""
+        with self._flush_lock:
+            with self._lock:
+                self._seal_segment()
+                sealed, self._sealed = self._sealed, []
+            try:
+                for i, (path, fh, records) in enumerate(sealed):
+                    write_attempts(records)
+                    path.unlink(missing_ok=True)
+                    fh.close()  # releases the flock only once the file is gone
+            except Exception:
+                logger.exception("Attempt flush failed; keeping %d segment(s) for retry", len(sealed) - i)
+                with self._lock:
+                    self._sealed[:0] = sealed[i:]
+            finally:
+                connections.close_all()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            cfg = _config()
+            buf = AttemptBuffer(cfg["JOURNAL_DIR"], cfg["MAX_BATCH"], cfg["FLUSH_INTERVAL"], cfg["FSYNC_EVERY"])
+            # Only cache a buffer whose flush thread is running; if start() fails
+            # (e.g. replay hits a DB error) the next call tries again
+            buf.start()
+            _buffer = buf
+        return _buffer
+
+
+def record_attempts(records):
+    """
+    Hand graded attempts to the write-behind buffer (or write them
+    synchronously when ATTEMPT_BUFFER["ENABLED"] is False, e.g. in tests).
+    """
+    if not _config()["ENABLED"]:
+        write_attempts(records)
+        return
+    buf = get_buffer()
+    for record in records:
+        buf.submit(record)
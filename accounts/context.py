@@ -0,0 +1,133 @@
+"""
+Per-student context for pages that only need to display the profile.
+
+The dashboard used to load the StudentProfile, rebuild the language map,
+look up enrolled subjects and write django_language into the session on
+every page view. StudentContext holds all of that: it is built once, kept in
+the session, and memoized on the request, so a warm dashboard render runs
+no profile queries and does not modify the session.
+
+A cached context is tagged with a per-user version token from the cache.
+Saving a StudentProfile or syncing its enrollments drops the token
+(accounts/signals.py, accounts/enrollment.py), and the next request rebuilds
+the context.
+"""
+from django.core.cache import cache
+from django.utils.translation import activate
+
+from content.cache import get_or_add_version
+
+SESSION_KEY = "student_context"
+LANGUAGE_SESSION_KEY = "django_language"
+CONTEXT_VERSION_KEY = "student_context:{user_id}:version"
+CONTEXT_CACHE_KEY = "student_context:{user_id}:{version}"
+CONTEXT_TIMEOUT = 60 * 60
+
+LANGUAGE_CODES = {
+    "english": "en",
+    "hindi": "hi",
+    "marathi": "mr",
+    "bengali": "bn",
+    "tamil": "ta",
+    "gujarati": "gu",
+    "kannada": "kn",
+    "punjabi": "pa",
+    "telugu": "te",
+    "urdu": "ur",
+    "odia": "or",
+}
+
+PROFILE_FIELDS = (
+    "id", "student_name", "father_name", "address", "pincode", "student_class",
+    "subject", "board", "language", "roll_number", "mobile_number", "school_name",
+)
+
+
+class StudentContext:
+    """Read-only view of a student's profile fields plus lang_code, email and subject_cards."""
+
+    def __init__(self, data):
+        self._data = data
+        for key, value in data.items():
+            setattr(self, key, value)
+
+    def as_dict(self):
+        return dict(self._data)
+
+
+def language_code(language):
+    return LANGUAGE_CODES.get((language or "english").lower(), "en")
+
+
+def get_context_version(user_id):
+    return get_or_add_version(CONTEXT_VERSION_KEY.format(user_id=user_id))
+
+
+def invalidate_student_context(user_ids):
+    cache.delete_many([CONTEXT_VERSION_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def build_student_context(user):
+    """Load a StudentContext for user from the database, or None if they have no profile."""
+    from .enrollment import enrolled_subjects
+    from .models import StudentProfile
+
+    row = StudentProfile.objects.filter(user=user).values(*PROFILE_FIELDS).first()
+    if row is None:
+        return None
+    row["email"] = user.email
+    row["lang_code"] = language_code(row["language"])
+    row["subject_cards"] = list(enrolled_subjects(row["id"]).values_list("name", flat=True))
+    return StudentContext(row)
+
+
+def get_student_context(request):
+    """
+    Return request.user's StudentContext (None if they have no profile).
+    Memoized on the request; served from the session (or, for bearer-token
+    requests, the cache) while the version matches.
+    """
+    if hasattr(request, "_student_context"):
+        return request._student_context
+
+    user = request.user
+    version = get_context_version(user.pk)
+    if getattr(request, "token_auth", False):
+        # Bearer-token clients have no session; share the context through the cache
+        key = CONTEXT_CACHE_KEY.format(user_id=user.pk, version=version)
+        data = cache.get(key)
+        context = StudentContext(data) if data is not None else build_student_context(user)
+        if data is None and context is not None:
+            cache.set(key, context.as_dict(), CONTEXT_TIMEOUT)
+        request._student_context = context
+        return context
+
+    cached = request.session.get(SESSION_KEY)
+    if cached and cached.get("user_id") == user.pk and cached.get("version") == version:
+        context = StudentContext(cached["data"])
+    else:
+        context = build_student_context(user)
+        if context is not None:
+            remember_student_context(request, user, context, version)
+    request._student_context = context
+    return context
+
+
+def remember_student_context(request, user, context, version=None):
+    """Store context in the session (e.g. right after login, with the profile already loaded)."""
+    if version is None:
+        version = get_context_version(user.pk)
+    request.session[SESSION_KEY] = {"user_id": user.pk, "version": version, "data": context.as_dict()}
+
+
+def activate_student_language(request, context):
+    """Activate the student's language; the session is written only when it changes."""
+    activate(context.lang_code)
+    if request.session.get(LANGUAGE_SESSION_KEY) != context.lang_code:
+        request.session[LANGUAGE_SESSION_KEY] = context.lang_code
+
+
+def clear_student_context(request):
+    request.session.pop(SESSION_KEY, None)
+    if hasattr(request, "_student_context"):
+        del request._student_context
@@ -0,0 +1,102 @@
+"""
+Enrollment rows: which content.Subject each student takes.
+
+StudentProfile.subject keeps the registration form's comma-separated keys
+for the form itself; everything that needs to query by subject reads
+Enrollment instead. sync_enrollments() maps the keys to Subject rows (name,
+board and class, as seed_subject_curriculum creates them) and brings a
+batch of profiles' enrollments in line with one read and one write each way.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .context import invalidate_student_context
+from .models import Enrollment, StudentProfile
+
+
+def subject_keys(profile):
+    return [s.strip() for s in (profile.subject or "").split(",") if s.strip()]
+
+
+def subject_names(keys):
+    from .forms import StudentRegisterForm
+
+    names = dict(StudentRegisterForm.SUBJECT_CHOICES)
+    return [names.get(key, key.title()) for key in keys]
+
+
+def sync_enrollments(profiles):
+    """
+    Make each profile's Enrollment rows match its StudentProfile.subject keys
+    (and its current board/class). Subjects that do not exist are skipped.
+    """
+    from content.models import Subject
+
+    profiles = [p for p in profiles if p.pk]
+    if not profiles:
+        return
+    wanted_names = {p.pk: subject_names(subject_keys(p)) for p in profiles}
+
+    # One clause per (board, class), not per profile: rosters share a few classes
+    groups = {}
+    for p in profiles:
+        groups.setdefault((p.board, p.student_class), set()).update(wanted_names[p.pk])
+    q = Q(pk__in=[])
+    for (board, class_level), names in groups.items():
+        q |= Q(board=board, class_level=class_level, name__in=names)
+    subject_ids = {
+        (board, class_level, name): sid
+        for sid, board, class_level, name in Subject.objects.filter(q).values_list("id", "board", "class_level", "name")
+    }
+
+    wanted = {}
+    for p in profiles:
+        for name in wanted_names[p.pk]:
+            sid = subject_ids.get((p.board, p.student_class, name))
+            if sid is not None:
+                wanted[(p.pk, sid)] = (p.board, p.student_class)
+
+    existing = {
+        (student_id, subject_id): (board, class_level)
+        for student_id, subject_id, board, class_level in Enrollment.objects.filter(
+            student_id__in=[p.pk for p in profiles]
+        ).values_list("student_id", "subject_id", "board", "class_level")
+    }
+
+    stale = [key for key in existing if key not in wanted or existing[key] != wanted[key]]
+    added = [key for key in wanted if key in stale or key not in existing]
+    with transaction.atomic():
+        if stale:
+            by_student = {}
+            for student_id, subject_id in stale:
+                by_student.setdefault(student_id, []).append(subject_id)
+            q = Q(pk__in=[])
+            for student_id, ids in by_student.items():
+                q |= Q(student_id=student_id, subject_id__in=ids)
+            Enrollment.objects.filter(q).delete()
+        Enrollment.objects.bulk_create(
+            [
+                Enrollment(student_id=key[0], subject_id=key[1], board=wanted[key][0], class_level=wanted[key][1])
+                for key in added
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+    changed = {student_id for student_id, _ in stale + added}
+    if changed:
+        invalidate_student_context([p.user_id for p in profiles if p.pk in changed])
+
+
+def enrolled_subjects(profile):
+    """content.Subject queryset of the subjects profile is enrolled in, by name."""
+    from content.models import Subject
+
+    return Subject.objects.filter(enrollments__student=profile).order_by("name")
+
+
+def students_taking(board, class_level, subject_id):
+    """StudentProfile queryset for one subject in a board/class; an index range on Enrollment."""
+    return StudentProfile.objects.filter(
+        enrollments__board=board, enrollments__class_level=class_level, enrollments__subject_id=subject_id
+    )
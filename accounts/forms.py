@@ -104,24 +104,14 @@ class StudentRegisterForm(forms.ModelForm):
         self.instance.language = data.get("language")
         profile = super().save(commit=commit)
 
-        # Auto-create backend Subject, Lesson, Topic, Quiz for selected subjects
-        from content.models import Subject, Lesson, Quiz, Question, Choice
+        # Auto-create backend Subject, Lesson, Quiz for selected subjects
+        from .roster import seed_subject_curriculum
         board = data.get("board") or "CBSE"
         class_level = data.get("student_class") or "6"
-        for subj_key in data.get("subject") or []:
-            subj_name = dict(self.SUBJECT_CHOICES).get(subj_key, subj_key.title())
-            subject_obj, _ = Subject.objects.get_or_create(name=subj_name, board=board, class_level=class_level)
-            # Create a default lesson
-            lesson_obj, _ = Lesson.objects.get_or_create(subject=subject_obj, title=f"Introduction to {subj_name}")
-            # Create a default topic (if your model has Topic)
-            # If Topic model exists, add here
-            # Create a default quiz
-            quiz_obj, _ = Quiz.objects.get_or_create(lesson=lesson_obj, title=f"Quiz for {subj_name}")
-            # Create a default question
-            q_obj, _ = Question.objects.get_or_create(quiz=quiz_obj, text=f"Sample MCQ for {subj_name}", qtype="mcq", marks=1)
-            # Create choices
-            Choice.objects.get_or_create(question=q_obj, text="Option 1", is_correct=True)
-            Choice.objects.get_or_create(question=q_obj, text="Option 2", is_correct=False)
+        seed_subject_curriculum(board, class_level, data.get("subject") or [])
+        if commit:
+            from .enrollment import sync_enrollments
+            sync_enrollments([profile])
         return profile
 
 
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.attempts import replay_journal
+
+
+class Command(BaseCommand):
+    help = "Replay quiz-attempt journal segments left behind by stopped or crashed workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--journal-dir", default=None, help="Override ATTEMPT_BUFFER['JOURNAL_DIR']")
+
+    def handle(self, *args, **opts):
+        inserted = replay_journal(opts["journal_dir"])
+        self.stdout.write(self.style.SUCCESS(f"Replayed {inserted} quiz attempt(s)."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from accounts.models import StudentProgress, SubjectProgress
+from content.hierarchy import descendant_counts
+from content.models import CurriculumClosure as C
+
+
+class Command(BaseCommand):
+    help = "Recount SubjectProgress from StudentProgress and repair (or, with --verify, only report) drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Report drift without writing")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        totals = descendant_counts(C.SUBJECT, C.LESSON)
+        expected = {
+            (r["user_id"], r["subject_id"]): r["n"]
+            for r in StudentProgress.objects.values("user_id", "subject_id").annotate(
+                n=Count("lesson", filter=Q(completed=True), distinct=True)
+            ).iterator()
+        }
+
+        stale, orphans = [], []
+        seen = set()
+        rows = SubjectProgress.objects.values_list("id", "user_id", "subject_id", "completed_lessons", "total_lessons")
+        for pk, user_id, subject_id, completed, total in rows.iterator():
+            key = (user_id, subject_id)
+            seen.add(key)
+            if key not in expected:
+                orphans.append(pk)
+            elif (completed, total) != (expected[key], totals.get(subject_id, 0)):
+                stale.append(SubjectProgress(pk=pk, completed_lessons=expected[key], total_lessons=totals.get(subject_id, 0)))
+        missing = [
+            SubjectProgress(user_id=u, subject_id=s, completed_lessons=n, total_lessons=totals.get(s, 0))
+            for (u, s), n in expected.items()
+            if (u, s) not in seen
+        ]
+
+        self.stdout.write(f"{len(stale)} stale, {len(missing)} missing, {len(orphans)} orphaned row(s).")
+        if opts["verify"]:
+            if stale or missing or orphans:
+                self.stdout.write(self.style.WARNING("SubjectProgress has drifted; rerun without --verify to repair."))
+            else:
+                self.stdout.write(self.style.SUCCESS("SubjectProgress is consistent."))
+            return
+
+        with transaction.atomic():
+            SubjectProgress.objects.bulk_update(stale, ["completed_lessons", "total_lessons"], batch_size=opts["batch_size"])
+            SubjectProgress.objects.bulk_create(missing, batch_size=opts["batch_size"])
+            SubjectProgress.objects.filter(pk__in=orphans).delete()
+        self.stdout.write(self.style.SUCCESS("SubjectProgress repaired."))
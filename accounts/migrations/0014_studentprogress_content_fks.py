@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def refuse_existing_progress(apps, schema_editor):
+    # The ids in these columns point at accounts.Subject/Lesson/Topic. There is no
+    # reliable mapping onto content.* rows, and keeping them as-is would silently
+    # attach every completion to whatever content row happens to share the id.
+    StudentProgress = apps.get_model('accounts', 'StudentProgress')
+    count = StudentProgress.objects.count()
+    if count:
+        raise RuntimeError(
+            f"accounts.StudentProgress has {count} rows referencing accounts.Subject/Lesson/Topic. "
+            "Export and clear them before retargeting the foreign keys to content.*; "
+            "completions can then be re-recorded against the content tree."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_remove_teacherprofile_user_remove_profile_photo_and_more'),
+        ('content', '0004_topic'),
+    ]
+
+    operations = [
+        migrations.RunPython(refuse_existing_progress, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='studentprogress',
+            name='subject',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='content.subject'),
+        ),
+        migrations.AlterField(
+            model_name='studentprogress',
+            name='lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='content.lesson'),
+        ),
+        migrations.AlterField(
+            model_name='studentprogress',
+            name='topic',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='content.topic'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    from django.db.models import Count, Q
+
+    StudentProgress = apps.get_model('accounts', 'StudentProgress')
+    SubjectProgress = apps.get_model('accounts', 'SubjectProgress')
+    Subject = apps.get_model('content', 'Subject')
+
+    totals = dict(Subject.objects.annotate(n=Count('lessons')).values_list('id', 'n'))
+    rows = (
+        StudentProgress.objects.values('user_id', 'subject_id')
+        .annotate(n=Count('lesson', filter=Q(completed=True), distinct=True))
+    )
+    SubjectProgress.objects.bulk_create(
+        [
+            SubjectProgress(
+                user_id=r['user_id'], subject_id=r['subject_id'],
+                completed_lessons=r['n'], total_lessons=totals.get(r['subject_id'], 0),
+            )
+            for r in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_quizsession'),
+        ('content', '0004_topic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('total_lessons', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='content.subject')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'subject')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
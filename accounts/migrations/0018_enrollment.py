@@ -0,0 +1,67 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+SUBJECT_NAMES = {
+    "math": "Math",
+    "hindi": "Hindi",
+    "english": "English",
+    "computer science": "Computer Science",
+    "physics": "Physics",
+    "chemistry": "Chemistry",
+    "biology": "Biology",
+    "geography": "Geography",
+    "history": "History",
+    "ethics": "Ethics",
+}
+
+
+def backfill(apps, schema_editor):
+    StudentProfile = apps.get_model('accounts', 'StudentProfile')
+    Enrollment = apps.get_model('accounts', 'Enrollment')
+    Subject = apps.get_model('content', 'Subject')
+
+    subject_ids = {
+        (board, class_level, name): sid
+        for sid, board, class_level, name in Subject.objects.values_list('id', 'board', 'class_level', 'name')
+    }
+    rows = []
+    for pk, board, student_class, csv_value in StudentProfile.objects.values_list('id', 'board', 'student_class', 'subject').iterator():
+        seen = set()
+        for key in (s.strip() for s in (csv_value or '').split(',')):
+            if not key:
+                continue
+            sid = subject_ids.get((board, student_class, SUBJECT_NAMES.get(key, key.title())))
+            if sid is not None and sid not in seen:
+                seen.add(sid)
+                rows.append(Enrollment(student_id=pk, subject_id=sid, board=board, class_level=student_class))
+    Enrollment.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_subjectprogress'),
+        ('content', '0010_curriculumclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=50)),
+                ('class_level', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='accounts.studentprofile')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='content.subject')),
+            ],
+            options={
+                'unique_together': {('student', 'subject')},
+                'indexes': [
+                    models.Index(fields=['board', 'class_level', 'subject'], name='accounts_en_board_cls_subj_idx'),
+                    models.Index(fields=['subject', 'student'], name='accounts_en_subject_stud_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
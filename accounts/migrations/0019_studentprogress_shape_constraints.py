@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+
+def dedupe_progress(apps, schema_editor):
+    """Merge rows the old NULL-blind unique index let through: keep the first, completed if any was."""
+    StudentProgress = apps.get_model('accounts', 'StudentProgress')
+
+    keep = {}
+    duplicates = []
+    completed = {}
+    rows = StudentProgress.objects.order_by('id').values_list(
+        'id', 'user_id', 'subject_id', 'lesson_id', 'topic_id', 'completed', 'completed_at'
+    )
+    for pk, user_id, subject_id, lesson_id, topic_id, done, done_at in rows.iterator():
+        # The topic determines the lesson, so topic-level rows are keyed without it
+        key = (user_id, subject_id, None if topic_id else lesson_id, topic_id)
+        if key not in keep:
+            keep[key] = pk
+            continue
+        duplicates.append(pk)
+        if done:
+            completed.setdefault(keep[key], done_at)
+    for pk, done_at in completed.items():
+        StudentProgress.objects.filter(pk=pk, completed=False).update(completed=True, completed_at=done_at)
+    for start in range(0, len(duplicates), 500):
+        StudentProgress.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_enrollment'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_progress, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='studentprogress',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='studentprogress',
+            constraint=models.UniqueConstraint(condition=models.Q(('lesson__isnull', True), ('topic__isnull', True)), fields=('user', 'subject'), name='progress_unique_subject_level'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentprogress',
+            constraint=models.UniqueConstraint(condition=models.Q(('lesson__isnull', False), ('topic__isnull', True)), fields=('user', 'subject', 'lesson'), name='progress_unique_lesson_level'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentprogress',
+            constraint=models.UniqueConstraint(condition=models.Q(('topic__isnull', False)), fields=('user', 'subject', 'topic'), name='progress_unique_topic_level'),
+        ),
+    ]
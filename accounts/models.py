@@ -149,14 +149,32 @@ class StudentProgress(models.Model):
     We store one row per (user, subject, lesson) completion.
     """
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="progress_entries")
-    subject = models.ForeignKey('accounts.Subject', on_delete=models.CASCADE)
-    lesson = models.ForeignKey('accounts.Lesson', on_delete=models.CASCADE, null=True, blank=True)
-    topic = models.ForeignKey('accounts.Topic', on_delete=models.CASCADE, null=True, blank=True)
+    subject = models.ForeignKey('content.Subject', on_delete=models.CASCADE)
+    lesson = models.ForeignKey('content.Lesson', on_delete=models.CASCADE, null=True, blank=True)
+    topic = models.ForeignKey('content.Topic', on_delete=models.CASCADE, null=True, blank=True)
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        unique_together = ("user", "subject", "lesson", "topic")
+        # One constraint per key shape: lesson/topic are nullable and NULLs never
+        # collide in a plain unique index, so (user, subject, NULL, NULL) would repeat.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "subject"],
+                condition=models.Q(lesson__isnull=True, topic__isnull=True),
+                name="progress_unique_subject_level",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "subject", "lesson"],
+                condition=models.Q(lesson__isnull=False, topic__isnull=True),
+                name="progress_unique_lesson_level",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "subject", "topic"],
+                condition=models.Q(topic__isnull=False),
+                name="progress_unique_topic_level",
+            ),
+        ]
 
     def mark_completed(self):
         self.completed = True
@@ -173,3 +191,110 @@ class StudentProgress(models.Model):
             "completed": self.completed,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
         }
+
+
+class QuizAttempt(models.Model):
+    """
+    One graded quiz submission. Rows are append-only: they are written in
+    batches by accounts.attempts and never updated afterwards.
+    uid is generated at submit time and makes journal replays idempotent.
+    """
+    uid = models.UUIDField(unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="quiz_attempts")
+    # No DB constraint: history outlives quizzes edited or removed in admin
+    quiz = models.ForeignKey('content.Quiz', on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    score = models.IntegerField()
+    total = models.IntegerField()
+    submitted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "quiz", "submitted_at"])]
+
+    def __str__(self):
+        return f"{self.user_id} quiz {self.quiz_id}: {self.score}/{self.total}"
+
+
+class AttemptAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name="answers")
+    question = models.ForeignKey('content.Question', on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    choice = models.ForeignKey('content.Choice', on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name="+")
+    correct = models.BooleanField(default=False)
+
+
+class QuizSession(models.Model):
+    """
+    Server-side timer for a timed quiz. Opened when the quiz is fetched,
+    closed on submit or by the expiry scheduler in accounts.quiz_sessions.
+    """
+    OPEN = "open"
+    SUBMITTED = "submitted"
+    EXPIRED = "expired"
+    STATUS_CHOICES = ((OPEN, "Open"), (SUBMITTED, "Submitted"), (EXPIRED, "Expired"))
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="quiz_sessions")
+    quiz = models.ForeignKey('content.Quiz', on_delete=models.CASCADE, related_name="sessions")
+    started_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "expires_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "quiz"], condition=models.Q(status="open"), name="one_open_session_per_quiz"
+            ),
+        ]
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "started_at": self.started_at.isoformat(),
+            "expires_at": self.expires_at.isoformat(),
+            "status": self.status,
+        }
+
+
+class SubjectProgress(models.Model):
+    """
+    Denormalized lesson counts per (user, subject), kept current by
+    accounts.progress so reading a student's percent is one indexed lookup.
+    Repair drift with `manage.py rebuild_subject_progress`.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="subject_progress")
+    subject = models.ForeignKey('content.Subject', on_delete=models.CASCADE, related_name="+")
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "subject")
+
+    @property
+    def percent(self):
+        if self.total_lessons <= 0:
+            return 0
+        return int((self.completed_lessons / self.total_lessons) * 100)
+
+
+class Enrollment(models.Model):
+    """
+    A student taking a content.Subject; replaces parsing StudentProfile.subject.
+    board/class_level are copied from the profile so "all Class 9 CBSE
+    students taking Physics" is one index range. Kept in step by accounts.enrollment.
+    """
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="enrollments")
+    subject = models.ForeignKey('content.Subject', on_delete=models.CASCADE, related_name="enrollments")
+    board = models.CharField(max_length=50)
+    class_level = models.CharField(max_length=10)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("student", "subject")
+        indexes = [
+            models.Index(fields=["board", "class_level", "subject"], name="accounts_en_board_cls_subj_idx"),
+            models.Index(fields=["subject", "student"], name="accounts_en_subject_stud_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} -> {self.subject_id}"
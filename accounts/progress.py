@@ -0,0 +1,212 @@
+"""
+Bulk helpers for StudentProgress.
+
+Completions are written as one upsert per call instead of a get_or_create +
+save per row, and subject percentages are computed for many subjects with a
+single grouped aggregate.
+
+SubjectProgress holds the same percentages pre-counted per (user, subject).
+Only the keys touched by a write are recounted (refresh_subject_progress /
+refresh_subject_totals), so reads never aggregate.
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StudentProgress, SubjectProgress
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_progress_keys(items):
+    """
+    Validate (subject_id, lesson_id, topic_id) triples against the curriculum.
+    Unknown subjects drop the item; lessons/topics that do not exist or do not
+    sit under the given subject (and lesson) are stored as None.
+    One closure-table query for any number of items.
+    """
+    from content.hierarchy import resolve_nodes
+    from content.models import CurriculumClosure as C
+
+    items = [tuple(_as_int(v) for v in item) for item in items]
+    nodes = resolve_nodes(
+        [(C.SUBJECT, i[0]) for i in items if i[0] is not None]
+        + [(C.LESSON, i[1]) for i in items if i[1] is not None]
+        + [(C.TOPIC, i[2]) for i in items if i[2] is not None]
+    )
+
+    resolved = []
+    for subject_id, lesson_id, topic_id in items:
+        if (C.SUBJECT, subject_id) not in nodes:
+            resolved.append(None)
+            continue
+        lesson = nodes.get((C.LESSON, lesson_id), {})
+        if lesson.get(C.SUBJECT) != subject_id:
+            lesson_id = None
+        topic = nodes.get((C.TOPIC, topic_id), {})
+        if topic.get(C.SUBJECT) != subject_id or (lesson_id is not None and topic.get(C.LESSON) != lesson_id):
+            topic_id = None
+        resolved.append((subject_id, lesson_id, topic_id))
+    return resolved
+
+
+def record_completions(user, keys):
+    """
+    Mark every (subject_id, lesson_id, topic_id) in keys completed for user.
+    Existing rows are read once, new rows go through a single bulk upsert and
+    rows that exist but are not yet completed through a single bulk update.
+    """
+    keys = {k for k in keys if k is not None}
+    if not keys:
+        return
+    now = timezone.now()
+    existing = {
+        (subject_id, lesson_id, topic_id): (pk, completed)
+        for pk, subject_id, lesson_id, topic_id, completed in StudentProgress.objects.filter(
+            user=user, subject_id__in={k[0] for k in keys}
+        ).values_list("id", "subject_id", "lesson_id", "topic_id", "completed")
+    }
+    new_rows = [
+        StudentProgress(user=user, subject_id=s, lesson_id=l, topic_id=t, completed=True, completed_at=now)
+        for s, l, t in keys
+        if (s, l, t) not in existing
+    ]
+    stale_rows = [
+        StudentProgress(pk=pk, completed=True, completed_at=now)
+        for key, (pk, completed) in existing.items()
+        if key in keys and not completed
+    ]
+    with transaction.atomic():
+        if new_rows:
+            # A concurrent request may insert the same key between our read and
+            # this write. The per-shape partial unique constraints on
+            # StudentProgress reject the duplicate and ignore_conflicts skips it;
+            # the racing row is then completed below like any stale one.
+            StudentProgress.objects.bulk_create(new_rows, ignore_conflicts=True)
+            new_keys = {(r.subject_id, r.lesson_id, r.topic_id) for r in new_rows}
+            stale_rows += [
+                StudentProgress(pk=pk, completed=True, completed_at=now)
+                for pk, subject_id, lesson_id, topic_id in StudentProgress.objects.filter(
+                    user=user, subject_id__in={k[0] for k in new_keys}, completed=False
+                ).values_list("id", "subject_id", "lesson_id", "topic_id")
+                if (subject_id, lesson_id, topic_id) in new_keys
+            ]
+        if stale_rows:
+            StudentProgress.objects.bulk_update(stale_rows, ["completed", "completed_at"])
+
+
+def _lesson_count(subject_ref):
+    from content.hierarchy import count_descendants
+    from content.models import CurriculumClosure as C
+
+    return Coalesce(Subquery(count_descendants(C.SUBJECT, subject_ref, C.LESSON)), 0)
+
+
+def annotate_progress(subjects, user):
+    """
+    Annotate a content.Subject queryset with total_lessons (from the closure
+    table) and the user's completed_lessons; evaluating it is one GROUP BY query.
+    """
+    return subjects.annotate(
+        total_lessons=_lesson_count(OuterRef("pk")),
+        completed_lessons=Count(
+            "studentprogress__lesson",
+            filter=Q(studentprogress__user=user, studentprogress__completed=True),
+            distinct=True,
+        ),
+    )
+
+
+def _percent(completed, total):
+    return int((completed / total) * 100) if total > 0 else 0
+
+
+def enrolled_subject_progress(user, profile):
+    """
+    Progress for every subject the student is enrolled in, in one query.
+    """
+    from .enrollment import enrolled_subjects
+
+    return [
+        {
+            "subject_id": subject_id,
+            "name": name,
+            "completed_lessons": completed,
+            "total_lessons": total,
+            "percent": _percent(completed, total),
+        }
+        for subject_id, name, total, completed in annotate_progress(enrolled_subjects(profile), user).values_list(
+            "id", "name", "total_lessons", "completed_lessons"
+        )
+    ]
+
+
+def refresh_subject_progress(user_id, subject_ids):
+    """
+    Recount completed lessons for one user in subject_ids and upsert their
+    SubjectProgress rows. Returns {subject_id: percent}.
+    """
+    from content.models import Subject
+
+    subject_ids = {sid for sid in subject_ids if sid is not None}
+    if not subject_ids:
+        return {}
+    completed = dict(
+        StudentProgress.objects.filter(user_id=user_id, subject_id__in=subject_ids, completed=True)
+        .exclude(lesson__isnull=True)
+        .values("subject_id")
+        .annotate(n=Count("lesson", distinct=True))
+        .values_list("subject_id", "n")
+    )
+    rows = [
+        SubjectProgress(user_id=user_id, subject_id=sid, completed_lessons=completed.get(sid, 0), total_lessons=total)
+        for sid, total in Subject.objects.filter(pk__in=subject_ids)
+        .annotate(n=_lesson_count(OuterRef("pk")))
+        .values_list("id", "n")
+    ]
+    SubjectProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user", "subject"],
+        update_fields=["completed_lessons", "total_lessons", "updated_at"],
+    )
+    return {row.subject_id: row.percent for row in rows}
+
+
+def refresh_subject_totals(subject_ids):
+    """
+    Re-read the lesson count of each subject into its SubjectProgress rows (one UPDATE).
+    Counts the Lesson table, not the closure: this runs from Lesson save/delete
+    receivers (accounts/signals.py) that fire before content updates the closure.
+    """
+    from content.models import Lesson
+
+    subject_ids = {sid for sid in subject_ids if sid is not None}
+    if not subject_ids:
+        return
+    lesson_count = (
+        Lesson.objects.filter(subject_id=OuterRef("subject_id"))
+        .values("subject_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    SubjectProgress.objects.filter(subject_id__in=subject_ids).update(
+        total_lessons=Coalesce(Subquery(lesson_count), 0), updated_at=timezone.now()
+    )
+
+
+def subject_percent(user, subject_id):
+    """
+    Read one student's percent for a subject from SubjectProgress.
+    Returns None when there is no row (no progress recorded yet).
+    """
+    row = SubjectProgress.objects.filter(user=user, subject_id=subject_id).only(
+        "completed_lessons", "total_lessons"
+    ).first()
+    return row.percent if row else None
@@ -0,0 +1,230 @@
+"""
+Server-enforced time limits for quizzes.
+
+A QuizSession is opened when a timed quiz is fetched and closed when it is
+submitted. A timed quiz (Quiz.time_limit) can only be submitted through an
+open session, and only once. Sessions that are never submitted are closed on time by an
+in-process hashed timer wheel: scheduling and cancelling are O(1), and each
+tick only looks at the one wheel slot that is due, so tens of thousands of
+concurrent exam sessions never require a scan of the sessions table. Expired
+ids are closed with a single UPDATE ... WHERE id IN (...) per tick.
+
+The wheel is only responsible for closing rows on time. Whether a submission
+is accepted is always decided from the row's expires_at, so a submit that
+reaches a different worker than the one that opened the session is still
+judged correctly.
+"""
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+DEFAULTS = {
+    "TICK": 1.0,      # seconds per wheel slot
+    "SLOTS": 512,     # wheel size; one revolution = TICK * SLOTS seconds
+    "GRACE": 5,       # seconds of network slack allowed after the deadline
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "QUIZ_SESSIONS", {})}
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel keyed by arbitrary hashable keys.
+    Deadlines further out than one revolution stay in their slot and are
+    skipped until the wheel comes round to their tick.
+    """
+
+    def __init__(self, tick=1.0, slots=512, now=None):
+        self.tick = tick
+        self.slots = slots
+        self._buckets = [{} for _ in range(slots)]
+        self._where = {}
+        self._cursor = int((time.time() if now is None else now) // tick)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._where)
+
+    def schedule(self, key, deadline):
+        """Fire key once the wall clock reaches deadline (a UNIX timestamp)."""
+        with self._lock:
+            self._cancel(key)
+            t = max(int(math.ceil(deadline / self.tick)), self._cursor + 1)
+            self._buckets[t % self.slots][key] = t
+            self._where[key] = t
+
+    def cancel(self, key):
+        with self._lock:
+            self._cancel(key)
+
+    def _cancel(self, key):
+        t = self._where.pop(key, None)
+        if t is not None:
+            self._buckets[t % self.slots].pop(key, None)
+
+    def advance(self, now):
+        """Move the wheel to now and return the keys whose deadline has passed."""
+        target = int(now // self.tick)
+        expired = []
+        with self._lock:
+            steps = min(target - self._cursor, self.slots)
+            for step in range(1, steps + 1):
+                bucket = self._buckets[(self._cursor + step) % self.slots]
+                due = [key for key, t in bucket.items() if t <= target]
+                for key in due:
+                    del bucket[key]
+                    del self._where[key]
+                expired.extend(due)
+            self._cursor = max(self._cursor, target)
+        return expired
+
+
+def expire_sessions(session_ids):
+    """Close the given sessions if they are still open. Returns the number closed."""
+    from .models import QuizSession
+
+    if not session_ids:
+        return 0
+    return QuizSession.objects.filter(pk__in=session_ids, status=QuizSession.OPEN).update(
+        status=QuizSession.EXPIRED, closed_at=timezone.now()
+    )
+
+
+class SessionExpiryScheduler:
+    """
+    Background thread that advances a TimerWheel and expires due sessions.
+    """
+
+    def __init__(self, tick, slots, grace):
+        self.wheel = TimerWheel(tick=tick, slots=slots)
+        self.grace = grace
+        self._thread = None
+
+    def start(self):
+        from .models import QuizSession
+
+        if self._thread is not None:
+            return
+        # Pick up sessions opened by workers that have since restarted.
+        # Served by the (status, expires_at) index: open rows only.
+        for pk, expires_at in QuizSession.objects.filter(status=QuizSession.OPEN).values_list("id", "expires_at"):
+            self.schedule(pk, expires_at)
+        self._thread = threading.Thread(target=self._run, name="quiz-session-expiry", daemon=True)
+        self._thread.start()
+
+    def schedule(self, session_id, expires_at):
+        self.wheel.schedule(session_id, expires_at.timestamp() + self.grace)
+
+    def cancel(self, session_id):
+        self.wheel.cancel(session_id)
+
+    def _run(self):
+        while True:
+            time.sleep(self.wheel.tick)
+            expired = self.wheel.advance(time.time())
+            if expired:
+                try:
+                    expire_sessions(expired)
+                finally:
+                    connections.close_all()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            cfg = _config()
+            _scheduler = SessionExpiryScheduler(cfg["TICK"], cfg["SLOTS"], cfg["GRACE"])
+            _scheduler.start()
+        return _scheduler
+
+
+def start_session(user, quiz_id, time_limit):
+    """
+    Open (or return the still-running) session for user on a timed quiz.
+    Timed quizzes are single-attempt: once the student's latest session is
+    submitted or expired it is returned as is and no new one is opened, so
+    re-fetching the quiz cannot restart the clock. Staff allow a retake by
+    deleting the closed session in the admin.
+    """
+    from .models import QuizSession
+
+    now = timezone.now()
+    session = QuizSession.objects.filter(user=user, quiz_id=quiz_id).order_by("-started_at").first()
+    if session is not None:
+        if session.status != QuizSession.OPEN:
+            return session
+        if session.expires_at + timedelta(seconds=_config()["GRACE"]) >= now:
+            return session
+        expire_sessions([session.pk])
+        session.refresh_from_db()
+        return session
+
+    try:
+        with transaction.atomic():
+            session = QuizSession.objects.create(
+                user=user,
+                quiz_id=quiz_id,
+                started_at=now,
+                expires_at=now + timedelta(seconds=time_limit),
+            )
+    except IntegrityError:
+        # Another request from the same student opened it first
+        return QuizSession.objects.get(user=user, quiz_id=quiz_id, status=QuizSession.OPEN)
+    get_scheduler().schedule(session.pk, session.expires_at)
+    return session
+
+
+def close_sessions(user, time_limits):
+    """
+    Close the student's latest session for each timed quiz on submit.
+    time_limits: {quiz_id: time_limit} (0/None for untimed quizzes).
+    Returns {quiz_id: allowed} for every quiz. Untimed quizzes are always
+    allowed. A timed quiz is allowed only if its latest session is open and
+    within its deadline plus GRACE; a submit without a session (the quiz was
+    never fetched, so no clock was started), a late one or a repeated one is
+    refused.
+    """
+    from .models import QuizSession
+
+    allowed = {quiz_id: True for quiz_id, limit in time_limits.items() if not limit}
+    timed = [quiz_id for quiz_id in time_limits if quiz_id not in allowed]
+    if not timed:
+        return allowed
+
+    latest = {}
+    for session in QuizSession.objects.filter(user=user, quiz_id__in=timed).order_by("started_at"):
+        latest[session.quiz_id] = session
+
+    now = timezone.now()
+    grace = timedelta(seconds=_config()["GRACE"])
+    for quiz_id in timed:
+        session = latest.get(quiz_id)
+        if session is None or session.status != QuizSession.OPEN:
+            allowed[quiz_id] = False
+            continue
+        on_time = session.expires_at + grace >= now
+        # Guarded on status so two racing submits cannot both close it
+        closed = QuizSession.objects.filter(pk=session.pk, status=QuizSession.OPEN).update(
+            status=QuizSession.SUBMITTED if on_time else QuizSession.EXPIRED, closed_at=now
+        )
+        if _scheduler is not None:
+            _scheduler.cancel(session.pk)
+        allowed[quiz_id] = bool(closed) and on_time
+    return allowed
+
+
+def close_session(user, quiz_id, time_limit):
+    """close_sessions() for one quiz: True if the submission is allowed."""
+    return close_sessions(user, {quiz_id: time_limit})[quiz_id]
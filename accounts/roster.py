@@ -0,0 +1,222 @@
+"""
+Bulk school roster import.
+
+A roster CSV has one student per row:
+    email, username, password, student_name, student_class, board, subjects,
+    [language, father_name, address, pincode, roll_number, mobile_number, school_name]
+subjects are StudentRegisterForm.SUBJECT_CHOICES keys separated by "|" or ",".
+
+Rows are validated the way StudentRegisterForm validates a registration
+(unique email/username, password validators), passwords are hashed in
+parallel, and Users and StudentProfiles are written with one bulk_create each. The default curriculum
+is seeded once per (board, class, subject) for the whole roster instead of
+once per student, and Enrollment rows are created in one pass.
+"""
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model, password_validation
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .enrollment import sync_enrollments
+from .models import StudentProfile
+
+# Below this many passwords the pool start-up costs more than it saves
+MIN_PARALLEL = 16
+
+
+# ------------------ CURRICULUM SEEDING ------------------
+def seed_subject_curriculum(board, class_level, subject_keys):
+    """
+    Make sure each selected subject exists for (board, class_level) with its
+    default lesson, quiz and sample question. Safe to call repeatedly.
+    """
+    from content.models import Subject, Lesson, Quiz, Question, Choice
+    from .forms import StudentRegisterForm
+
+    names = dict(StudentRegisterForm.SUBJECT_CHOICES)
+    for subj_key in subject_keys:
+        subj_name = names.get(subj_key, subj_key.title())
+        subject_obj, _ = Subject.objects.get_or_create(name=subj_name, board=board, class_level=class_level)
+        lesson_obj, _ = Lesson.objects.get_or_create(subject=subject_obj, title=f"Introduction to {subj_name}")
+        quiz_obj, _ = Quiz.objects.get_or_create(lesson=lesson_obj, title=f"Quiz for {subj_name}")
+        q_obj, _ = Question.objects.get_or_create(quiz=quiz_obj, text=f"Sample MCQ for {subj_name}", qtype="mcq", marks=1)
+        Choice.objects.get_or_create(question=q_obj, text="Option 1", is_correct=True)
+        Choice.objects.get_or_create(question=q_obj, text="Option 2", is_correct=False)
+
+
+# ------------------ PASSWORD HASHING ------------------
+def _init_worker():
+    # Forked workers inherit a configured Django; spawned ones need setup()
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords, workers=None, processes=False):
+    """
+    make_password() for every password, in parallel. Order is preserved.
+    processes=True uses a process pool; only do that from a management command.
+    Forking a threaded WSGI worker (open DB connections, the attempt flusher
+    and session expiry threads) is unsafe, so web requests use threads:
+    hashlib's PBKDF2 releases the GIL, so they still hash in parallel.
+    """
+    if len(passwords) < MIN_PARALLEL or workers == 1:
+        return [make_password(p) for p in passwords]
+    workers = workers or os.cpu_count() or 1
+    if not processes:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(make_password, passwords))
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+# ------------------ VALIDATION ------------------
+def _split_subjects(value):
+    return [s.strip().lower() for s in (value or "").replace("|", ",").split(",") if s.strip()]
+
+
+def clean_rows(records):
+    """
+    Validate roster records. Returns (rows, errors) where rows are normalized
+    dicts and errors are [{line, error}] for rejected records.
+    """
+    from .forms import StudentRegisterForm
+
+    User = get_user_model()
+    subject_keys = {key for key, _ in StudentRegisterForm.SUBJECT_CHOICES}
+    classes = {key for key, _ in StudentProfile._meta.get_field("student_class").choices}
+    boards = {key for key, _ in StudentProfile._meta.get_field("board").choices}
+
+    records = list(records)
+    # One query each for clashes with existing accounts
+    emails = {(r.get("email") or "").strip().lower() for _, r in records}
+    usernames = {(r.get("username") or "").strip().lower() for _, r in records}
+    taken_emails = set(User.objects.annotate(e=Lower("email")).filter(e__in=emails).values_list("e", flat=True))
+    taken_usernames = set(User.objects.annotate(u=Lower("username")).filter(u__in=usernames).values_list("u", flat=True))
+
+    rows, errors = [], []
+    for line, r in records:
+        try:
+            email = (r.get("email") or "").strip()
+            username = (r.get("username") or "").strip()
+            password = r.get("password") or ""
+            try:
+                validate_email(email)
+            except ValidationError:
+                raise ValidationError("invalid email")
+            if not username:
+                raise ValidationError("username is required")
+            if email.lower() in taken_emails:
+                raise ValidationError("a user with this email already exists")
+            if username.lower() in taken_usernames:
+                raise ValidationError("this username is already taken")
+            if not (r.get("student_name") or "").strip():
+                raise ValidationError("student_name is required")
+            student_class = (r.get("student_class") or "").strip()
+            if student_class not in classes:
+                raise ValidationError(f"student_class must be one of {', '.join(sorted(classes, key=int))}")
+            board = (r.get("board") or "").strip().upper()
+            if board not in boards:
+                raise ValidationError(f"board must be one of {', '.join(sorted(boards))}")
+            subjects = _split_subjects(r.get("subjects"))
+            unknown = set(subjects) - subject_keys
+            if unknown:
+                raise ValidationError(f"unknown subject(s): {', '.join(sorted(unknown))}")
+            password_validation.validate_password(password)
+        except ValidationError as e:
+            errors.append({"line": line, "error": "; ".join(e.messages)})
+            continue
+
+        taken_emails.add(email.lower())
+        taken_usernames.add(username.lower())
+        rows.append({
+            "email": email,
+            "username": username,
+            "password": password,
+            "student_name": r["student_name"].strip()[:150],
+            "student_class": student_class,
+            "board": board,
+            "subjects": subjects,
+            "language": (r.get("language") or "").strip().lower()[:20],
+            "father_name": (r.get("father_name") or "").strip()[:100],
+            "address": (r.get("address") or "").strip()[:255],
+            "pincode": (r.get("pincode") or "").strip()[:10],
+            "roll_number": (r.get("roll_number") or "").strip()[:50],
+            "mobile_number": (r.get("mobile_number") or "").strip()[:15],
+            "school_name": (r.get("school_name") or "").strip()[:150],
+        })
+    return rows, errors
+
+
+# ------------------ IMPORT ------------------
+def read_roster(fh):
+    """Yield (line_no, record) from a text CSV stream with a header row."""
+    reader = csv.DictReader(fh)
+    for record in reader:
+        yield reader.line_num, {(k or "").strip().lower(): v for k, v in record.items()}
+
+
+def import_roster(records, workers=None, dry_run=False, processes=False):
+    """
+    Create Users and StudentProfiles for valid roster records.
+    workers/processes are passed to hash_passwords().
+    Returns {created, invalid, errors, seeded_subjects}.
+    """
+    rows, errors = clean_rows(records)
+    stats = {"created": 0, "invalid": len(errors), "errors": errors, "seeded_subjects": 0, "dry_run": dry_run}
+    if dry_run:
+        stats["created"] = len(rows)
+        return stats
+    if not rows:
+        return stats
+
+    hashes = hash_passwords([r["password"] for r in rows], workers, processes=processes)
+
+    User = get_user_model()
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [User(email=r["email"], username=r["username"], password=h) for r, h in zip(rows, hashes)],
+            batch_size=500,
+        )
+        if any(u.pk is None for u in users):
+            ids = dict(User.objects.filter(email__in=[r["email"] for r in rows]).values_list("email", "id"))
+            for u in users:
+                u.pk = ids[u.email]
+        profiles = StudentProfile.objects.bulk_create(
+            [
+                StudentProfile(
+                    user_id=u.pk,
+                    subject=", ".join(r["subjects"]),
+                    **{k: v for k, v in r.items() if k not in ("email", "username", "password", "subjects")},
+                )
+                for u, r in zip(users, rows)
+            ],
+            batch_size=500,
+        )
+
+        groups = {}
+        for r in rows:
+            groups.setdefault((r["board"], r["student_class"]), set()).update(r["subjects"])
+        for (board, class_level), subjects in groups.items():
+            seed_subject_curriculum(board, class_level, sorted(subjects))
+            stats["seeded_subjects"] += len(subjects)
+
+        if any(p.pk is None for p in profiles):
+            profiles = list(StudentProfile.objects.filter(user_id__in=[u.pk for u in users]))
+        sync_enrollments(profiles)
+
+    stats["created"] = len(rows)
+    return stats
+
+
+def import_roster_file(binary_fh, **kwargs):
+    return import_roster(read_roster(io.TextIOWrapper(binary_fh, encoding="utf-8-sig", newline="")), **kwargs)
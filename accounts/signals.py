@@ -1,6 +1,6 @@
 # ''''''''from django.db.models.signals import post_save
 # from django.dispatch import receiver
-# from django.conf import settings
+# from django.contrib.auth import get_user_model
 # from .models import Profile
 
 # @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -9,3 +9,56 @@
 #         Profile.objects.create(user=instance)
 #     else:
 #         instance.profile.save()
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from content.models import Subject, Lesson
+from .context import invalidate_student_context
+from .models import StudentProfile, StudentProgress
+from .progress import refresh_subject_progress, refresh_subject_totals
+from .tokens import forget_user
+
+
+# ------------------ SUBJECT PROGRESS COUNTERS ------------------
+# Bulk writes in accounts.progress refresh the counters themselves; these
+# receivers cover single-row saves/deletes (admin, shell, cascades).
+@receiver([post_save, post_delete], sender=StudentProgress)
+def sync_subject_progress(sender, instance, **kwargs):
+    origin = kwargs.get("origin")
+    if getattr(origin, "model", type(origin)) in (Subject, get_user_model()):
+        return  # the SubjectProgress rows are being cascade-deleted too
+    refresh_subject_progress(instance.user_id, [instance.subject_id])
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_subject(sender, instance, **kwargs):
+    instance._previous_subject_id = (
+        Lesson.objects.filter(pk=instance.pk).values_list("subject_id", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Lesson)
+def sync_subject_totals_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_subject_id", None)
+    if created or previous != instance.subject_id:
+        refresh_subject_totals([instance.subject_id, previous])
+
+
+@receiver(post_delete, sender=Lesson)
+def sync_subject_totals_on_delete(sender, instance, **kwargs):
+    refresh_subject_totals([instance.subject_id])
+
+
+# ------------------ STUDENT CONTEXT ------------------
+# Enrollment changes go through sync_enrollments(), which invalidates itself.
+@receiver([post_save, post_delete], sender=StudentProfile)
+def invalidate_context_on_profile_change(sender, instance, **kwargs):
+    invalidate_student_context([instance.user_id])
+
+
+# ------------------ TOKEN AUTH USER CACHE ------------------
+@receiver([post_save, post_delete], sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -1,3 +1,509 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import tempfile
+import unittest
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from content.models import Choice, Lesson, Question, Quiz, Subject
+
+from .attempts import AttemptBuffer, fcntl, replay_journal
+from .forms import StudentRegisterForm
+from .models import Enrollment, QuizAttempt, QuizSession, StudentProfile, StudentProgress, SubjectProgress, User
+from .progress import record_completions, subject_percent
+from .quiz_sessions import TimerWheel, expire_sessions
+from .roster import hash_passwords, import_roster_file
+from .throttle import _retry_after, check_login, login_succeeded
+
+
+def _record(user, quiz_id=1, score=1):
+    return {
+        "uid": str(uuid.uuid4()),
+        "user_id": user.pk,
+        "quiz_id": quiz_id,
+        "score": score,
+        "total": 1,
+        "submitted_at": timezone.now().isoformat(),
+        "answers": [],
+    }
+
+
+# ------------------ ATTEMPT JOURNAL ------------------
+class AttemptJournalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.journal_dir = Path(tmp.name)
+
+    def _buffer(self):
+        return AttemptBuffer(self.journal_dir, max_batch=500, flush_interval=60, fsync_every=1)
+
+    def test_replay_inserts_segment_and_skips_torn_line(self):
+        records = [_record(self.user), _record(self.user)]
+        path = self.journal_dir / "123-abcd-00000001.jsonl"
+        path.write_text("".join(json.dumps(r) + "\n" for r in records) + '{"uid": "to', encoding="utf-8")
+
+        self.assertEqual(replay_journal(self.journal_dir), 2)
+        self.assertFalse(path.exists())
+        self.assertEqual(QuizAttempt.objects.filter(user=self.user).count(), 2)
+
+    def test_replay_is_idempotent(self):
+        records = [_record(self.user)]
+        content = json.dumps(records[0]) + "\n"
+        path = self.journal_dir / "123-abcd-00000001.jsonl"
+        path.write_text(content, encoding="utf-8")
+        self.assertEqual(replay_journal(self.journal_dir), 1)
+
+        # The same segment surviving a crash after the commit but before the unlink
+        path.write_text(content, encoding="utf-8")
+        self.assertEqual(replay_journal(self.journal_dir), 0)
+        self.assertEqual(QuizAttempt.objects.filter(uid=records[0]["uid"]).count(), 1)
+
+    def test_crashed_buffer_is_replayed(self):
+        buf = self._buffer()
+        records = [_record(self.user, score=i) for i in range(3)]
+        for record in records:
+            buf.submit(record)
+        # The worker dies: its file descriptors (and flocks) go away, nothing was flushed
+        buf._segment.close()
+
+        self.assertEqual(QuizAttempt.objects.count(), 0)
+        self.assertEqual(replay_journal(self.journal_dir), 3)
+        self.assertEqual(
+            sorted(QuizAttempt.objects.values_list("score", flat=True)), [r["score"] for r in records]
+        )
+        self.assertEqual(list(self.journal_dir.glob("*.jsonl")), [])
+
+    @unittest.skipIf(fcntl is None, "no flock on this platform")
+    def test_replay_skips_segments_held_by_a_live_buffer(self):
+        buf = self._buffer()
+        buf.submit(_record(self.user))
+
+        self.assertEqual(replay_journal(self.journal_dir), 0)
+        self.assertEqual(len(list(self.journal_dir.glob("*.jsonl"))), 1)
+
+        # A sealed segment stays locked until its records are committed
+        with buf._lock:
+            buf._seal_segment()
+        self.assertEqual(replay_journal(self.journal_dir), 0)
+
+        path, fh, _ = buf._sealed.pop()
+        fh.close()
+        self.assertEqual(replay_journal(self.journal_dir), 1)
+        self.assertFalse(path.exists())
+
+
+# ------------------ LOGIN THROTTLE ------------------
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "throttle-tests"}},
+    LOGIN_THROTTLE={"WINDOW": 100, "EMAIL_LIMIT": 3, "IP_LIMIT": 5, "CACHE": "default"},
+)
+class LoginThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("accounts.throttle.time.time")
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def attempt(self, at, email="a@example.com", ip="10.0.0.1"):
+        self.clock.return_value = at
+        return check_login(email, ip)
+
+    def test_retry_after(self):
+        # Current bucket alone is over the limit: wait for the next bucket
+        self.assertEqual(_retry_after(3, 0, 0.25, 3, 100), 75)
+        # 4 * (1 - 0.5) + 1 == 3: one more second of decay brings it under 3
+        self.assertEqual(_retry_after(1, 4, 0.5, 3, 100), 1)
+        # 6 * (1 - 0.2) + 0 = 4.8: needs the previous weight below 0.5
+        self.assertEqual(_retry_after(0, 6, 0.2, 3, 100), 30)
+
+    def test_email_limit_within_a_bucket(self):
+        for _ in range(3):
+            self.assertEqual(self.attempt(1000), 0)
+        self.assertEqual(self.attempt(1000), 100)
+        self.assertEqual(self.attempt(1050), 50)
+        # Another account from the same IP is not affected
+        self.assertEqual(self.attempt(1050, email="b@example.com"), 0)
+
+    def test_previous_bucket_decays(self):
+        for _ in range(3):
+            self.attempt(1000)
+        # Start of the next bucket: the previous one still counts fully
+        self.assertEqual(self.attempt(1100), 1)
+        # 3 * 0.99 < 3
+        self.assertEqual(self.attempt(1101), 0)
+
+    def test_ip_limit_spans_emails(self):
+        for i in range(5):
+            self.assertEqual(self.attempt(1000, email=f"s{i}@example.com"), 0)
+        self.assertEqual(self.attempt(1000, email="s9@example.com"), 100)
+        self.assertEqual(self.attempt(1000, email="s9@example.com", ip="10.0.0.2"), 0)
+
+    def test_success_resets_email_counter(self):
+        for _ in range(3):
+            self.attempt(1000)
+        login_succeeded("A@example.com ")
+        self.assertEqual(self.attempt(1000), 0)
+
+
+# ------------------ TIMED QUIZ SESSIONS ------------------
+@override_settings(ATTEMPT_BUFFER={"ENABLED": False})
+class QuizSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("accounts.quiz_sessions.get_scheduler")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        self.client.force_login(self.user)
+        subject = Subject.objects.create(name="Science", class_level="9")
+        lesson = Lesson.objects.create(subject=subject, title="Electricity")
+        self.timed = Quiz.objects.create(lesson=lesson, title="Timed", time_limit=600)
+        self.untimed = Quiz.objects.create(lesson=lesson, title="Practice")
+        for quiz in (self.timed, self.untimed):
+            question = Question.objects.create(quiz=quiz, text="Unit of charge?")
+            Choice.objects.create(question=question, text="Coulomb", is_correct=True)
+            Choice.objects.create(question=question, text="Volt")
+
+    def submit(self, quiz):
+        return self.client.post(
+            f"/accounts/api/quiz/{quiz.pk}/submit/", json.dumps({"answers": []}), content_type="application/json"
+        )
+
+    def submit_batch(self, *quizzes):
+        body = {"attempts": [{"client_id": i, "quiz_id": quiz.pk, "answers": []} for i, quiz in enumerate(quizzes)]}
+        response = self.client.post("/accounts/api/quiz/submit-batch/", json.dumps(body), content_type="application/json")
+        return [r.get("error") for r in response.json()["results"]]
+
+    def fetch(self, quiz):
+        return self.client.get(f"/accounts/api/quiz/{quiz.pk}/").json()
+
+    def test_untimed_quiz_needs_no_session(self):
+        self.assertEqual(self.submit(self.untimed).status_code, 200)
+        self.assertEqual(self.submit(self.untimed).status_code, 200)
+        self.assertFalse(QuizSession.objects.exists())
+
+    def test_timed_quiz_without_session_is_refused(self):
+        self.assertEqual(self.submit(self.timed).status_code, 409)
+        self.assertEqual(self.submit_batch(self.timed, self.untimed)[0], "Time limit exceeded or quiz already submitted")
+        self.assertEqual(QuizAttempt.objects.filter(quiz_id=self.timed.pk).count(), 0)
+
+    def test_duplicate_submit_is_refused(self):
+        self.assertEqual(self.fetch(self.timed)["session"]["status"], QuizSession.OPEN)
+        self.assertEqual(self.submit(self.timed).status_code, 200)
+        self.assertEqual(self.submit(self.timed).status_code, 409)
+        # Re-fetching does not open a new session
+        self.assertEqual(self.fetch(self.timed)["session"]["status"], QuizSession.SUBMITTED)
+        self.assertEqual(QuizSession.objects.count(), 1)
+        self.assertEqual(QuizAttempt.objects.filter(quiz_id=self.timed.pk).count(), 1)
+
+    def test_duplicate_in_one_batch(self):
+        self.fetch(self.timed)
+        self.assertEqual(
+            self.submit_batch(self.timed, self.timed),
+            [None, "Time limit exceeded or quiz already submitted"],
+        )
+
+    def test_late_submit_is_refused(self):
+        self.fetch(self.timed)
+        QuizSession.objects.update(expires_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.submit(self.timed).status_code, 409)
+        self.assertEqual(QuizSession.objects.get().status, QuizSession.EXPIRED)
+
+    def test_expire_sessions(self):
+        self.fetch(self.timed)
+        session = QuizSession.objects.get()
+        self.assertEqual(expire_sessions([session.pk]), 1)
+        self.assertEqual(expire_sessions([session.pk]), 0)
+        self.assertEqual(self.submit(self.timed).status_code, 409)
+
+    def test_timer_wheel(self):
+        wheel = TimerWheel(tick=1, slots=8, now=1000)
+        wheel.schedule("soon", 1003)
+        wheel.schedule("later", 1020)  # more than one revolution out
+        wheel.schedule("cancelled", 1003)
+        wheel.cancel("cancelled")
+        self.assertEqual(wheel.advance(1002), [])
+        self.assertEqual(wheel.advance(1003), ["soon"])
+        self.assertEqual(wheel.advance(1019), [])
+        self.assertEqual(wheel.advance(1020), ["later"])
+        self.assertEqual(len(wheel), 0)
+
+
+# ------------------ STUDENT PROGRESS ------------------
+@override_settings(ATTEMPT_BUFFER={"ENABLED": False})
+class StudentProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        self.client.force_login(self.user)
+        self.subject = Subject.objects.create(name="Science", class_level="9")
+        self.lesson = Lesson.objects.create(subject=self.subject, title="Electricity")
+        Lesson.objects.create(subject=self.subject, title="Magnetism")
+        self.quiz = Quiz.objects.create(lesson=self.lesson, title="Practice")
+
+    def progress(self, lesson=True):
+        return {"subject_id": self.subject.pk, "lesson_id": self.lesson.pk if lesson else None}
+
+    def assertRows(self, *keys):
+        self.assertEqual(
+            sorted(StudentProgress.objects.filter(user=self.user).values_list("lesson_id", "completed")),
+            sorted((key, True) for key in keys),
+        )
+        row = SubjectProgress.objects.get(user=self.user, subject=self.subject)
+        self.assertEqual((row.completed_lessons, row.total_lessons), (1, 2))
+
+    def test_repeated_submit_keeps_one_row(self):
+        for _ in range(2):
+            response = self.client.post(
+                f"/accounts/api/quiz/{self.quiz.pk}/submit/",
+                json.dumps({"answers": [], **self.progress()}), content_type="application/json",
+            )
+            self.assertEqual(response.json()["progress_percent"], 50)
+        self.assertRows(self.lesson.pk)
+
+    def test_repeated_keys_in_one_batch(self):
+        attempts = [
+            {"client_id": i, "quiz_id": self.quiz.pk, "answers": [], **self.progress(lesson=i % 2 == 0)}
+            for i in range(4)
+        ]
+        response = self.client.post(
+            "/accounts/api/quiz/submit-batch/", json.dumps({"attempts": attempts}), content_type="application/json"
+        )
+        self.assertEqual([r["progress_percent"] for r in response.json()["results"]], [50] * 4)
+        # The subject-level key (lesson NULL) must not duplicate either
+        self.assertRows(self.lesson.pk, None)
+
+    def test_record_completions_is_idempotent(self):
+        keys = [(self.subject.pk, self.lesson.pk, None), (self.subject.pk, None, None)]
+        record_completions(self.user, keys)
+        StudentProgress.objects.update(completed=False)
+        record_completions(self.user, keys + keys)
+        self.assertEqual(StudentProgress.objects.filter(user=self.user, completed=True).count(), 2)
+
+
+# ------------------ ENROLLMENTS ------------------
+class EnrollmentTests(TestCase):
+    def enrolled(self, profile):
+        return sorted(Enrollment.objects.filter(student=profile).values_list("subject__name", "class_level"))
+
+    def form_data(self, n, student_class, subjects):
+        return {
+            "email": f"student{n}@example.com", "username": f"student{n}",
+            "password": "Ohm-and-Volta-42", "confirm_password": "Ohm-and-Volta-42",
+            "student_name": "Asha", "student_class": student_class, "board": "CBSE BOARD",
+            "language": "english", "subject": subjects,
+        }
+
+    def test_register_and_change_subjects(self):
+        form = StudentRegisterForm(self.form_data(1, "9", ["math", "computer science"]))
+        self.assertTrue(form.is_valid(), form.errors)
+        profile = form.save()
+        self.assertEqual(self.enrolled(profile), [("Computer Science", "9"), ("Math", "9")])
+
+        form = StudentRegisterForm(self.form_data(2, "10", ["math", "physics"]), instance=profile)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(self.enrolled(profile), [("Math", "10"), ("Physics", "10")])
+
+    def test_migration_backfill(self):
+        backfill = importlib.import_module("accounts.migrations.0018_enrollment").backfill
+        for name in ("Math", "Computer Science", "Art"):
+            Subject.objects.create(name=name, board="CBSE BOARD", class_level="9")
+        Subject.objects.create(name="Physics", board="ICSE BOARD", class_level="9")
+        user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        profile = StudentProfile.objects.create(
+            user=user, student_name="Asha", student_class="9", board="CBSE BOARD",
+            # choice keys, a title-cased fallback, a repeat and a subject only another board has
+            subject="math, computer science,art, math, physics, ",
+        )
+
+        backfill(apps, None)
+        self.assertEqual(self.enrolled(profile), [("Art", "9"), ("Computer Science", "9"), ("Math", "9")])
+        self.assertEqual(set(Enrollment.objects.values_list("board", flat=True)), {"CBSE BOARD"})
+
+
+# ------------------ SUBJECT PROGRESS COUNTERS ------------------
+class SubjectProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        self.subject = Subject.objects.create(name="Science", class_level="9")
+        self.other = Subject.objects.create(name="Physics", class_level="9")
+        self.lessons = [Lesson.objects.create(subject=self.subject, title=f"Lesson {i}") for i in range(4)]
+
+    def counters(self, subject=None):
+        row = SubjectProgress.objects.get(user=self.user, subject=subject or self.subject)
+        return row.completed_lessons, row.total_lessons
+
+    def complete(self, lesson):
+        return StudentProgress.objects.create(user=self.user, subject=lesson.subject, lesson=lesson, completed=True)
+
+    def test_completions_are_counted(self):
+        self.assertIsNone(subject_percent(self.user, self.subject.pk))
+        record_completions(self.user, [(self.subject.pk, self.lessons[0].pk, None)])
+        # Bulk writes leave the refresh to the caller (the quiz views)
+        self.assertFalse(SubjectProgress.objects.exists())
+        progress = self.complete(self.lessons[1])
+        self.assertEqual(self.counters(), (2, 4))
+        self.assertEqual(subject_percent(self.user, self.subject.pk), 50)
+
+        progress.delete()
+        self.assertEqual(self.counters(), (1, 4))
+
+    def test_lesson_changes_update_totals(self):
+        self.complete(self.lessons[0])
+        Lesson.objects.create(subject=self.subject, title="Lesson 4")
+        self.assertEqual(self.counters(), (1, 5))
+        self.lessons[3].delete()
+        self.assertEqual(self.counters(), (1, 4))
+
+        self.complete(Lesson.objects.create(subject=self.other, title="Optics"))
+        moved = self.lessons[2]
+        moved.subject = self.other
+        moved.save()
+        self.assertEqual(self.counters(), (1, 3))
+        self.assertEqual(self.counters(self.other), (1, 2))
+
+    def test_rebuild_repairs_drift(self):
+        self.complete(self.lessons[0])
+        SubjectProgress.objects.update(completed_lessons=3, total_lessons=9)
+        out = io.StringIO()
+        call_command("rebuild_subject_progress", "--verify", stdout=out)
+        self.assertIn("1 stale", out.getvalue())
+        self.assertEqual(self.counters(), (3, 9))
+
+        call_command("rebuild_subject_progress", stdout=io.StringIO())
+        self.assertEqual(self.counters(), (1, 4))
+
+
+# ------------------ ROSTER IMPORT ------------------
+ROSTER_CSV = """Email,Username,Password,Student_Name,Student_Class,Board,Subjects
+asha@example.com,asha,Ohm-and-Volta-42,Asha,9,cbse board,math|physics
+ravi@example.com,ravi,Ohm-and-Volta-43,Ravi,9,CBSE BOARD,math
+ASHA@example.com,asha2,Ohm-and-Volta-44,Asha again,9,CBSE BOARD,math
+taken@example.com,existing,Ohm-and-Volta-45,Taken,9,CBSE BOARD,math
+kiran@example.com,kiran,Ohm-and-Volta-46,Kiran,5,CBSE BOARD,math
+mira@example.com,mira,Ohm-and-Volta-47,Mira,10,CBSE BOARD,astrology
+dev@example.com,dev,password,Dev,10,CBSE BOARD,math
+"""
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class RosterImportTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="Existing", email="someone@example.com", password=None)
+
+    def import_roster(self, **kwargs):
+        return import_roster_file(io.BytesIO(ROSTER_CSV.encode("utf-8")), **kwargs)
+
+    def test_import(self):
+        stats = self.import_roster()
+        self.assertEqual((stats["created"], stats["invalid"]), (2, 5))
+        self.assertEqual([e["line"] for e in stats["errors"]], [4, 5, 6, 7, 8])
+        self.assertIn("email already exists", stats["errors"][0]["error"])
+        self.assertIn("username is already taken", stats["errors"][1]["error"])
+        self.assertIn("unknown subject(s): astrology", stats["errors"][3]["error"])
+
+        asha = User.objects.get(username="asha")
+        self.assertTrue(asha.check_password("Ohm-and-Volta-42"))
+        profile = asha.studentprofile
+        self.assertEqual((profile.board, profile.subject), ("CBSE BOARD", "math, physics"))
+        self.assertEqual(
+            sorted(Enrollment.objects.filter(student=profile).values_list("subject__name", flat=True)), ["Math", "Physics"]
+        )
+        # The curriculum is seeded once per (board, class, subject), not per student
+        self.assertEqual(stats["seeded_subjects"], 2)
+        self.assertEqual(Subject.objects.filter(board="CBSE BOARD", class_level="9").count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        stats = self.import_roster(dry_run=True)
+        self.assertEqual((stats["created"], stats["invalid"]), (2, 5))
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(Subject.objects.exists())
+
+    def test_hash_passwords_in_parallel(self):
+        passwords = [f"secret-{i}" for i in range(20)]
+        hashes = hash_passwords(passwords, workers=4)
+        self.assertEqual(len(set(hashes)), 20)
+        self.assertTrue(all(check_password(p, h) for p, h in zip(passwords, hashes)))
+
+    def test_api_is_staff_only(self):
+        user = User.objects.create_user(username="teacher", email="teacher@example.com", password=None)
+        self.client.force_login(user)
+        upload = SimpleUploadedFile("roster.csv", ROSTER_CSV.encode("utf-8"), content_type="text/csv")
+        self.assertEqual(self.client.post("/accounts/api/roster/import/", {"file": upload}).status_code, 403)
+
+        User.objects.filter(pk=user.pk).update(is_staff=True)
+        upload.seek(0)
+        response = self.client.post("/accounts/api/roster/import/", {"file": upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 2)
+
+
+# ------------------ BEARER TOKENS ------------------
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], ATTEMPT_BUFFER={"ENABLED": False},
+)
+class TokenAuthTests(TestCase):
+    CSRF_SECRET = "a" * 32
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="student", email="student@example.com", password="Ohm-and-Volta-42")
+        self.subject = Subject.objects.create(name="Science", class_level="9")
+        self.quiz = Quiz.objects.create(lesson=Lesson.objects.create(subject=self.subject, title="Electricity"), title="Practice")
+
+    def post_json(self, url, body, client=None, **headers):
+        return (client or self.client).post(url, json.dumps(body), content_type="application/json", **headers)
+
+    def obtain(self, password="Ohm-and-Volta-42"):
+        return self.post_json("/accounts/api/token/", {"email": "student@example.com", "password": password})
+
+    def progress(self, token, client=None):
+        return (client or self.client).get(f"/accounts/api/subject/{self.subject.pk}/progress/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_obtain_and_use_tokens(self):
+        self.assertEqual(self.obtain("wrong").status_code, 401)
+        tokens = self.obtain().json()
+        self.assertEqual(self.progress(tokens["access"]).json(), {"subject_id": self.subject.pk, "percent": 0})
+
+        self.assertEqual(self.progress("not-a-token").status_code, 401)
+        self.assertEqual(self.progress(tokens["refresh"]).status_code, 401)  # wrong token type
+        self.assertEqual(self.client.get(f"/accounts/api/subject/{self.subject.pk}/progress/").status_code, 401)
+
+    def test_refresh(self):
+        tokens = self.obtain().json()
+        response = self.post_json("/accounts/api/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(self.progress(response.json()["access"]).status_code, 200)
+        self.assertEqual(self.post_json("/accounts/api/token/refresh/", {"refresh": "garbage"}).status_code, 401)
+
+    def test_deactivated_user_is_refused(self):
+        access = self.obtain().json()["access"]
+        self.assertEqual(self.progress(access).status_code, 200)
+        self.user.is_active = False
+        self.user.save()  # drops the per-process cached user
+        self.assertEqual(self.progress(access).status_code, 401)
+
+    def test_csrf_applies_to_session_requests_only(self):
+        client = Client(enforce_csrf_checks=True)
+        url = f"/accounts/api/quiz/{self.quiz.pk}/submit/"
+        access = self.obtain().json()["access"]
+        # Bearer requests carry no cookie a third-party page could ride on
+        self.assertEqual(self.post_json(url, {"answers": []}, client, HTTP_AUTHORIZATION=f"Bearer {access}").status_code, 200)
+
+        client.force_login(self.user)
+        self.assertEqual(self.post_json(url, {"answers": []}, client).status_code, 403)
+        client.cookies["csrftoken"] = self.CSRF_SECRET
+        self.assertEqual(self.post_json(url, {"answers": []}, client, HTTP_X_CSRFTOKEN=self.CSRF_SECRET).status_code, 200)
@@ -0,0 +1,141 @@
+"""
+Login throttle that runs before any password hashing.
+
+authenticate() costs a full PBKDF2 hash, so a class retrying wrong passwords
+or a scripted flood can saturate every worker. check_login() counts attempts
+per email and per client IP in a cache and refuses the attempt before
+authenticate() is called once either count is over its limit.
+
+The counters live in the cache named by LOGIN_THROTTLE["CACHE"]. With a
+per-process backend such as LocMemCache every worker keeps its own counts, so
+the effective limits are multiplied by the number of workers and
+throttle_metrics() reports only the worker that answers. Point CACHE at a
+shared backend (Redis/Memcached) in production.
+
+Counts use a sliding window approximated from two fixed buckets: the
+previous bucket is weighted by how much of it still overlaps the window.
+That is two cache keys per scope, read together in one get_many().
+
+Throttled and allowed attempts are counted in the cache as well
+(throttle_metrics()) and throttling is logged.
+"""
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "WINDOW": 300,          # seconds
+    "EMAIL_LIMIT": 10,      # attempts per email per window
+    "IP_LIMIT": 200,        # attempts per client IP per window; a classroom shares one IP
+    "PROXY_HEADER": None,   # e.g. "HTTP_X_FORWARDED_FOR" when behind a trusted proxy
+    "CACHE": "default",     # cache alias holding the counters; must be shared across workers
+}
+
+COUNTER_KEY = "login_throttle:{scope}:{ident}:{bucket}"
+METRIC_KEY = "login_throttle:metrics:{name}"
+METRICS = ("allowed", "throttled_email", "throttled_ip", "succeeded")
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "LOGIN_THROTTLE", {})}
+
+
+def _cache():
+    return caches[_config()["CACHE"]]
+
+
+def client_ip(request):
+    header = _config()["PROXY_HEADER"]
+    if header and request.META.get(header):
+        return request.META[header].split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _ident(value):
+    # Hashed so arbitrary emails are valid cache keys
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+def _keys(scope, ident, bucket):
+    return COUNTER_KEY.format(scope=scope, ident=ident, bucket=bucket), COUNTER_KEY.format(
+        scope=scope, ident=ident, bucket=bucket - 1
+    )
+
+
+# ------------------ METRICS ------------------
+def _count(name):
+    key = METRIC_KEY.format(name=name)
+    cache = _cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def throttle_metrics():
+    values = _cache().get_many([METRIC_KEY.format(name=name) for name in METRICS])
+    return {name: values.get(METRIC_KEY.format(name=name), 0) for name in METRICS}
+
+
+# ------------------ THROTTLE ------------------
+def _retry_after(current, previous, elapsed, limit, window):
+    """Seconds until previous * (1 - elapsed) + current drops below limit."""
+    if current >= limit or not previous:
+        return math.ceil((1 - elapsed) * window)
+    needed = 1 - (limit - current) / previous
+    return max(1, math.ceil((needed - elapsed) * window))
+
+
+def _increment(cache, key, window):
+    cache.add(key, 0, window * 2)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, window * 2)
+
+
+def check_login(email, ip):
+    """
+    Count one login attempt for (email, ip). Returns 0 if it may proceed, or
+    the number of seconds to wait if either limit is exceeded (nothing is
+    counted for rejected attempts).
+    """
+    config = _config()
+    cache = _cache()
+    window = config["WINDOW"]
+    now = time.time()
+    bucket, elapsed = int(now // window), (now % window) / window
+
+    scopes = [
+        ("email", _ident((email or "").strip().lower()), config["EMAIL_LIMIT"]),
+        ("ip", _ident(ip or "-"), config["IP_LIMIT"]),
+    ]
+    keys = {scope: _keys(scope, ident, bucket) for scope, ident, _ in scopes}
+    counts = cache.get_many([key for pair in keys.values() for key in pair])
+
+    for scope, ident, limit in scopes:
+        current_key, previous_key = keys[scope]
+        current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+        if previous * (1 - elapsed) + current >= limit:
+            _count(f"throttled_{scope}")
+            logger.warning("Login throttled by %s (%s)", scope, ip)
+            return _retry_after(current, previous, elapsed, limit, window)
+
+    for current_key, _ in keys.values():
+        _increment(cache, current_key, window)
+    _count("allowed")
+    return 0
+
+
+def login_succeeded(email):
+    """Forget an email's recent attempts once it has logged in."""
+    window = _config()["WINDOW"]
+    _cache().delete_many(_keys("email", _ident((email or "").strip().lower()), int(time.time() // window)))
+    _count("succeeded")
@@ -0,0 +1,112 @@
+"""
+Stateless bearer-token auth for the JSON APIs used by tablets and apps.
+
+Devices exchange email/password for a simplejwt access/refresh pair
+(api_token_obtain / api_token_refresh in accounts/views.py) and send
+"Authorization: Bearer <access>" on every call. api_login_required verifies
+the token's signature and expiry in memory and takes the user from a small
+per-process cache, so an authenticated API call touches neither the session
+table nor, for recently seen users, the users table.
+
+Requests without a bearer token fall back to the session cookie. Those views
+are csrf_exempt (a bearer token cannot be forged cross-site), so the CSRF
+check is applied by hand for session-authenticated requests.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+DEFAULTS = {
+    "USER_CACHE_TTL": 60,      # seconds a looked-up user is reused without a query
+    "USER_CACHE_SIZE": 2048,   # users kept per process
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "TOKEN_AUTH", {})}
+
+
+def issue_tokens(user):
+    refresh = RefreshToken.for_user(user)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+
+
+# ------------------ USER CACHE ------------------
+_users = OrderedDict()  # user id -> (user or None, expires at)
+_users_lock = threading.Lock()
+
+
+def cached_user(user_id):
+    """Return the active user with this id (None if missing/inactive), reusing recent lookups."""
+    now = time.monotonic()
+    with _users_lock:
+        hit = _users.get(user_id)
+        if hit is not None and hit[1] > now:
+            _users.move_to_end(user_id)
+            return hit[0]
+
+    config = _config()
+    user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}, is_active=True).first()
+    with _users_lock:
+        _users[user_id] = (user, now + config["USER_CACHE_TTL"])
+        _users.move_to_end(user_id)
+        while len(_users) > config["USER_CACHE_SIZE"]:
+            _users.popitem(last=False)
+    return user
+
+
+def forget_user(user_id):
+    with _users_lock:
+        _users.pop(user_id, None)
+
+
+def user_from_token(raw):
+    """Validate an access token and return its user, or None if it is invalid, expired or orphaned."""
+    try:
+        token = AccessToken(raw)
+    except TokenError:
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return cached_user(user_id) if user_id is not None else None
+
+
+# ------------------ DECORATOR ------------------
+def _csrf_failure(request):
+    return CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {})
+
+
+def api_login_required(view):
+    """
+    login_required for JSON APIs: accepts a bearer token or a session cookie
+    and answers 401 JSON instead of redirecting to the login page.
+    Token-authenticated requests get request.token_auth = True.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        if header.startswith("Bearer "):
+            user = user_from_token(header[7:].strip())
+            if user is None:
+                return JsonResponse({"error": "Invalid or expired token"}, status=401)
+            request.user = user
+            request.token_auth = True
+        else:
+            if not request.user.is_authenticated:
+                return JsonResponse({"error": "Authentication required"}, status=401)
+            failure = _csrf_failure(request)
+            if failure is not None:
+                return failure
+        return view(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
@@ -11,7 +11,13 @@ urlpatterns = [
     path("edit-profile/", views.edit_profile, name="edit_profile"),
     path('change-language/', views.change_language, name='change_language'),
     path("forgot-password/", views.forgot_password, name="forgot_password"),
+    path('api/token/', views.api_token_obtain, name='api_token_obtain'),
+    path('api/token/refresh/', views.api_token_refresh, name='api_token_refresh'),
     path('api/quiz/<int:quiz_id>/', views.api_get_quiz, name='api_get_quiz'),
     path('api/quiz/<int:quiz_id>/submit/', views.api_submit_quiz, name='api_submit_quiz'),
+    path('api/quiz/submit-batch/', views.api_submit_quiz_batch, name='api_submit_quiz_batch'),
     path('api/subject/<int:subject_id>/progress/', views.api_subject_progress, name='api_subject_progress'),
+    path('api/progress/', views.api_all_subject_progress, name='api_all_subject_progress'),
+    path('api/roster/import/', views.api_import_roster, name='api_import_roster'),
+    path('api/login-throttle/metrics/', views.api_login_throttle_metrics, name='api_login_throttle_metrics'),
 ]
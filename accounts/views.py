@@ -30,13 +30,15 @@ from .forms import StudentRegisterForm
 
 
 import json
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
 from django.db.models import Count
 from django.utils import timezone
 
+from .tokens import api_login_required
+
 # ------------------ REGISTER ------------------
 
 
@@ -47,17 +49,31 @@ def login_view(request):
     if request.method == "POST":
         form = LoginForm(request.POST)
         if form.is_valid():
+            from .throttle import check_login, client_ip, login_succeeded
+
             email = form.cleaned_data["email"]
             password = form.cleaned_data["password"]
+            # Checked before authenticate(): a rejected attempt costs no password hash
+            retry_after = check_login(email, client_ip(request))
+            if retry_after:
+                messages.error(request, f"Too many login attempts. Try again in {retry_after} seconds.")
+                response = render(request, "login.html", {"form": form}, status=429)
+                response["Retry-After"] = str(retry_after)
+                return response
             user = authenticate(request, username=email, password=password)
             if user:
-                try:
-                    student = StudentProfile.objects.get(user=user)
-                except StudentProfile.DoesNotExist:
+                from .context import build_student_context, remember_student_context
+
+                login_succeeded(email)
+
+                student = build_student_context(user)
+                if student is None:
                     messages.error(request, "Student profile not found.")
                     return redirect("accounts:login")
 
                 login(request, user)
+                # Seed the session so the dashboard does not load the profile again
+                remember_student_context(request, user, student)
                 return redirect("accounts:student_dashboard")
             else:
                 messages.error(request, "Invalid credentials.")
@@ -71,51 +87,86 @@ def logout_view(request):
     return redirect("accounts:login")
 
 
+# ------------------ API TOKENS ------------------
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_token_obtain(request):
+    """
+    Accepts JSON: {email, password}. Returns {access, refresh} JWTs for tablets/apps.
+    Send "Authorization: Bearer <access>" to the JSON APIs; renew with api_token_refresh.
+    """
+    from .serializers import LoginSerializer
+    from .throttle import check_login, client_ip, login_succeeded
+    from .tokens import issue_tokens
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return HttpResponseBadRequest("Invalid JSON")
+    serializer = LoginSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse({"errors": serializer.errors}, status=400)
+
+    email = serializer.validated_data["email"]
+    retry_after = check_login(email, client_ip(request))
+    if retry_after:
+        response = JsonResponse({"error": "Too many login attempts", "retry_after": retry_after}, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
+    user = authenticate(request, username=email, password=serializer.validated_data["password"])
+    if user is None:
+        return JsonResponse({"error": "Invalid credentials"}, status=401)
+    login_succeeded(email)
+    return JsonResponse(issue_tokens(user))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_token_refresh(request):
+    """
+    Accepts JSON: {refresh}. Returns {access} (and a new refresh token when
+    SIMPLE_JWT rotation is enabled); 401 if the refresh token is invalid or expired.
+    """
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return HttpResponseBadRequest("Invalid JSON")
+    serializer = TokenRefreshSerializer(data=payload)
+    try:
+        if not serializer.is_valid():
+            return JsonResponse({"errors": serializer.errors}, status=400)
+    except TokenError:
+        return JsonResponse({"error": "Invalid or expired refresh token"}, status=401)
+    return JsonResponse(serializer.validated_data)
+
+
+# ------------------ LOGIN THROTTLE ------------------
+@login_required
+@require_http_methods(["GET"])
+def api_login_throttle_metrics(request):
+    """Staff only. Returns login throttle counters: {allowed, throttled_email, throttled_ip, succeeded}."""
+    from .throttle import throttle_metrics
+
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    return JsonResponse(throttle_metrics())
+
+
 # ------------------ DASHBOARDS ------------------
 @login_required
 def student_dashboard(request):
-    try:
-        student = StudentProfile.objects.get(user=request.user)
-    except StudentProfile.DoesNotExist:
+    from .context import get_student_context, activate_student_language
+
+    student = get_student_context(request)
+    if student is None:
         messages.error(request, "Student profile not found.")
         return redirect("accounts:login")
+    activate_student_language(request, student)
 
-    # Language handling
-    lang = (student.language or "english").lower()
-    language_map = {
-        "english": "en",
-        "hindi": "hi",
-        "marathi": "mr",
-        "bengali": "bn",
-        "tamil": "ta",
-        "gujarati": "gu",
-        "kannada": "kn",
-        "punjabi": "pa",
-        "telugu": "te",
-        "urdu": "ur",
-        "odia": "or",
-    }
-    lang_code = language_map.get(lang, "en")
-    activate(lang_code)
-    request.session["django_language"] = lang_code
-
-    # Show only subjects selected by student
-    selected_subjects = [s.strip() for s in (student.subject or "").split(",") if s.strip()]
-    subject_map = {
-        "math": "Math",
-        "hindi": "Hindi",
-        "english": "English",
-        "computer science": "Computer Science",
-        "physics": "Physics",
-        "chemistry": "Chemistry",
-        "biology": "Biology",
-        "geography": "Geography",
-        "history": "History",
-        "ethics": "Ethics",
-    }
-    subject_cards = [subject_map.get(subj, subj.title()) for subj in selected_subjects]
-
-    return render(request, "student_dashboard.html", {"student": student, "subject_cards": subject_cards})
+    return render(request, "student_dashboard.html", {"student": student, "subject_cards": student.subject_cards})
 
 
 
@@ -144,12 +195,35 @@ def change_language(request):
     return redirect(request.META.get("HTTP_REFERER", "/"))
 
 
+@login_required
+@require_http_methods(["POST"])
+def api_import_roster(request):
+    """
+    Staff only. Multipart upload: file=<roster CSV>, optional dry_run=1.
+    Returns {created, invalid, errors: [{line, error}], seeded_subjects, dry_run}.
+    Passwords are hashed on a thread pool: never fork a process pool from a web worker.
+    """
+    from .roster import import_roster_file
+
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    upload = request.FILES.get("file")
+    if upload is None:
+        return HttpResponseBadRequest("file is required")
+    upload.open("rb")
+    stats = import_roster_file(upload.file, dry_run=request.POST.get("dry_run") in ("1", "true", "on"))
+    return JsonResponse(stats, status=201 if stats["created"] and not stats["dry_run"] else 200)
+
+
 def edit_profile(request):
     student = request.user.studentprofile
     if request.method == "POST":
         form = StudentRegisterForm(request.POST, request.FILES, instance=student)
         if form.is_valid():
+            from .context import clear_student_context
+
             form.save()
+            clear_student_context(request)
             return redirect("accounts:student_dashboard")
     else:
         form = StudentRegisterForm(instance=student)
@@ -158,55 +232,46 @@ def edit_profile(request):
 
 # accounts/views.py (append)
 
-@login_required
+@api_login_required
 @require_http_methods(["GET"])
 def api_get_quiz(request, quiz_id):
     """
     Return quiz data (questions + choices) for quiz_id.
     Only authenticated students can access.
+    The serialized payload comes from content.cache, so repeat fetches
+    of an unchanged quiz do not touch the database.
+    Timed quizzes also open a server-side session: {session: {id, started_at, expires_at, status}, ...}
+    Once that session is submitted or expired it is returned with its final
+    status and no new one is opened (timed quizzes are single-attempt).
     """
-    from content.models import Quiz, Question, Choice
-    user = request.user
+    from content.cache import get_quiz_entry
+    from .quiz_sessions import start_session
 
-    try:
-        quiz = Quiz.objects.get(pk=quiz_id)
-    except Quiz.DoesNotExist:
+    entry = get_quiz_entry(quiz_id)
+    if entry is None:
         return JsonResponse({"error": "Quiz not found"}, status=404)
-
-    # Build JSON payload
-    questions = []
-    for q in quiz.questions.all():
-        choices = []
-        for c in q.choices.all():
-            choices.append({"id": c.id, "text": c.text})
-        questions.append({
-            "id": q.id,
-            "text": q.text,
-            "marks": q.marks,
-            "qtype": q.qtype,
-            "choices": choices
-        })
-
-    data = {
-        "quiz_id": quiz.id,
-        "title": quiz.title,
-        "time_limit": quiz.time_limit or 0,
-        "total_marks": quiz.total_marks or sum([q.marks for q in quiz.questions.all()]),
-        "questions": questions
-    }
-    return JsonResponse(data)
+    payload, time_limit = entry
+    if time_limit:
+        session = start_session(request.user, quiz_id, time_limit)
+        # Splice the session in front of the cached object instead of re-serializing it
+        payload = b'{"session":' + json.dumps(session.as_dict()).encode("utf-8") + b"," + payload[1:]
+    return HttpResponse(payload, content_type="application/json")
 
 
-@login_required
+@api_login_required
 @require_http_methods(["POST"])
 def api_submit_quiz(request, quiz_id):
     """
     Accepts JSON: { answers: [{question_id: id, choice_id: id}, ...], subject_id, lesson_id, topic_id }
     Grades the quiz, stores StudentProgress (marks lesson completed on pass or always mark).
+    For timed quizzes, submissions without an open session (quiz never fetched),
+    after the session deadline or repeated are rejected with 409.
     Returns: {score, total, details: [{question,text,selected,correct,correct_answer}] , progress_percent}
     """
-    from content.models import Quiz, Question, Choice, Lesson, Subject, Topic
-    from .models import StudentProgress
+    from content.grading import get_answer_key, grade
+    from .attempts import make_record, record_attempts
+    from .progress import resolve_progress_keys, record_completions, refresh_subject_progress
+    from .quiz_sessions import close_session
 
     try:
         payload = json.loads(request.body.decode("utf-8"))
@@ -218,111 +283,30 @@ def api_submit_quiz(request, quiz_id):
     lesson_id = payload.get("lesson_id")
     topic_id = payload.get("topic_id")
 
-    try:
-        quiz = Quiz.objects.get(pk=quiz_id)
-    except Quiz.DoesNotExist:
+    answer_key = get_answer_key(quiz_id)
+    if answer_key is None:
         return JsonResponse({"error": "Quiz not found"}, status=404)
 
-    total_marks = 0
-    score = 0
-    details = []
-
-    # Build map of correct choice id per question
-    correct_map = {}
-    for q in quiz.questions.all():
-        total_marks += (q.marks or 1)
-        # find correct choice(s) (support multiple correct as safety)
-        correct_choices = list(q.choices.filter(is_correct=True).values_list('id', flat=True))
-        correct_map[q.id] = set(correct_choices)
-
-    # evaluate answers list
-    for ans in answers:
-        qid = int(ans.get("question_id"))
-        chosen = ans.get("choice_id")
-        qobj = None
-        try:
-            qobj = quiz.questions.get(pk=qid)
-        except Question.DoesNotExist:
-            continue
-        q_marks = qobj.marks or 1
-        total_for_q = q_marks
-        chosen_id = None
-        if chosen is not None:
-            try:
-                chosen_id = int(chosen)
-            except:
-                chosen_id = None
-
-        is_correct = False
-        if chosen_id and chosen_id in correct_map.get(qid, set()):
-            is_correct = True
-            score += q_marks
-
-        # Find correct answer text for response:
-        correct_choice_obj = qobj.choices.filter(is_correct=True).first()
-        correct_text = correct_choice_obj.text if correct_choice_obj else None
-
-        chosen_text = None
-        if chosen_id:
-            cobj = qobj.choices.filter(pk=chosen_id).first()
-            chosen_text = cobj.text if cobj else None
-
-        details.append({
-            "question_id": qid,
-            "question": qobj.text,
-            "selected_choice_id": chosen_id,
-            "selected_text": chosen_text,
-            "correct": is_correct,
-            "correct_answer": correct_text,
-            "marks": q_marks
-        })
-
-    # Persist progress: mark lesson+topic completed for student (create or update)
-    if subject_id:
-        try:
-            subject = Subject.objects.get(pk=subject_id)
-        except Subject.DoesNotExist:
-            subject = None
-    else:
-        subject = None
-    lesson = None
-    topic = None
-    if lesson_id:
-        try:
-            lesson = Lesson.objects.get(pk=lesson_id)
-        except:
-            lesson = None
-    if topic_id:
-        try:
-            topic = Topic.objects.get(pk=topic_id)
-        except:
-            topic = None
-
-    # create or mark StudentProgress
-    if subject:
-        sp, created = StudentProgress.objects.get_or_create(
-            user=request.user,
-            subject=subject,
-            lesson=lesson,
-            topic=topic,
-            defaults={"completed": True, "completed_at": timezone.now()}
-        )
-        if not sp.completed:
-            sp.completed = True
-            sp.completed_at = timezone.now()
-            sp.save()
-
-    # Compute subject progress percent: (#completed lessons for this user & subject) / (total lessons in subject)
+    # Timed quizzes: reject submissions without an open, on-time session;
+    # api_submit_quiz_batch applies the same rule through close_sessions().
+    if not close_session(request.user, quiz_id, answer_key["time_limit"]):
+        return JsonResponse({"error": "Time limit exceeded or quiz already submitted"}, status=409)
+
+    # Grade every answer in memory against the (cached) answer key
+    score, total_marks, details = grade(answer_key, answers)
+
+    # Persist progress: mark lesson+topic completed for student (one upsert)
+    key = resolve_progress_keys([(subject_id, lesson_id, topic_id)])[0]
+    record_completions(request.user, [key])
+
+    # Recount this subject's SubjectProgress row and take the percent from it
     progress_percent = 0
-    if subject:
-        # total unique lessons in subject
-        total_lessons = subject.lessons.count()
-        if total_lessons > 0:
-            # count distinct completed lesson ids for this user & subject
-            completed_lessons = StudentProgress.objects.filter(user=request.user, subject=subject, completed=True).exclude(lesson__isnull=True).values('lesson').distinct().count()
-            progress_percent = int((completed_lessons / total_lessons) * 100)
-
-    # Optional: store last quiz result (you can extend model to store quiz results)
+    if key:
+        progress_percent = refresh_subject_progress(request.user.pk, [key[0]]).get(key[0], 0)
+
+    # Store the graded attempt (buffered, written in batches)
+    record_attempts([make_record(request.user, quiz_id, score, total_marks, details)])
+
     result = {
         "score": score,
         "total": total_marks,
@@ -332,20 +316,121 @@ def api_submit_quiz(request, quiz_id):
     return JsonResponse(result)
 
 
-@login_required
+MAX_BATCH_ATTEMPTS = 500
+
+
+@api_login_required
+@require_http_methods(["POST"])
+def api_submit_quiz_batch(request):
+    """
+    Accepts JSON: { attempts: [{client_id, quiz_id, answers, subject_id, lesson_id, topic_id}, ...] }
+    Grades every attempt against answer keys loaded once for all quizzes, writes
+    all StudentProgress rows in one bulk upsert and returns per-attempt results
+    in request order: {results: [{client_id, quiz_id, score, total, details, progress_percent} | {client_id, quiz_id, error}]}
+    Timed quizzes follow the api_submit_quiz rule: an attempt is accepted only
+    while the student's session for that quiz is open and on time, and only
+    the first attempt for it in the batch closes the session.
+    """
+    from content.grading import get_answer_keys, grade
+    from .attempts import make_record, record_attempts
+    from .progress import resolve_progress_keys, record_completions, refresh_subject_progress
+    from .quiz_sessions import close_sessions
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    attempts = payload.get("attempts") if isinstance(payload, dict) else None
+    if not isinstance(attempts, list):
+        return HttpResponseBadRequest("Expected an 'attempts' list")
+    if len(attempts) > MAX_BATCH_ATTEMPTS:
+        return HttpResponseBadRequest(f"At most {MAX_BATCH_ATTEMPTS} attempts per request")
+
+    quiz_ids = set()
+    for attempt in attempts:
+        try:
+            quiz_ids.add(int(attempt.get("quiz_id")))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    answer_keys = get_answer_keys(quiz_ids)
+    session_allowed = close_sessions(request.user, {quiz_id: key["time_limit"] for quiz_id, key in answer_keys.items()})
+
+    graded = []
+    for attempt in attempts:
+        attempt = attempt if isinstance(attempt, dict) else {}
+        try:
+            quiz_id = int(attempt.get("quiz_id"))
+        except (TypeError, ValueError):
+            quiz_id = None
+        answer_key, error = answer_keys.get(quiz_id), None
+        if answer_key is None:
+            error = "Quiz not found"
+        elif not session_allowed[quiz_id]:
+            answer_key, error = None, "Time limit exceeded or quiz already submitted"
+        elif answer_key["time_limit"]:
+            # One attempt per timed session; later ones in this batch are repeats
+            session_allowed[quiz_id] = False
+        graded.append((attempt, answer_key, error))
+
+    keys = resolve_progress_keys(
+        (a.get("subject_id"), a.get("lesson_id"), a.get("topic_id")) if key else (None, None, None)
+        for a, key, _ in graded
+    )
+    record_completions(request.user, keys)
+    percents = refresh_subject_progress(request.user.pk, {k[0] for k in keys if k})
+
+    results = []
+    records = []
+    for (attempt, answer_key, error), key in zip(graded, keys):
+        result = {"client_id": attempt.get("client_id"), "quiz_id": attempt.get("quiz_id")}
+        if answer_key is None:
+            result["error"] = error
+        else:
+            score, total_marks, details = grade(answer_key, attempt.get("answers") or [])
+            records.append(make_record(request.user, attempt["quiz_id"], score, total_marks, details))
+            result.update({
+                "score": score,
+                "total": total_marks,
+                "details": details,
+                "progress_percent": percents.get(key[0], 0) if key else 0,
+            })
+        results.append(result)
+    record_attempts(records)
+    return JsonResponse({"results": results})
+
+
+@api_login_required
 @require_http_methods(["GET"])
 def api_subject_progress(request, subject_id):
     """
     Return student's progress percent for a subject.
+    Read from the pre-counted SubjectProgress row (one indexed lookup).
     """
-    from .models import StudentProgress
+    from .progress import subject_percent
     from content.models import Subject
-    try:
-        subject = Subject.objects.get(pk=subject_id)
-    except Subject.DoesNotExist:
-        return JsonResponse({"error": "Subject not found"}, status=404)
-
-    total_lessons = subject.lessons.count()
-    completed_lessons = StudentProgress.objects.filter(user=request.user, subject=subject, completed=True).exclude(lesson__isnull=True).values('lesson').distinct().count()
-    percent = int((completed_lessons / total_lessons) * 100) if total_lessons > 0 else 0
-    return JsonResponse({"subject_id": subject.id, "percent": percent})
+
+    percent = subject_percent(request.user, subject_id)
+    if percent is None:
+        if not Subject.objects.filter(pk=subject_id).exists():
+            return JsonResponse({"error": "Subject not found"}, status=404)
+        percent = 0
+    return JsonResponse({"subject_id": subject_id, "percent": percent})
+
+
+@api_login_required
+@require_http_methods(["GET"])
+def api_all_subject_progress(request):
+    """
+    Return progress for every subject the student is enrolled in:
+    {subjects: [{subject_id, name, completed_lessons, total_lessons, percent}, ...]}
+    Costs one grouped aggregate however many subjects there are; the profile
+    comes from the session-cached student context.
+    """
+    from .context import get_student_context
+    from .progress import enrolled_subject_progress
+
+    student = get_student_context(request)
+    if student is None:
+        return JsonResponse({"error": "Student profile not found"}, status=404)
+    return JsonResponse({"subjects": enrolled_subject_progress(request.user, student.id)})
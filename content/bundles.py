@@ -0,0 +1,169 @@
+"""
+Offline content bundles per (board, class_level, language).
+
+A bundle is a deterministic tar archive holding content.json (the same tree
+the dashboard API serves) and every Lesson.content_file it references under
+media/. It is named by the SHA-256 of its bytes, so an unchanged syllabus
+produces the same file and devices never download it twice. Each archive is
+precompressed next to itself as .tar.gz and, when the brotli package is
+installed, .tar.br.
+
+Content is not translated yet, so the bundles of one (board, class_level)
+differ only in the top-level "language" field of content.json (which the
+device uses to pick its UI language); their media are identical.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .hierarchy import descendants_in_class
+from .models import Lesson, ContentBundle, CurriculumClosure as C
+from .tree import build_content_tree
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CHUNK_SIZE = 1024 * 1024
+
+# Representations in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def bundle_root():
+    return Path(getattr(settings, "CONTENT_BUNDLE_ROOT", Path(settings.BASE_DIR) / "var" / "bundles"))
+
+
+def bundle_path(sha256, encoding=None):
+    suffix = dict(ENCODINGS).get(encoding, "")
+    return bundle_root() / f"{sha256}.tar{suffix}"
+
+
+def _add_bytes(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = 0
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _write_tar(fh, board, class_level, language):
+    # Where the device resumes delta sync (sync/journal.py) after installing this
+    # bundle. Read before the tree: a change committed in between is then both in
+    # the tree and above the cursor (replayed harmlessly), never in neither.
+    from sync.journal import latest_cursor
+    cursor = latest_cursor(board, class_level)
+    tree = build_content_tree(board, class_level)
+    tree["language"] = language
+    tree["sync_cursor"] = cursor
+    media = sorted(
+        Lesson.objects.filter(pk__in=descendants_in_class(board, class_level, C.LESSON))
+        .exclude(content_file="")
+        .exclude(content_file__isnull=True)
+        .values_list("content_file", flat=True)
+        .distinct()
+    )
+    tree["media"] = [f"media/{name}" for name in media]
+
+    # Fixed mtimes/modes and sorted members keep the archive byte-identical
+    # for identical content, which is what makes the content hash stable.
+    with tarfile.open(fileobj=fh, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        _add_bytes(tar, "content.json", json.dumps(tree, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        for name in media:
+            if not default_storage.exists(name):
+                continue
+            info = tarfile.TarInfo(f"media/{name}")
+            info.size = default_storage.size(name)
+            info.mtime = 0
+            info.mode = 0o644
+            with default_storage.open(name, "rb") as src:
+                tar.addfile(info, src)
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _compress(src, encoding):
+    dst = bundle_path(src.name.split(".")[0], encoding)
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(src, "rb") as fin, open(tmp, "wb") as fout:
+        if encoding == "gzip":
+            with gzip.GzipFile(fileobj=fout, mode="wb", compresslevel=9, mtime=0) as gz:
+                shutil.copyfileobj(fin, gz, CHUNK_SIZE)
+        else:
+            compressor = brotli.Compressor(quality=11)
+            for chunk in iter(lambda: fin.read(CHUNK_SIZE), b""):
+                fout.write(compressor.process(chunk))
+            fout.write(compressor.finish())
+    os.replace(tmp, dst)
+    return dst.stat().st_size
+
+
+def build_bundle(board, class_level, language):
+    """
+    Build (or reuse) the bundle for (board, class_level, language) and record it.
+    Returns (ContentBundle, created) where created is False when the content hash was already on disk.
+    """
+    root = bundle_root()
+    root.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=root, suffix=".tar.tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            _write_tar(fh, board, class_level, language)
+        sha = _sha256(tmp_name)
+        final = bundle_path(sha)
+        created = not final.exists()
+        if created:
+            os.replace(tmp_name, final)
+        else:
+            os.unlink(tmp_name)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+    sizes = {}
+    for encoding, _ in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        path = bundle_path(sha, encoding)
+        sizes[encoding] = path.stat().st_size if path.exists() else _compress(final, encoding)
+
+    bundle, _ = ContentBundle.objects.update_or_create(
+        board=board,
+        class_level=class_level,
+        language=language,
+        defaults={
+            "sha256": sha,
+            "size": final.stat().st_size,
+            "gzip_size": sizes.get("gzip"),
+            "brotli_size": sizes.get("br"),
+        },
+    )
+    return bundle, created
+
+
+def prune_bundles():
+    """Delete bundle files no ContentBundle row points at any more. Returns the number removed."""
+    live = set(ContentBundle.objects.values_list("sha256", flat=True))
+    removed = 0
+    for path in bundle_root().glob("*.tar*"):
+        if path.suffix != ".tmp" and path.name.split(".")[0] not in live:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
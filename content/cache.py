@@ -0,0 +1,122 @@
+"""
+Cached, pre-serialized quiz payloads.
+
+A quiz payload is built once (one prefetch pass over questions + choices),
+serialized to JSON bytes and stored in the default cache under a key that
+includes the quiz's content version. Any save/delete of a Quiz, Question or
+Choice bumps that version (see content/signals.py), so stale payloads are
+simply never looked up again and age out of the cache on their own.
+
+A cache hit costs zero ORM queries.
+
+The same versioning scheme is used curriculum-wide: get_content_version()
+changes on any content write and keys the cached content tree (content/tree.py).
+"""
+import json
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+CONTENT_VERSION_KEY = "content:version"
+QUIZ_VERSION_KEY = "quiz:{quiz_id}:version"
+QUIZ_PAYLOAD_KEY = "quiz:{quiz_id}:payload:{version}"
+QUIZ_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_or_add_version(key):
+    """
+    Return the version token stored under key, creating one if it is missing.
+    Other apps key their own caches off tokens read through this.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so two workers racing on a cold key agree on one version
+        if not cache.add(key, version, None):
+            version = cache.get(key) or version
+    return version
+
+
+def get_content_version():
+    """
+    Return the version token of the whole curriculum; it changes on any
+    Subject/Lesson/Topic/Quiz/Question/Choice save or delete.
+    """
+    return get_or_add_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version():
+    cache.set(CONTENT_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_quiz_version(quiz_id):
+    """
+    Return the current content version token for quiz_id, creating one if needed.
+    """
+    return get_or_add_version(QUIZ_VERSION_KEY.format(quiz_id=quiz_id))
+
+
+def bump_quiz_version(quiz_id):
+    """
+    Invalidate every cached entry for quiz_id by moving it to a new version.
+    """
+    cache.set(QUIZ_VERSION_KEY.format(quiz_id=quiz_id), uuid.uuid4().hex, None)
+
+
+def build_quiz_entry(quiz_id):
+    """
+    Serialize quiz_id to JSON bytes with a fixed number of queries.
+    Returns (payload, time_limit), or None when the quiz does not exist.
+    """
+    from .models import Quiz, Question, Choice
+
+    quiz = (
+        Quiz.objects.filter(pk=quiz_id)
+        .prefetch_related(
+            Prefetch(
+                "questions",
+                queryset=Question.objects.order_by("pk").prefetch_related(
+                    Prefetch("choices", queryset=Choice.objects.order_by("pk").only("id", "text", "question_id"))
+                ),
+            )
+        )
+        .first()
+    )
+    if quiz is None:
+        return None
+
+    questions = []
+    marks_sum = 0
+    for q in quiz.questions.all():
+        marks_sum += q.marks
+        questions.append({
+            "id": q.id,
+            "text": q.text,
+            "marks": q.marks,
+            "qtype": q.qtype,
+            "choices": [{"id": c.id, "text": c.text} for c in q.choices.all()],
+        })
+
+    data = {
+        "quiz_id": quiz.id,
+        "title": quiz.title,
+        "time_limit": quiz.time_limit or 0,
+        "total_marks": quiz.total_marks or marks_sum,
+        "questions": questions,
+    }
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return payload, data["time_limit"]
+
+
+def get_quiz_entry(quiz_id):
+    """
+    Return (payload, time_limit) for quiz_id, building and caching it on a miss.
+    """
+    key = QUIZ_PAYLOAD_KEY.format(quiz_id=quiz_id, version=get_quiz_version(quiz_id))
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_quiz_entry(quiz_id)
+        if entry is not None:
+            cache.set(key, entry, QUIZ_CACHE_TIMEOUT)
+    return entry
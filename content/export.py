@@ -0,0 +1,63 @@
+"""
+Streaming JSONL export of a board's curriculum.
+
+One JSON object per line, parents before children:
+    {"model": "export", "board": ..., "class_level": ..., "exported_at": ...}
+    {"model": "subject", "id": ..., ...}
+    ... lesson, topic, quiz, question, choice
+Rows have the same fields as the delta-sync payload (sync.journal.SYNC_FIELDS)
+plus Choice.is_correct, which devices never receive but a staff export needs
+to be re-importable.
+Every table is read with .values().iterator(chunk_size=...), and gzip_stream()
+compresses on the fly, so memory stays flat and bytes go out immediately.
+"""
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+ORDER = ("subject", "lesson", "topic", "quiz", "question", "choice")
+EXTRA_FIELDS = {"choice": ("is_correct",)}
+
+
+def export_records(board, class_level=None, chunk_size=CHUNK_SIZE):
+    """Yield one dict per exported object."""
+    from django.apps import apps
+    from sync.journal import SUBJECT_PATH, SYNC_FIELDS
+
+    yield {"model": "export", "board": board, "class_level": class_level, "exported_at": timezone.now()}
+    for name in ORDER:
+        path = SUBJECT_PATH[name]
+        qs = apps.get_model("content", name).objects.filter(**{f"{path}board": board})
+        if class_level is not None:
+            qs = qs.filter(**{f"{path}class_level": class_level})
+        for row in qs.order_by("pk").values(*SYNC_FIELDS[name], *EXTRA_FIELDS.get(name, ())).iterator(chunk_size=chunk_size):
+            yield {"model": name, **row}
+
+
+def jsonl_chunks(records):
+    """Encode records as JSONL, yielding roughly FLUSH_BYTES at a time."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    buf, size = [], 0
+    for record in records:
+        line = (encoder.encode(record) + "\n").encode("utf-8")
+        buf.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip an iterable of bytes incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,110 @@
+"""
+Constant-query quiz grading.
+
+The answer key for a quiz (question text/marks, choice texts, correct choice
+ids) is loaded for any number of quizzes with a fixed number of queries and
+cached under the quiz's content version (see content/cache.py). Grading a
+submission is then a pure in-memory pass over the answers.
+"""
+from django.core.cache import cache
+
+from .cache import QUIZ_CACHE_TIMEOUT, get_quiz_version
+
+ANSWER_KEY_KEY = "quiz:{quiz_id}:answer_key:v2:{version}"
+
+
+def build_answer_keys(quiz_ids):
+    """
+    Load answer keys for quiz_ids in three queries, whatever their size.
+    Returns {quiz_id: answer_key}; missing quizzes are left out. Each key also
+    carries the quiz's time_limit (0 when untimed) for the session check.
+    """
+    from .models import Quiz, Question, Choice
+
+    keys = {
+        quiz_id: {"questions": {}, "total": 0, "time_limit": time_limit or 0}
+        for quiz_id, time_limit in Quiz.objects.filter(pk__in=quiz_ids).values_list("id", "time_limit")
+    }
+    if not keys:
+        return keys
+
+    questions = {}
+    rows = Question.objects.filter(quiz_id__in=keys).order_by("pk").values_list("id", "quiz_id", "text", "marks")
+    for qid, quiz_id, text, marks in rows:
+        entry = {"text": text, "marks": marks or 1, "correct": set(), "correct_text": None, "choices": {}}
+        questions[qid] = entry
+        keys[quiz_id]["questions"][qid] = entry
+        keys[quiz_id]["total"] += entry["marks"]
+
+    rows = Choice.objects.filter(question_id__in=questions).order_by("pk").values_list("id", "question_id", "text", "is_correct")
+    for cid, qid, text, is_correct in rows:
+        entry = questions[qid]
+        entry["choices"][cid] = text
+        if is_correct:
+            entry["correct"].add(cid)
+            if entry["correct_text"] is None:
+                entry["correct_text"] = text
+    return keys
+
+
+def get_answer_keys(quiz_ids):
+    """
+    Return {quiz_id: answer_key} for quiz_ids, serving from the cache where possible.
+    """
+    quiz_ids = set(quiz_ids)
+    cache_keys = {
+        quiz_id: ANSWER_KEY_KEY.format(quiz_id=quiz_id, version=get_quiz_version(quiz_id))
+        for quiz_id in quiz_ids
+    }
+    cached = cache.get_many(cache_keys.values())
+    found = {quiz_id: cached[key] for quiz_id, key in cache_keys.items() if key in cached}
+
+    missing = quiz_ids - found.keys()
+    if missing:
+        built = build_answer_keys(missing)
+        cache.set_many({cache_keys[quiz_id]: key for quiz_id, key in built.items()}, QUIZ_CACHE_TIMEOUT)
+        found.update(built)
+    return found
+
+
+def get_answer_key(quiz_id):
+    """
+    Return the answer key for a single quiz, or None when it does not exist.
+    """
+    return get_answer_keys([quiz_id]).get(quiz_id)
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def grade(answer_key, answers):
+    """
+    Grade answers ([{question_id, choice_id}, ...]) against answer_key in memory.
+    Returns (score, total, details). Answers for questions outside the quiz are ignored.
+    """
+    questions = answer_key["questions"]
+    score = 0
+    details = []
+    for ans in answers:
+        qid = _to_int(ans.get("question_id"))
+        entry = questions.get(qid)
+        if entry is None:
+            continue
+        chosen_id = _to_int(ans.get("choice_id"))
+        is_correct = bool(chosen_id) and chosen_id in entry["correct"]
+        if is_correct:
+            score += entry["marks"]
+        details.append({
+            "question_id": qid,
+            "question": entry["text"],
+            "selected_choice_id": chosen_id,
+            "selected_text": entry["choices"].get(chosen_id),
+            "correct": is_correct,
+            "correct_answer": entry["correct_text"],
+            "marks": entry["marks"],
+        })
+    return score, answer_key["total"], details
@@ -0,0 +1,234 @@
+"""
+Closure-table lookups over the curriculum (Subject -> Lesson -> Topic/Quiz -> Question).
+
+CurriculumClosure stores every (ancestor, descendant) pair, so "all questions
+under subject X" or "which subject is topic Y in" is one indexed lookup
+instead of a chain of joins. Rows are kept current by signals in
+content/signals.py; rebuild_closure() recomputes the table after bulk loads
+that bypass signals (manage.py rebuild_curriculum_closure).
+
+The closure is maintained by content's receivers, so code running inside
+another app's save/delete receivers for the same model must not rely on it
+(those may run first).
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Subject, Lesson, Topic, Quiz, Question, CurriculumClosure as C
+
+NODE_TYPES = {"subject": C.SUBJECT, "lesson": C.LESSON, "topic": C.TOPIC, "quiz": C.QUIZ, "question": C.QUESTION}
+
+# node type -> (parent node type, parent FK attribute)
+PARENTS = {
+    C.LESSON: (C.SUBJECT, "subject_id"),
+    C.TOPIC: (C.LESSON, "lesson_id"),
+    C.QUIZ: (C.LESSON, "lesson_id"),
+    C.QUESTION: (C.QUIZ, "quiz_id"),
+}
+
+BATCH_SIZE = 5000
+
+
+def node_of(instance):
+    """Return (node_type, id) for a curriculum model instance."""
+    return NODE_TYPES[instance._meta.model_name], instance.pk
+
+
+def parent_of(instance):
+    """Return (node_type, id) of instance's parent, or None for subjects."""
+    node_type = NODE_TYPES[instance._meta.model_name]
+    if node_type not in PARENTS:
+        return None
+    parent_type, attr = PARENTS[node_type]
+    return parent_type, getattr(instance, attr)
+
+
+# ------------------ QUERIES ------------------
+def descendants(node_type, node_id, of_type):
+    """Lazy id list of every of_type node under (node_type, node_id); usable as a subquery."""
+    return C.objects.filter(
+        ancestor_type=node_type, ancestor_id=node_id, descendant_type=of_type
+    ).values_list("descendant_id", flat=True)
+
+
+def descendants_in_class(board, class_level, of_type):
+    """Lazy id list of every of_type node in a board/class syllabus."""
+    return C.objects.filter(
+        ancestor_type=C.SUBJECT,
+        ancestor_id__in=Subject.objects.filter(board=board, class_level=class_level).values("id"),
+        descendant_type=of_type,
+    ).values_list("descendant_id", flat=True)
+
+
+def count_descendants(node_type, node_id, of_type):
+    """
+    Lazy one-value queryset counting the of_type nodes under (node_type, node_id).
+    node_id may be an OuterRef: Coalesce(Subquery(count_descendants(...)), 0).
+    """
+    return (
+        C.objects.filter(ancestor_type=node_type, ancestor_id=node_id, descendant_type=of_type)
+        .order_by()
+        .values("ancestor_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+
+
+def descendant_counts(node_type, of_type, ids=None):
+    """{id: number of of_type nodes under it} for ids (or every node_type node), one grouped query."""
+    rows = C.objects.filter(ancestor_type=node_type, descendant_type=of_type)
+    if ids is not None:
+        rows = rows.filter(ancestor_id__in=ids)
+    return dict(rows.order_by().values("ancestor_id").annotate(n=Count("id")).values_list("ancestor_id", "n"))
+
+
+def ancestors_of(node_type, ids):
+    """
+    Return {id: {ancestor_type: ancestor_id}} for the given nodes, each node
+    included as its own ancestor. Missing nodes are absent. One query.
+    """
+    result = {}
+    rows = C.objects.filter(descendant_type=node_type, descendant_id__in=ids).values_list(
+        "descendant_id", "ancestor_type", "ancestor_id"
+    )
+    for node_id, ancestor_type, ancestor_id in rows:
+        result.setdefault(node_id, {})[ancestor_type] = ancestor_id
+    return result
+
+
+def resolve_nodes(nodes):
+    """
+    nodes: iterable of (node_type, id).
+    Return {(node_type, id): {ancestor_type: ancestor_id}} for those that exist, in one query.
+    """
+    by_type = {}
+    for node_type, node_id in nodes:
+        by_type.setdefault(node_type, set()).add(node_id)
+    if not by_type:
+        return {}
+    q = Q()
+    for node_type, ids in by_type.items():
+        q |= Q(descendant_type=node_type, descendant_id__in=ids)
+    result = {}
+    for node_type, node_id, ancestor_type, ancestor_id in C.objects.filter(q).values_list(
+        "descendant_type", "descendant_id", "ancestor_type", "ancestor_id"
+    ):
+        result.setdefault((node_type, node_id), {})[ancestor_type] = ancestor_id
+    return result
+
+
+# ------------------ MAINTENANCE ------------------
+def _ancestor_rows(node_type, node_id):
+    return list(
+        C.objects.filter(descendant_type=node_type, descendant_id=node_id).values_list("ancestor_type", "ancestor_id", "depth")
+    )
+
+
+def add_node(node_type, node_id, parent=None):
+    rows = [C(ancestor_type=node_type, ancestor_id=node_id, descendant_type=node_type, descendant_id=node_id, depth=0)]
+    if parent is not None and parent[1] is not None:
+        rows += [
+            C(ancestor_type=a_type, ancestor_id=a_id, descendant_type=node_type, descendant_id=node_id, depth=depth + 1)
+            for a_type, a_id, depth in _ancestor_rows(*parent)
+        ]
+    C.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def add_nodes(node_type, pairs):
+    """
+    Bulk add_node for freshly created nodes of one type.
+    pairs: [(node_id, parent_id)] (parent_id ignored for subjects). Two queries.
+    """
+    parent_rows = {}
+    if node_type in PARENTS:
+        parent_type = PARENTS[node_type][0]
+        for parent_id, a_type, a_id, depth in C.objects.filter(
+            descendant_type=parent_type, descendant_id__in={p for _, p in pairs}
+        ).values_list("descendant_id", "ancestor_type", "ancestor_id", "depth"):
+            parent_rows.setdefault(parent_id, []).append((a_type, a_id, depth))
+    rows = []
+    for node_id, parent_id in pairs:
+        rows.append(C(ancestor_type=node_type, ancestor_id=node_id, descendant_type=node_type, descendant_id=node_id, depth=0))
+        rows += [
+            C(ancestor_type=a_type, ancestor_id=a_id, descendant_type=node_type, descendant_id=node_id, depth=depth + 1)
+            for a_type, a_id, depth in parent_rows.get(parent_id, [])
+        ]
+    C.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def move_node(node_type, node_id, new_parent):
+    """Re-attach the subtree rooted at (node_type, node_id) under new_parent."""
+    subtree = list(
+        C.objects.filter(ancestor_type=node_type, ancestor_id=node_id).values_list("descendant_type", "descendant_id", "depth")
+    )
+    old_ancestors = [(t, i) for t, i, depth in _ancestor_rows(node_type, node_id) if depth > 0]
+    new_ancestors = _ancestor_rows(*new_parent) if new_parent[1] is not None else []
+
+    in_subtree = Q()
+    by_type = {}
+    for d_type, d_id, _ in subtree:
+        by_type.setdefault(d_type, []).append(d_id)
+    for d_type, ids in by_type.items():
+        in_subtree |= Q(descendant_type=d_type, descendant_id__in=ids)
+
+    with transaction.atomic():
+        if old_ancestors:
+            above = Q()
+            for a_type, a_id in old_ancestors:
+                above |= Q(ancestor_type=a_type, ancestor_id=a_id)
+            C.objects.filter(above).filter(in_subtree).delete()
+        C.objects.bulk_create(
+            [
+                C(ancestor_type=a_type, ancestor_id=a_id, descendant_type=d_type, descendant_id=d_id, depth=a_depth + d_depth + 1)
+                for a_type, a_id, a_depth in new_ancestors
+                for d_type, d_id, d_depth in subtree
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def remove_node(node_type, node_id):
+    C.objects.filter(
+        Q(descendant_type=node_type, descendant_id=node_id) | Q(ancestor_type=node_type, ancestor_id=node_id)
+    ).delete()
+
+
+def _closure_rows():
+    """Yield every closure row, computed level by level from the content tables."""
+    chains = {}  # (type, id) -> [(ancestor_type, ancestor_id), ...] nearest first
+
+    def emit(node_type, node_id, parent):
+        chain = [parent] + chains.get(parent, []) if parent and parent[1] is not None else []
+        chains[(node_type, node_id)] = chain
+        yield C(ancestor_type=node_type, ancestor_id=node_id, descendant_type=node_type, descendant_id=node_id, depth=0)
+        for depth, (a_type, a_id) in enumerate(chain, start=1):
+            yield C(ancestor_type=a_type, ancestor_id=a_id, descendant_type=node_type, descendant_id=node_id, depth=depth)
+
+    for pk in Subject.objects.values_list("id", flat=True).iterator():
+        yield from emit(C.SUBJECT, pk, None)
+    for model, node_type in ((Lesson, C.LESSON), (Topic, C.TOPIC), (Quiz, C.QUIZ), (Question, C.QUESTION)):
+        parent_type, attr = PARENTS[node_type]
+        for pk, parent_id in model.objects.values_list("id", attr).iterator(chunk_size=BATCH_SIZE):
+            yield from emit(node_type, pk, (parent_type, parent_id))
+        if node_type in (C.TOPIC, C.QUESTION):
+            # Nothing hangs below topics and questions
+            for key in [k for k in chains if k[0] == node_type]:
+                del chains[key]
+
+
+def rebuild_closure():
+    """Recompute the whole closure table. Returns the number of rows written."""
+    count = 0
+    with transaction.atomic():
+        C.objects.all().delete()
+        batch = []
+        for row in _closure_rows():
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                C.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        C.objects.bulk_create(batch)
+        count += len(batch)
+    return count
@@ -0,0 +1,412 @@
+"""
+Streaming bulk importer for syllabi and question banks (CSV or JSONL).
+
+Every record is one path down the curriculum; columns/keys:
+    board, class_level, subject, [subject_code],
+    [lesson, lesson_order, lesson_text, duration],
+    [topic, topic_order, topic_content],
+    [quiz, time_limit],
+    [question, qtype, marks, choices, correct]
+In CSV, choices and correct are "|"-separated choice texts; in JSONL they may
+also be lists. Deeper levels need their parents (a topic needs a lesson, ...).
+
+Rows are deduplicated against natural keys, e.g. a lesson is (subject, title)
+and a question is (quiz, text), so re-running an import never duplicates
+anything. Records are read lazily and written chunk_size at a time, each
+chunk in its own transaction with one bulk_create per model, so memory stays
+flat whatever the file size. Only parent ids (subjects, lessons, quizzes) are
+remembered across chunks.
+
+bulk_create skips model signals, so everything they normally maintain is
+updated here instead: the closure table, search index and change journal per
+chunk; question pools, cache and rendered-HTML versions and SubjectProgress
+lesson totals once at the end.
+"""
+import csv
+import io
+import json
+import time
+
+from django.db import transaction
+
+from .models import Subject, Lesson, Topic, Quiz, Question, Choice, CurriculumClosure as C
+
+CHUNK_SIZE = 1000
+CACHE_LIMIT = 50000
+MAX_ERRORS = 100
+
+QTYPES = {key for key, _ in Question.QUESTION_TYPES}
+LEVELS = ("subject", "lesson", "topic", "quiz", "question", "choice")
+PARENT_LEVEL = {"lesson": "subject", "topic": "lesson", "quiz": "lesson", "question": "quiz", "choice": "question"}
+
+
+class RowError(ValueError):
+    pass
+
+
+# ------------------ READERS ------------------
+def read_records(fh, fmt):
+    """Yield (line_no, record or RowError) from a text stream in fmt ("csv" or "jsonl")."""
+    if fmt == "csv":
+        reader = csv.DictReader(fh)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(fh, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, RowError(f"invalid JSON: {e.msg}")
+            continue
+        yield line_no, record if isinstance(record, dict) else RowError("expected a JSON object")
+
+
+def detect_format(name):
+    return "jsonl" if name.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def open_text(binary_fh):
+    """Wrap a binary upload/file as UTF-8 text without reading it into memory."""
+    return io.TextIOWrapper(binary_fh, encoding="utf-8-sig", newline="")
+
+
+# ------------------ VALIDATION ------------------
+def _text(record, key, required=False, max_length=None):
+    value = record.get(key)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"{key} is required")
+    if max_length and len(value) > max_length:
+        raise RowError(f"{key} is longer than {max_length} characters")
+    return value
+
+
+def _int(record, key, default=None):
+    value = record.get(key)
+    if value is None or str(value).strip() == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} must be an integer")
+
+
+def _list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split("|") if v.strip()]
+
+
+def clean_record(record):
+    """Validate one raw record. Returns a normalized dict or raises RowError."""
+    row = {
+        "board": _text(record, "board", True, 50),
+        "class_level": _text(record, "class_level", True, 50),
+        "subject": _text(record, "subject", True, 200),
+        "subject_code": _text(record, "subject_code", max_length=50),
+        "lesson": _text(record, "lesson", max_length=255),
+        "lesson_order": _int(record, "lesson_order", 1),
+        "lesson_text": _text(record, "lesson_text"),
+        "duration": _int(record, "duration", 5),
+        "topic": _text(record, "topic", max_length=255),
+        "topic_order": _int(record, "topic_order", 1),
+        "topic_content": _text(record, "topic_content"),
+        "quiz": _text(record, "quiz", max_length=255),
+        "time_limit": _int(record, "time_limit"),
+        "question": _text(record, "question"),
+        "qtype": _text(record, "qtype") or "mcq",
+        "marks": _int(record, "marks", 1),
+        "choices": [],
+        "correct": set(_list(record.get("correct"))),
+    }
+    for level, parent in (("topic", "lesson"), ("quiz", "lesson"), ("question", "quiz")):
+        if row[level] and not row[parent]:
+            raise RowError(f"{level} given without {parent}")
+    if row["qtype"] not in QTYPES:
+        raise RowError(f"qtype must be one of {', '.join(sorted(QTYPES))}")
+
+    choices = record.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        for c in choices:
+            text = str(c.get("text", "")).strip()
+            if text:
+                row["choices"].append(text)
+                if c.get("is_correct"):
+                    row["correct"].add(text)
+    else:
+        row["choices"] = _list(choices)
+    if row["choices"] and not row["question"]:
+        raise RowError("choices given without question")
+    if any(len(c) > 500 for c in row["choices"]):
+        raise RowError("choice is longer than 500 characters")
+    if row["correct"] - set(row["choices"]):
+        raise RowError("correct answer is not one of the choices")
+    return row
+
+
+# ------------------ IMPORT ------------------
+class Importer:
+    """
+    importer = Importer(dry_run=False, progress=callback)
+    stats = importer.run(records)   # records: iterable of (line_no, raw record)
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, dry_run=False, progress=None):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.cache = {"subject": {}, "lesson": {}, "quiz": {}}
+        # Dry runs roll every chunk back, so rows "created" by an earlier chunk
+        # are remembered by natural path (board, class, subject, lesson, ...)
+        self.dry_created = {level: set() for level in LEVELS}
+        self.touched_quizzes = set()
+        self.touched_subjects = set()
+        self.new_rendered = {"lesson": set(), "topic": set()}
+        self.stats = {
+            "rows": 0,
+            "invalid": 0,
+            "errors": [],
+            "created": {level: 0 for level in LEVELS},
+            "existing": {level: 0 for level in LEVELS},
+            "dry_run": dry_run,
+        }
+
+    def run(self, records):
+        started = time.monotonic()
+        chunk = []
+        for line_no, record in records:
+            self.stats["rows"] += 1
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                chunk.append(clean_record(record))
+            except RowError as e:
+                self.stats["invalid"] += 1
+                if len(self.stats["errors"]) < MAX_ERRORS:
+                    self.stats["errors"].append({"line": line_no, "error": str(e)})
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+                self._report(started)
+        if chunk:
+            self._write_chunk(chunk)
+        if not self.dry_run:
+            self._finish()
+        self._report(started)
+        return self.stats
+
+    def _report(self, started):
+        elapsed = time.monotonic() - started
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["rows_per_sec"] = round(self.stats["rows"] / elapsed, 1) if elapsed > 0 else None
+        if self.progress:
+            self.progress(self.stats)
+
+    def _write_chunk(self, rows):
+        with transaction.atomic():
+            created = self._upsert_chunk(rows)
+            if self.dry_run:
+                transaction.set_rollback(True)
+            else:
+                self._propagate(created)
+        if self.dry_run:
+            # Ids handed out inside the rolled-back transaction are gone; created
+            # counts survive in self.dry_created (see _count_dry_run)
+            for cache in self.cache.values():
+                cache.clear()
+        for cache in self.cache.values():
+            if len(cache) > CACHE_LIMIT:
+                cache.clear()
+
+    def _resolve(self, level, model, keys, key_fields, build, cache=None):
+        """
+        Map each natural key to an id, creating rows that do not exist.
+        keys: {key_tuple: scope (board, class_level)}
+        Returns {key: id} and records created ids as (id, parent_id, scope) in self._created[level].
+        """
+        ids = {k: cache[k] for k in keys if cache is not None and k in cache}
+        missing = [k for k in keys if k not in ids]
+        new_keys = []
+        if missing:
+            lookup = {f"{f}__in": {k[i] for k in missing} for i, f in enumerate(key_fields)}
+            for row in model.objects.filter(**lookup).values_list("id", *key_fields):
+                if row[1:] in keys and row[1:] not in ids:
+                    ids[row[1:]] = row[0]
+            self.stats["existing"][level] += sum(1 for k in missing if k in ids)
+            new_keys = [k for k in missing if k not in ids]
+            if new_keys:
+                objs = model.objects.bulk_create([build(k) for k in new_keys], batch_size=500)
+                if any(o.pk is None for o in objs):
+                    # Backend cannot return ids from bulk inserts: read them back
+                    lookup = {f"{f}__in": {k[i] for k in new_keys} for i, f in enumerate(key_fields)}
+                    back = {row[1:]: row[0] for row in model.objects.filter(**lookup).values_list("id", *key_fields)}
+                    for o, k in zip(objs, new_keys):
+                        o.pk = back[k]
+                for o, k in zip(objs, new_keys):
+                    ids[k] = o.pk
+                    parent_id = k[0] if level != "subject" else None
+                    self._created[level].append((o.pk, parent_id, keys[k]))
+                if not self.dry_run:
+                    self.stats["created"][level] += len(new_keys)
+        if self.dry_run:
+            self._count_dry_run(level, ids, new_keys)
+        if cache is not None:
+            cache.update(ids)
+        return ids
+
+    def _count_dry_run(self, level, ids, new_keys):
+        """Count new rows by natural path so a parent re-created in a later (rolled back) chunk counts once."""
+        parent_paths = self._paths.get(PARENT_LEVEL.get(level), {})
+        paths = self._paths.setdefault(level, {})
+        for k, pk in ids.items():
+            paths[pk] = parent_paths.get(k[0], ()) + (k[-1],) if level != "subject" else k
+        for k in new_keys:
+            path = paths[ids[k]]
+            if path not in self.dry_created[level]:
+                self.dry_created[level].add(path)
+                self.stats["created"][level] += 1
+
+    def _upsert_chunk(self, rows):
+        self._created = {level: [] for level in LEVELS}
+        self._paths = {}  # level -> {id: natural path}, dry runs only
+        first = {}  # natural key -> first row carrying it, for the non-key fields
+
+        subject_keys = {}
+        for r in rows:
+            key = (r["board"], r["class_level"], r["subject"])
+            subject_keys[key] = (r["board"], r["class_level"])
+            first.setdefault(("subject", key), r)
+        subjects = self._resolve(
+            "subject", Subject, subject_keys, ("board", "class_level", "name"),
+            lambda k: Subject(board=k[0], class_level=k[1], name=k[2], code=first[("subject", k)]["subject_code"]),
+            self.cache["subject"],
+        )
+
+        def scope(r):
+            return r["board"], r["class_level"]
+
+        def subject_id(r):
+            return subjects[(r["board"], r["class_level"], r["subject"])]
+
+        lesson_keys = {}
+        for r in rows:
+            if r["lesson"]:
+                key = (subject_id(r), r["lesson"])
+                lesson_keys[key] = scope(r)
+                first.setdefault(("lesson", key), r)
+        lessons = self._resolve(
+            "lesson", Lesson, lesson_keys, ("subject_id", "title"),
+            lambda k: Lesson(
+                subject_id=k[0], title=k[1], order=first[("lesson", k)]["lesson_order"],
+                content_text=first[("lesson", k)]["lesson_text"], duration=first[("lesson", k)]["duration"],
+            ),
+            self.cache["lesson"],
+        )
+
+        def lesson_id(r):
+            return lessons[(subject_id(r), r["lesson"])]
+
+        topic_keys, quiz_keys = {}, {}
+        for r in rows:
+            if r["topic"]:
+                key = (lesson_id(r), r["topic"])
+                topic_keys[key] = scope(r)
+                first.setdefault(("topic", key), r)
+            if r["quiz"]:
+                key = (lesson_id(r), r["quiz"])
+                quiz_keys[key] = scope(r)
+                first.setdefault(("quiz", key), r)
+        self._resolve(
+            "topic", Topic, topic_keys, ("lesson_id", "title"),
+            lambda k: Topic(lesson_id=k[0], title=k[1], order=first[("topic", k)]["topic_order"], content=first[("topic", k)]["topic_content"]),
+        )
+        quizzes = self._resolve(
+            "quiz", Quiz, quiz_keys, ("lesson_id", "title"),
+            lambda k: Quiz(lesson_id=k[0], title=k[1], time_limit=first[("quiz", k)]["time_limit"]),
+            self.cache["quiz"],
+        )
+
+        question_keys = {}
+        for r in rows:
+            if r["question"]:
+                key = (quizzes[(lesson_id(r), r["quiz"])], r["question"])
+                question_keys[key] = scope(r)
+                first.setdefault(("question", key), r)
+        questions = self._resolve(
+            "question", Question, question_keys, ("quiz_id", "text"),
+            lambda k: Question(quiz_id=k[0], text=k[1], qtype=first[("question", k)]["qtype"], marks=first[("question", k)]["marks"]),
+        )
+
+        choice_keys, correct = {}, {}
+        for r in rows:
+            if r["question"]:
+                qid = questions[(quizzes[(lesson_id(r), r["quiz"])], r["question"])]
+                for text in r["choices"]:
+                    choice_keys[(qid, text)] = scope(r)
+                    correct[(qid, text)] = correct.get((qid, text), False) or text in r["correct"]
+        self._resolve(
+            "choice", Choice, choice_keys, ("question_id", "text"),
+            lambda k: Choice(question_id=k[0], text=k[1], is_correct=correct[k]),
+        )
+        return self._created
+
+    def _propagate(self, created):
+        """
+        Per chunk, for the new rows: closure table, search index and change
+        journal entries. Subjects with new lessons and new lessons/topics are
+        remembered for _finish().
+        """
+        from sync.journal import record_changes
+        from .hierarchy import add_nodes
+        from .search import get_search_backend
+
+        node_types = {"subject": C.SUBJECT, "lesson": C.LESSON, "topic": C.TOPIC, "quiz": C.QUIZ, "question": C.QUESTION}
+        for level, node_type in node_types.items():
+            if created[level]:
+                add_nodes(node_type, [(pk, parent_id) for pk, parent_id, _ in created[level]])
+        backend = get_search_backend()
+        for level in ("lesson", "topic", "question"):
+            if created[level]:
+                backend.index(level, [pk for pk, _, _ in created[level]])
+        for level in LEVELS:
+            if created[level]:
+                record_changes(level, [(pk, board, class_level) for pk, _, (board, class_level) in created[level]])
+
+        self.touched_subjects.update(subject_id for _, subject_id, _ in created["lesson"])
+        for level in self.new_rendered:
+            self.new_rendered[level].update(pk for pk, _, _ in created[level])
+        self.touched_quizzes.update(quiz_id for _, quiz_id, _ in created["question"])
+        self.touched_quizzes.update(
+            Question.objects.filter(pk__in={qid for _, qid, _ in created["choice"]}).values_list("quiz_id", flat=True)
+        )
+
+    def _finish(self):
+        """
+        Once per import: content tree and quiz cache versions, rendered-HTML
+        versions of the new lessons/topics, question pools and the lesson
+        totals in SubjectProgress.
+        """
+        from accounts.progress import refresh_subject_totals
+        from .cache import bump_content_version, bump_quiz_version
+        from .rendering import bump_render_versions
+        from .sampling import rebuild_pools
+
+        if any(self.stats["created"].values()):
+            bump_content_version()
+        for kind, ids in self.new_rendered.items():
+            bump_render_versions(kind, ids)
+        refresh_subject_totals(self.touched_subjects)
+        for quiz_id in self.touched_quizzes:
+            bump_quiz_version(quiz_id)
+        if self.touched_quizzes:
+            rebuild_pools(set(Quiz.objects.filter(pk__in=self.touched_quizzes).values_list("lesson_id", flat=True)))
+
+
+def import_file(binary_fh, fmt, **kwargs):
+    """Import an open binary file object. Returns the stats dict."""
+    return Importer(**kwargs).run(read_records(open_text(binary_fh), fmt))
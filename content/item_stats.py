@@ -0,0 +1,163 @@
+"""
+Item statistics (difficulty, discrimination, distractors) over quiz responses.
+
+Requires NumPy. AttemptAnswer rows newer than the last ItemStatsRun are
+streamed in id order, chunk_size rows at a time, into NumPy arrays. Per-chunk
+sums are computed with np.unique/np.bincount, so Python only loops over the
+distinct questions of a chunk, never over individual responses. Because
+every statistic is derived from running sums, a run only has to read the
+responses that arrived since the previous one.
+
+For an item with n responders, n1 of them correct, and attempt scores x
+(score / total, 0..1):
+    p_value        = n1 / n
+    point_biserial = (mean(x | correct) - mean(x)) / sd(x) * sqrt(p / (1 - p))
+The attempt score includes the item itself (uncorrected point-biserial).
+"""
+import math
+
+import numpy as np
+from django.db import transaction
+
+from .models import Question, QuestionStats, ItemStatsRun
+
+NO_CHOICE = -1
+
+
+def _empty():
+    return {"n": 0, "n1": 0, "s": 0.0, "ss": 0.0, "s1": 0.0, "choices": {}}
+
+
+def accumulate_chunk(acc, qids, cids, correct, scores):
+    """
+    Fold one chunk of responses (parallel NumPy arrays) into acc, a dict of
+    running sums keyed by question id.
+    """
+    uq, qidx = np.unique(qids, return_inverse=True)
+    k = len(uq)
+    n = np.bincount(qidx, minlength=k)
+    n1 = np.bincount(qidx, weights=correct, minlength=k)
+    s = np.bincount(qidx, weights=scores, minlength=k)
+    ss = np.bincount(qidx, weights=scores * scores, minlength=k)
+    s1 = np.bincount(qidx, weights=scores * correct, minlength=k)
+
+    for i, qid in enumerate(uq.tolist()):
+        a = acc.setdefault(qid, _empty())
+        a["n"] += int(n[i])
+        a["n1"] += int(n1[i])
+        a["s"] += float(s[i])
+        a["ss"] += float(ss[i])
+        a["s1"] += float(s1[i])
+
+    pairs = np.stack([qids, cids], axis=1)
+    upairs, pidx = np.unique(pairs, axis=0, return_inverse=True)
+    pidx = pidx.reshape(-1)
+    pcount = np.bincount(pidx, minlength=len(upairs))
+    pscore = np.bincount(pidx, weights=scores, minlength=len(upairs))
+    for (qid, cid), count, score_sum in zip(upairs.tolist(), pcount.tolist(), pscore.tolist()):
+        key = "none" if cid == NO_CHOICE else str(cid)
+        c = acc[qid]["choices"].setdefault(key, {"count": 0, "score_sum": 0.0})
+        c["count"] += int(count)
+        c["score_sum"] += float(score_sum)
+
+
+def derive(n, n1, s, ss, s1):
+    """Return (p_value, point_biserial) from running sums; None where undefined."""
+    if n == 0:
+        return None, None
+    p = n1 / n
+    mean = s / n
+    var = ss / n - mean * mean
+    if n1 == 0 or n1 == n or var <= 1e-12:
+        return p, None
+    return p, (s1 / n1 - mean) / math.sqrt(var) * math.sqrt(p / (1 - p))
+
+
+def stream_responses(after_id, chunk_size):
+    """
+    Yield (last_id, qids, cids, correct, scores) arrays for AttemptAnswer rows with id > after_id.
+    """
+    from accounts.models import AttemptAnswer
+
+    rows = (
+        AttemptAnswer.objects.filter(pk__gt=after_id, attempt__total__gt=0)
+        .order_by("pk")
+        .values_list("pk", "question_id", "choice_id", "correct", "attempt__score", "attempt__total")
+        .iterator(chunk_size=chunk_size)
+    )
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= chunk_size:
+            yield _to_arrays(buf)
+            buf = []
+    if buf:
+        yield _to_arrays(buf)
+
+
+def _to_arrays(rows):
+    arr = np.array(
+        [(pk, qid, NO_CHOICE if cid is None else cid, ok, score, total) for pk, qid, cid, ok, score, total in rows],
+        dtype=np.float64,
+    )
+    return (
+        int(arr[-1, 0]),
+        arr[:, 1].astype(np.int64),
+        arr[:, 2].astype(np.int64),
+        arr[:, 3],
+        np.clip(arr[:, 4] / arr[:, 5], 0.0, 1.0),
+    )
+
+
+def run(chunk_size=50000, full=False, progress=None):
+    """
+    Update QuestionStats with responses since the last run (or all, if full).
+    Returns the ItemStatsRun recorded for this run.
+    """
+    last = None if full else ItemStatsRun.objects.first()
+    after_id = last.last_answer_id if last else 0
+
+    acc = {}
+    processed = 0
+    for last_id, qids, cids, correct, scores in stream_responses(after_id, chunk_size):
+        accumulate_chunk(acc, qids, cids, correct, scores)
+        processed += len(qids)
+        after_id = last_id
+        if progress:
+            progress(processed)
+
+    with transaction.atomic():
+        if full:
+            QuestionStats.objects.all().delete()
+        existing = QuestionStats.objects.in_bulk(list(acc))
+        # Answers outlive deleted questions (no FK constraint); skip those
+        live = Question.objects.only("id").in_bulk(list(acc))
+        rows = []
+        for qid, a in acc.items():
+            if qid not in live:
+                continue
+            row = existing.get(qid) or QuestionStats(question_id=qid, choice_stats={})
+            row.responses += a["n"]
+            row.correct_count += a["n1"]
+            row.score_sum += a["s"]
+            row.score_sq_sum += a["ss"]
+            row.correct_score_sum += a["s1"]
+            for key, c in a["choices"].items():
+                merged = row.choice_stats.setdefault(key, {"count": 0, "score_sum": 0.0})
+                merged["count"] += c["count"]
+                merged["score_sum"] += c["score_sum"]
+            row.p_value, row.point_biserial = derive(
+                row.responses, row.correct_count, row.score_sum, row.score_sq_sum, row.correct_score_sum
+            )
+            rows.append(row)
+        QuestionStats.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["question"],
+            update_fields=[
+                "responses", "correct_count", "score_sum", "score_sq_sum", "correct_score_sum",
+                "choice_stats", "p_value", "point_biserial", "updated_at",
+            ],
+        )
+        return ItemStatsRun.objects.create(last_answer_id=after_id, answers_processed=processed)
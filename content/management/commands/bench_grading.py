@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from content.cache import bump_quiz_version
+from content.grading import get_answer_key, grade
+from content.models import Subject, Lesson, Quiz, Question, Choice
+
+
+class _Rollback(Exception):
+    pass
+
+
+def legacy_grade(quiz_id, answers):
+    """
+    The per-answer query pattern api_submit_quiz used before content.grading,
+    kept here only as the baseline for the benchmark.
+    """
+    quiz = Quiz.objects.get(pk=quiz_id)
+    correct_map = {}
+    total = 0
+    for q in quiz.questions.all():
+        total += q.marks or 1
+        correct_map[q.id] = set(q.choices.filter(is_correct=True).values_list("id", flat=True))
+    score = 0
+    for ans in answers:
+        qobj = quiz.questions.get(pk=ans["question_id"])
+        if ans["choice_id"] in correct_map[qobj.id]:
+            score += qobj.marks or 1
+        qobj.choices.filter(is_correct=True).first()
+        qobj.choices.filter(pk=ans["choice_id"]).first()
+    return score, total
+
+
+class Command(BaseCommand):
+    help = "Benchmark quiz grading: queries per submission and latency as quiz size grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="5,10,25,50,100,200", help="Comma-separated question counts")
+        parser.add_argument("--choices", type=int, default=4, help="Choices per question")
+        parser.add_argument("--repeat", type=int, default=20, help="Submissions timed per size")
+
+    def handle(self, *args, **opts):
+        sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        self.stdout.write(
+            f"{'questions':>9} | {'legacy q':>8} {'legacy ms':>9} | "
+            f"{'cold q':>6} {'cold ms':>8} | {'warm q':>6} {'warm ms':>8}"
+        )
+        # Fixtures are created inside a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                for size in sizes:
+                    self.stdout.write(self._bench(size, opts["choices"], opts["repeat"]))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _bench(self, size, n_choices, repeat):
+        subject = Subject.objects.create(name="Bench", board="BENCH", class_level="0")
+        lesson = Lesson.objects.create(subject=subject, title="Bench")
+        quiz = Quiz.objects.create(lesson=lesson, title=f"Bench {size}")
+        answers = []
+        for i in range(size):
+            q = Question.objects.create(quiz=quiz, text=f"Q{i}", marks=1)
+            choices = Choice.objects.bulk_create(
+                [Choice(question=q, text=f"C{j}", is_correct=(j == 0)) for j in range(n_choices)]
+            )
+            answers.append({"question_id": q.id, "choice_id": choices[i % n_choices].id})
+
+        def measure(fn):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                fn()
+                elapsed = (time.perf_counter() - start) * 1000
+            return len(ctx.captured_queries), elapsed
+
+        legacy_q, legacy_ms = measure(lambda: legacy_grade(quiz.id, answers))
+
+        bump_quiz_version(quiz.id)
+        cold_q, cold_ms = measure(lambda: grade(get_answer_key(quiz.id), answers))
+
+        warm_q, warm_ms = 0, 0.0
+        for _ in range(repeat):
+            q_count, ms = measure(lambda: grade(get_answer_key(quiz.id), answers))
+            warm_q, warm_ms = max(warm_q, q_count), warm_ms + ms
+
+        return (
+            f"{size:>9} | {legacy_q:>8} {legacy_ms:>9.2f} | "
+            f"{cold_q:>6} {cold_ms:>8.2f} | {warm_q:>6} {warm_ms / repeat:>8.2f}"
+        )
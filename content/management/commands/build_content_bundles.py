@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from content.bundles import brotli, build_bundle, prune_bundles
+from content.models import Subject
+
+
+class Command(BaseCommand):
+    help = "Build content-hashed, precompressed offline bundles per (board, class_level, language)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", help="Only this board")
+        parser.add_argument("--class-level", help="Only this class level")
+        parser.add_argument("--language", action="append", dest="languages", help="Language code(s); default: settings.LANGUAGES")
+        parser.add_argument("--prune", action="store_true", help="Delete bundle files no longer referenced")
+
+    def handle(self, *args, **opts):
+        pairs = Subject.objects.order_by("board", "class_level").values_list("board", "class_level").distinct()
+        if opts["board"]:
+            pairs = pairs.filter(board=opts["board"])
+        if opts["class_level"]:
+            pairs = pairs.filter(class_level=opts["class_level"])
+        languages = opts["languages"] or [code for code, _ in settings.LANGUAGES]
+
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli is not installed; building gzip variants only."))
+
+        for board, class_level in pairs:
+            for language in languages:
+                bundle, created = build_bundle(board, class_level, language)
+                state = "built" if created else "unchanged"
+                self.stdout.write(
+                    f"{board} / {class_level} / {language}: {bundle.sha256[:12]} {state} "
+                    f"({bundle.size} B, gzip {bundle.gzip_size} B, br {bundle.brotli_size or '-'} B)"
+                )
+
+        if opts["prune"]:
+            self.stdout.write(f"Pruned {prune_bundles()} stale file(s).")
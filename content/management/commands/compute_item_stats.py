@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Update per-question difficulty, point-biserial and distractor statistics from new quiz responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=50000)
+        parser.add_argument("--full", action="store_true", help="Discard stored statistics and recompute from all responses")
+
+    def handle(self, *args, **opts):
+        try:
+            from content import item_stats
+        except ImportError as exc:
+            raise CommandError(f"compute_item_stats requires NumPy ({exc}).")
+
+        start = time.perf_counter()
+        result = item_stats.run(
+            chunk_size=opts["chunk_size"],
+            full=opts["full"],
+            progress=lambda n: self.stdout.write(f"  {n} responses read", ending="\r"),
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {result.answers_processed} responses in {elapsed:.1f}s; cursor at answer {result.last_answer_id}."
+        ))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from content.models import Lesson, MediaBlob
+from content.storage import blob_hash, content_addressed_storage, delete_if_unreferenced, retain
+from gamify.models import Badge
+
+TRACKED = ((Lesson, "content_file"), (Badge, "icon"))
+
+
+class Command(BaseCommand):
+    help = "Move legacy media files into the content-addressed store and recount blob references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-originals", action="store_true", help="Do not delete the legacy files after moving them")
+
+    def handle(self, *args, **opts):
+        storage = content_addressed_storage()
+        moved, legacy = 0, set()
+
+        for model, field in TRACKED:
+            rows = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True}).values_list("pk", field)
+            for pk, name in rows.iterator():
+                if blob_hash(name) or not default_storage.exists(name):
+                    continue
+                with default_storage.open(name, "rb") as fh:
+                    new_name = storage.save(name, fh)
+                model.objects.filter(pk=pk).update(**{field: new_name})
+                legacy.add(name)
+                moved += 1
+
+        # Recount from scratch: cheaper to reason about than patching drift
+        with transaction.atomic():
+            MediaBlob.objects.update(refs=0)
+            for model, field in TRACKED:
+                for name in model.objects.exclude(**{field: ""}).values_list(field, flat=True).iterator():
+                    retain(name)
+
+        removed = sum(delete_if_unreferenced(sha) for sha in MediaBlob.objects.filter(refs=0).values_list("sha256", flat=True))
+
+        if not opts["keep_originals"]:
+            for name in legacy:
+                default_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} file(s) into the store, {len(legacy)} legacy file(s) "
+            f"{'kept' if opts['keep_originals'] else 'removed'}, {removed} unreferenced blob(s) deleted."
+        ))
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from content.export import export_records, gzip_stream, jsonl_chunks
+
+
+class Command(BaseCommand):
+    help = "Stream a board's curriculum (Subject ... Choice) as JSONL, optionally gzipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", required=True)
+        parser.add_argument("--class-level", help="Only this class level")
+        parser.add_argument("-o", "--output", help="Output file (default: stdout); .gz implies --gzip")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+
+    def handle(self, *args, **opts):
+        output = opts["output"]
+        chunks = jsonl_chunks(export_records(opts["board"], opts["class_level"]))
+        if opts["gzip"] or (output or "").endswith(".gz"):
+            chunks = gzip_stream(chunks)
+
+        fh = open(output, "wb") if output else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                fh.write(chunk)
+                written += len(chunk)
+        finally:
+            if output:
+                fh.close()
+        if output:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {output}."))
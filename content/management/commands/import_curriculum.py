@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content.importer import CHUNK_SIZE, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/JSONL syllabus or question bank into the content tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and count without saving anything")
+
+    def handle(self, *args, **opts):
+        fmt = opts["format"] or detect_format(opts["path"])
+
+        def progress(stats):
+            self.stdout.write(f"{stats['rows']} rows, {stats['invalid']} invalid, {stats['rows_per_sec'] or 0:.0f} rows/s")
+
+        try:
+            with open(opts["path"], "rb") as fh:
+                stats = import_file(fh, fmt, chunk_size=opts["chunk_size"], dry_run=opts["dry_run"], progress=progress)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in stats["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        created = ", ".join(f"{n} {level}" for level, n in stats["created"].items() if n) or "nothing"
+        existing = sum(stats["existing"].values())
+        verb = "Would create" if stats["dry_run"] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {created}; {existing} already present; {stats['invalid']} invalid row(s). "
+            f"{stats['rows']} rows in {stats['seconds']}s ({stats['rows_per_sec'] or 0:.0f} rows/s)."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Recompute the CurriculumClosure table from Subject/Lesson/Topic/Quiz/Question."
+
+    def handle(self, *args, **opts):
+        count = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} closure row(s)."))
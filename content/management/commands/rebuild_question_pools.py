@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content.sampling import rebuild_pools
+
+
+class Command(BaseCommand):
+    help = "Recompute QuestionPool entries from the Question table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lesson", type=int, action="append", dest="lessons", help="Only these lesson ids")
+
+    def handle(self, *args, **opts):
+        count = rebuild_pools(opts["lessons"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} question pool(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the full-text search index over lessons, topics and questions."
+
+    def handle(self, *args, **opts):
+        count = get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} document(s)."))
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_pools(apps, schema_editor):
+    Question = apps.get_model('content', 'Question')
+    QuestionPool = apps.get_model('content', 'QuestionPool')
+    pools = {}
+    for qid, lesson_id, qtype in Question.objects.order_by('pk').values_list('id', 'quiz__lesson_id', 'qtype').iterator():
+        pools.setdefault((lesson_id, qtype), []).append(qid)
+    QuestionPool.objects.bulk_create(
+        [QuestionPool(lesson_id=lesson_id, qtype=qtype, question_ids=ids) for (lesson_id, qtype), ids in pools.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_topic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionPool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qtype', models.CharField(choices=[('mcq', 'MCQ'), ('fill', 'Fill'), ('match', 'Match'), ('tf', 'True/False')], max_length=10)),
+                ('question_ids', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_pools', to='content.lesson')),
+            ],
+            options={
+                'unique_together': {('lesson', 'qtype')},
+            },
+        ),
+        migrations.RunPython(build_pools, migrations.RunPython.noop),
+    ]
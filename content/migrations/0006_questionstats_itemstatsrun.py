@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_questionpool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemStatsRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_answer_id', models.BigIntegerField(default=0)),
+                ('answers_processed', models.PositiveIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-last_answer_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='content.question')),
+                ('responses', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('score_sq_sum', models.FloatField(default=0.0)),
+                ('correct_score_sum', models.FloatField(default=0.0)),
+                ('choice_stats', models.JSONField(blank=True, default=dict)),
+                ('p_value', models.FloatField(blank=True, null=True)),
+                ('point_biserial', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_questionstats_itemstatsrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=50)),
+                ('class_level', models.CharField(max_length=50)),
+                ('language', models.CharField(max_length=10)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('gzip_size', models.BigIntegerField(blank=True, null=True)),
+                ('brotli_size', models.BigIntegerField(blank=True, null=True)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('board', 'class_level', 'language')},
+            },
+        ),
+    ]
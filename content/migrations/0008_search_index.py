@@ -0,0 +1,69 @@
+import hashlib
+
+from django.db import migrations
+
+# Frozen copies of content.search's schema at the time of this migration;
+# later changes to the live module must not alter what this migration does.
+TABLE = 'content_search'
+TOKENIZER = "unicode61 remove_diacritics 0 categories 'L* N* Co M*'"
+RANK = 'bm25(0, 0, 0, 0, 0, 10.0, 1.0)'
+KIND_CODES = {'lesson': 1, 'topic': 2, 'question': 3}
+
+
+def scope_token(board, class_level):
+    return 's' + hashlib.sha1(f'{board}|{class_level}'.encode('utf-8')).hexdigest()[:16]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Lesson = apps.get_model('content', 'Lesson')
+    Topic = apps.get_model('content', 'Topic')
+    Question = apps.get_model('content', 'Question')
+
+    sources = {
+        'lesson': Lesson.objects.values_list(
+            'id', 'subject_id', 'id', 'subject__board', 'subject__class_level', 'title', 'content_text'
+        ),
+        'topic': Topic.objects.values_list(
+            'id', 'lesson__subject_id', 'lesson_id', 'lesson__subject__board', 'lesson__subject__class_level',
+            'title', 'content',
+        ),
+        'question': Question.objects.values_list(
+            'id', 'quiz__lesson__subject_id', 'quiz__lesson_id', 'quiz__lesson__subject__board',
+            'quiz__lesson__subject__class_level', 'quiz__title', 'text',
+        ),
+    }
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5(kind UNINDEXED, object_id UNINDEXED, subject_id UNINDEXED, '
+            f'lesson_id UNINDEXED, scope, title, body, tokenize="{TOKENIZER}")'
+        )
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('rank', %s)", [RANK])
+        for kind, qs in sources.items():
+            rows = [
+                (pk * 4 + KIND_CODES[kind], kind, pk, subject_id, lesson_id, scope_token(board, class_level), title or '', body or '')
+                for pk, subject_id, lesson_id, board, class_level, title, body in qs.order_by('pk').iterator()
+            ]
+            cursor.executemany(
+                f'INSERT INTO {TABLE}(rowid, kind, object_id, subject_id, lesson_id, scope, title, body) '
+                f'VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_contentbundle'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+import content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='content_file',
+            field=models.FileField(blank=True, null=True, storage=content.storage.content_addressed_storage, upload_to='lessons/'),
+        ),
+    ]
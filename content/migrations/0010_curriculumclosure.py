@@ -0,0 +1,62 @@
+from django.db import migrations, models
+
+SUBJECT, LESSON, TOPIC, QUIZ, QUESTION = 1, 2, 3, 4, 5
+
+
+def build_closure(apps, schema_editor):
+    C = apps.get_model('content', 'CurriculumClosure')
+    levels = [
+        (apps.get_model('content', 'Lesson'), LESSON, SUBJECT, 'subject_id'),
+        (apps.get_model('content', 'Topic'), TOPIC, LESSON, 'lesson_id'),
+        (apps.get_model('content', 'Quiz'), QUIZ, LESSON, 'lesson_id'),
+        (apps.get_model('content', 'Question'), QUESTION, QUIZ, 'quiz_id'),
+    ]
+    chains = {}
+    rows = []
+
+    def emit(node, parent):
+        chain = [parent] + chains.get(parent, []) if parent else []
+        chains[node] = chain
+        rows.append(C(ancestor_type=node[0], ancestor_id=node[1], descendant_type=node[0], descendant_id=node[1], depth=0))
+        for depth, (a_type, a_id) in enumerate(chain, start=1):
+            rows.append(C(ancestor_type=a_type, ancestor_id=a_id, descendant_type=node[0], descendant_id=node[1], depth=depth))
+        if len(rows) >= 5000:
+            C.objects.bulk_create(rows)
+            rows.clear()
+
+    for pk in apps.get_model('content', 'Subject').objects.values_list('id', flat=True).iterator():
+        emit((SUBJECT, pk), None)
+    for model, node_type, parent_type, attr in levels:
+        for pk, parent_id in model.objects.values_list('id', attr).iterator():
+            emit((node_type, pk), (parent_type, parent_id))
+    C.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurriculumClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_type', models.PositiveSmallIntegerField(choices=[(1, 'Subject'), (2, 'Lesson'), (3, 'Topic'), (4, 'Quiz'), (5, 'Question')])),
+                ('ancestor_id', models.BigIntegerField()),
+                ('descendant_type', models.PositiveSmallIntegerField(choices=[(1, 'Subject'), (2, 'Lesson'), (3, 'Topic'), (4, 'Quiz'), (5, 'Question')])),
+                ('descendant_id', models.BigIntegerField()),
+                ('depth', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(fields=('ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'), name='unique_curriculum_path'),
+                ],
+                'indexes': [
+                    models.Index(fields=['descendant_type', 'descendant_id', 'ancestor_type'], name='content_clo_descend_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_pool_members(apps, schema_editor):
+    QuestionPool = apps.get_model('content', 'QuestionPool')
+    QuestionPoolEntry = apps.get_model('content', 'QuestionPoolEntry')
+    Question = apps.get_model('content', 'Question')
+    existing = set(Question.objects.values_list('id', flat=True))
+    rows = []
+    for pool in QuestionPool.objects.all().iterator():
+        # A question belongs to one pool; stale arrays may still list it elsewhere
+        ids = [qid for qid in dict.fromkeys(pool.question_ids) if qid in existing]
+        existing.difference_update(ids)
+        rows.extend(QuestionPoolEntry(pool_id=pool.pk, position=i, question_id=qid) for i, qid in enumerate(ids))
+        pool.size = len(ids)
+        pool.save(update_fields=['size'])
+        if len(rows) >= 5000:
+            QuestionPoolEntry.objects.bulk_create(rows)
+            rows.clear()
+    QuestionPoolEntry.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_curriculumclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionpool',
+            name='size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='QuestionPoolEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('pool', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='content.questionpool')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pool_entry', to='content.question')),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(fields=('pool', 'position'), name='unique_pool_position'),
+                ],
+            },
+        ),
+        migrations.RunPython(copy_pool_members, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='questionpool',
+            name='question_ids',
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 
 from django.db import models
 
+from .storage import content_addressed_storage
+
 class Subject(models.Model):
     name = models.CharField(max_length=200)
     code = models.CharField(max_length=50, blank=True)
@@ -17,7 +19,7 @@ class Lesson(models.Model):
     title = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=1)
     content_text = models.TextField(blank=True)
-    content_file = models.FileField(upload_to='lessons/', null=True, blank=True)
+    content_file = models.FileField(upload_to='lessons/', storage=content_addressed_storage, null=True, blank=True)
     duration = models.PositiveIntegerField(default=5, help_text="minutes")
 
     class Meta:
@@ -66,3 +68,147 @@ class Choice(models.Model):
     def __str__(self):
         return self.text[:80]
         return self.title
+
+
+class QuestionPool(models.Model):
+    """
+    The Questions of one (lesson, qtype), numbered 0..size-1 by
+    QuestionPoolEntry.position and maintained on question writes
+    (content/signals.py) so papers can be sampled without scanning the bank.
+    """
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='question_pools')
+    qtype = models.CharField(max_length=10, choices=Question.QUESTION_TYPES)
+    size = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('lesson', 'qtype')
+
+    def __str__(self):
+        return f"{self.lesson_id}/{self.qtype}: {self.size} questions"
+
+
+class QuestionPoolEntry(models.Model):
+    """One Question's slot in its pool. Positions are dense: 0..pool.size-1."""
+    pool = models.ForeignKey(QuestionPool, on_delete=models.CASCADE, related_name='entries')
+    position = models.PositiveIntegerField()
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='pool_entry')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pool', 'position'], name='unique_pool_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.pool_id}[{self.position}] = {self.question_id}"
+
+
+class QuestionStats(models.Model):
+    """
+    Item statistics per question, accumulated incrementally from
+    accounts.AttemptAnswer by `manage.py compute_item_stats`.
+    The *_sum columns are running sufficient statistics; p_value and
+    point_biserial are derived from them after every run.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    responses = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)          # sum of attempt scores (0..1) of responders
+    score_sq_sum = models.FloatField(default=0.0)
+    correct_score_sum = models.FloatField(default=0.0)  # same, over correct responders only
+    choice_stats = models.JSONField(default=dict, blank=True)  # {choice_id|"none": {"count", "score_sum"}}
+    p_value = models.FloatField(null=True, blank=True)
+    point_biserial = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def distractors(self):
+        """Share of responders and their mean attempt score per choice."""
+        return {
+            key: {
+                "share": v["count"] / self.responses if self.responses else 0.0,
+                "mean_score": v["score_sum"] / v["count"] if v["count"] else None,
+            }
+            for key, v in self.choice_stats.items()
+        }
+
+
+class ItemStatsRun(models.Model):
+    """One compute_item_stats run; the latest row is the cursor for the next one."""
+    last_answer_id = models.BigIntegerField(default=0)
+    answers_processed = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_answer_id']
+
+
+class ContentBundle(models.Model):
+    """
+    Latest offline bundle built for a (board, class_level, language).
+    The file itself lives in CONTENT_BUNDLE_ROOT as <sha256>.tar(.gz/.br).
+    """
+    board = models.CharField(max_length=50)
+    class_level = models.CharField(max_length=50)
+    language = models.CharField(max_length=10)
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    gzip_size = models.BigIntegerField(null=True, blank=True)
+    brotli_size = models.BigIntegerField(null=True, blank=True)
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('board', 'class_level', 'language')
+
+    def __str__(self):
+        return f"{self.board} {self.class_level} [{self.language}] {self.sha256[:12]}"
+
+
+class MediaBlob(models.Model):
+    """
+    One stored file in the content-addressed media store (content/storage.py).
+    refs counts the model fields currently pointing at it.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} x{self.refs}"
+
+
+class CurriculumClosure(models.Model):
+    """
+    Closure table over Subject -> Lesson -> Topic/Quiz -> Question: one row per
+    (ancestor, descendant) pair including each node with itself at depth 0.
+    Maintained by content/hierarchy.py; see the helpers there for queries.
+    """
+    SUBJECT, LESSON, TOPIC, QUIZ, QUESTION = 1, 2, 3, 4, 5
+    NODE_TYPES = (
+        (SUBJECT, "Subject"),
+        (LESSON, "Lesson"),
+        (TOPIC, "Topic"),
+        (QUIZ, "Quiz"),
+        (QUESTION, "Question"),
+    )
+
+    ancestor_type = models.PositiveSmallIntegerField(choices=NODE_TYPES)
+    ancestor_id = models.BigIntegerField()
+    descendant_type = models.PositiveSmallIntegerField(choices=NODE_TYPES)
+    descendant_id = models.BigIntegerField()
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor_type", "ancestor_id", "descendant_type", "descendant_id"],
+                name="unique_curriculum_path",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["descendant_type", "descendant_id", "ancestor_type"], name="content_clo_descend_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_ancestor_type_display()} {self.ancestor_id} > {self.get_descendant_type_display()} {self.descendant_id} ({self.depth})"
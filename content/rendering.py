@@ -0,0 +1,139 @@
+"""
+Server-side rendering of Topic.content and Lesson.content_text to safe HTML.
+
+The source text is HTML-escaped first and only then given light markup, so
+the only tags in the output are the ones produced here:
+
+    # Heading / ## Subheading      -> <h5> / <h6>
+    - item                         -> <ul><li>
+    **bold**, *italic*, `code`     -> <strong>, <em>, <code>
+    blank line / newline           -> new <p> / <br>
+    $x^2 + y_1$, $$\frac{a}{b}$$   -> inline / display math
+
+Math is rendered without any client library: ^ and _ become <sup>/<sub>,
+\frac, \sqrt and common TeX symbols become their Unicode forms.
+
+Rendered HTML is cached per (kind, id, language, version); the version is
+bumped whenever the object is saved or deleted (content/signals.py).
+"""
+import html
+import re
+import uuid
+
+from django.core.cache import cache
+
+from .cache import get_or_add_version
+
+RENDER_VERSION_KEY = "render:{kind}:{obj_id}:version"
+RENDER_KEY = "render:{kind}:{obj_id}:{language}:{version}"
+RENDER_TIMEOUT = 60 * 60 * 24 * 7
+
+SOURCES = {"topic": ("Topic", "content"), "lesson": ("Lesson", "content_text")}
+
+TEX_SYMBOLS = {
+    "alpha": "α", "beta": "β", "gamma": "γ", "delta": "δ", "theta": "θ", "lambda": "λ",
+    "mu": "μ", "pi": "π", "sigma": "σ", "omega": "ω", "Delta": "Δ", "Sigma": "Σ", "Omega": "Ω",
+    "times": "×", "div": "÷", "pm": "±", "cdot": "·", "leq": "≤", "geq": "≥", "neq": "≠",
+    "approx": "≈", "infty": "∞", "degree": "°", "circ": "°", "rightarrow": "→", "leftarrow": "←",
+    "therefore": "∴", "angle": "∠", "triangle": "△", "perp": "⊥", "parallel": "∥",
+}
+
+BLOCK_MATH_RE = re.compile(r"\$\$(.+?)\$\$", re.S)
+INLINE_MATH_RE = re.compile(r"\$([^$\n]+?)\$")
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+ITALIC_RE = re.compile(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])")
+HEADING_RE = re.compile(r"^(#{1,2} .*)$", re.M)
+CODE_RE = re.compile(r"`([^`\n]+)`")
+FRAC_RE = re.compile(r"\\frac\{([^{}]*)\}\{([^{}]*)\}")
+SQRT_RE = re.compile(r"\\sqrt\{([^{}]*)\}")
+SCRIPT_RE = re.compile(r"([\^_])(\{([^{}]*)\}|([^\s{}\\]))")
+SYMBOL_RE = re.compile(r"\\([A-Za-z]+)")
+
+
+# ------------------ MARKUP ------------------
+def render_math(tex):
+    """Render an (already escaped) TeX fragment to HTML."""
+    tex = FRAC_RE.sub(r'<span class="frac"><sup>\1</sup>&frasl;<sub>\2</sub></span>', tex)
+    tex = SQRT_RE.sub(r'√<span style="text-decoration:overline">\1</span>', tex)
+    tex = SCRIPT_RE.sub(lambda m: ("<sup>%s</sup>" if m.group(1) == "^" else "<sub>%s</sub>") % (m.group(3) or m.group(4)), tex)
+    return SYMBOL_RE.sub(lambda m: TEX_SYMBOLS.get(m.group(1), m.group(0)), tex)
+
+
+def _inline(text):
+    # Code and math first so their contents are not treated as emphasis
+    stash = []
+
+    def keep(fragment):
+        stash.append(fragment)
+        return f"\x00{len(stash) - 1}\x00"
+
+    text = CODE_RE.sub(lambda m: keep(f"<code>{m.group(1)}</code>"), text)
+    text = INLINE_MATH_RE.sub(lambda m: keep(f'<span class="math">{render_math(m.group(1))}</span>'), text)
+    text = BOLD_RE.sub(r"<strong>\1</strong>", text)
+    text = ITALIC_RE.sub(r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: stash[int(m.group(1))], text)
+
+
+def render_text(source):
+    """Escape source and apply the light markup described in the module docstring."""
+    text = html.escape(source or "").replace("\r\n", "\n").replace("\x00", "")
+    text = BLOCK_MATH_RE.sub(lambda m: f'\n\n<div class="math">{render_math(m.group(1).strip())}</div>\n\n', text)
+    text = HEADING_RE.sub(r"\n\n\1\n\n", text)
+
+    blocks = []
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith('<div class="math">'):
+            blocks.append(block)
+            continue
+        lines = block.split("\n")
+        if all(line.lstrip().startswith("- ") for line in lines):
+            blocks.append("<ul>" + "".join(f"<li>{_inline(line.lstrip()[2:])}</li>" for line in lines) + "</ul>")
+        elif len(lines) == 1 and block.startswith("## "):
+            blocks.append(f"<h6>{_inline(block[3:])}</h6>")
+        elif len(lines) == 1 and block.startswith("# "):
+            blocks.append(f"<h5>{_inline(block[2:])}</h5>")
+        else:
+            blocks.append("<p>" + "<br>".join(_inline(line) for line in lines) + "</p>")
+    return "\n".join(blocks)
+
+
+# ------------------ CACHE ------------------
+def get_render_version(kind, obj_id):
+    return get_or_add_version(RENDER_VERSION_KEY.format(kind=kind, obj_id=obj_id))
+
+
+def bump_render_version(kind, obj_id):
+    cache.set(RENDER_VERSION_KEY.format(kind=kind, obj_id=obj_id), uuid.uuid4().hex, None)
+
+
+def bump_render_versions(kind, obj_ids):
+    # Dropping the token makes the next read mint a fresh one
+    cache.delete_many([RENDER_VERSION_KEY.format(kind=kind, obj_id=obj_id) for obj_id in obj_ids])
+
+
+def render_etag(kind, obj_id, language):
+    return f'"{kind}-{obj_id}-{language}-{get_render_version(kind, obj_id)}"'
+
+
+def get_rendered(kind, obj_id, language):
+    """
+    Return the rendered HTML for a topic/lesson, rendering and caching it on a miss.
+    Returns None when the object does not exist.
+    """
+    from django.apps import apps
+
+    version = get_render_version(kind, obj_id)
+    key = RENDER_KEY.format(kind=kind, obj_id=obj_id, language=language, version=version)
+    rendered = cache.get(key)
+    if rendered is None:
+        model_name, field = SOURCES[kind]
+        source = apps.get_model("content", model_name).objects.filter(pk=obj_id).values_list(field, flat=True).first()
+        if source is None:
+            return None
+        body = render_text(source)
+        rendered = f'<div class="rendered" lang="{html.escape(language)}">{body}</div>' if body else ""
+        cache.set(key, rendered, RENDER_TIMEOUT)
+    return rendered
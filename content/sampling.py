@@ -0,0 +1,130 @@
+"""
+Random question sampling from large banks.
+
+Each (lesson, qtype) QuestionPool numbers its questions 0..size-1 through
+indexed QuestionPoolEntry rows. Drawing N questions is
+random.Random(seed).sample() over range(size) plus one query for the rows at
+the chosen positions, so the cost is O(N) in the sample size and independent
+of how many questions the bank holds. ORDER BY RANDOM() is never used.
+
+Adding a question appends it at position size; removing one moves the last
+entry into its slot. Either way a write touches at most two entry rows and
+the pool's size, instead of rewriting the whole membership.
+
+Seeds are derived from (paper, student), so a student who reloads a paper
+gets the same questions while classmates get different ones.
+"""
+import random
+
+from django.db import transaction
+from django.db.models import F, Prefetch, Q
+
+from .models import Question, Choice, QuestionPool, QuestionPoolEntry
+
+
+# ------------------ POOL MAINTENANCE ------------------
+def add_to_pool(lesson_id, qtype, question_id):
+    with transaction.atomic():
+        pool, _ = QuestionPool.objects.select_for_update().get_or_create(lesson_id=lesson_id, qtype=qtype)
+        if QuestionPoolEntry.objects.filter(question_id=question_id).exists():
+            return
+        QuestionPoolEntry.objects.create(pool=pool, position=pool.size, question_id=question_id)
+        pool.size += 1
+        pool.save(update_fields=["size", "updated_at"])
+
+
+def remove_from_pool(question_id):
+    """Take a question out of whichever pool holds it; the pool's last entry fills the gap."""
+    with transaction.atomic():
+        pool_id = QuestionPoolEntry.objects.filter(question_id=question_id).values_list("pool_id", flat=True).first()
+        if pool_id is None:
+            return
+        pool = QuestionPool.objects.select_for_update().get(pk=pool_id)
+        # Re-read under the pool lock: a concurrent removal may have moved the entry
+        position = QuestionPoolEntry.objects.filter(question_id=question_id, pool=pool).values_list("position", flat=True).first()
+        if position is None:
+            return
+        last = pool.size - 1
+        QuestionPoolEntry.objects.filter(question_id=question_id).delete()
+        if position != last:
+            QuestionPoolEntry.objects.filter(pool=pool, position=last).update(position=position)
+        pool.size = last
+        pool.save(update_fields=["size", "updated_at"])
+
+
+def rebuild_pools(lesson_ids=None):
+    """
+    Recompute pools from the Question table, for lesson_ids or for everything.
+    """
+    questions = Question.objects.order_by("pk")
+    pools = QuestionPool.objects.all()
+    if lesson_ids is not None:
+        lesson_ids = {lid for lid in lesson_ids if lid is not None}
+        questions = questions.filter(quiz__lesson_id__in=lesson_ids)
+        pools = pools.filter(lesson_id__in=lesson_ids)
+
+    grouped = {}
+    for qid, lesson_id, qtype in questions.values_list("id", "quiz__lesson_id", "qtype").iterator(chunk_size=5000):
+        grouped.setdefault((lesson_id, qtype), []).append(qid)
+
+    with transaction.atomic():
+        pools.delete()
+        QuestionPool.objects.bulk_create(
+            [QuestionPool(lesson_id=lesson_id, qtype=qtype, size=len(ids)) for (lesson_id, qtype), ids in grouped.items()],
+            batch_size=500,
+        )
+        pool_ids = {
+            (lesson_id, qtype): pk
+            for pk, lesson_id, qtype in QuestionPool.objects.filter(
+                lesson_id__in={lesson_id for lesson_id, _ in grouped}
+            ).values_list("id", "lesson_id", "qtype")
+        }
+        QuestionPoolEntry.objects.bulk_create(
+            (
+                QuestionPoolEntry(pool_id=pool_ids[key], position=position, question_id=qid)
+                for key, ids in grouped.items()
+                for position, qid in enumerate(ids)
+            ),
+            batch_size=1000,
+        )
+    return len(grouped)
+
+
+# ------------------ SAMPLING ------------------
+def draw(size, count, seed):
+    """Reproducibly pick up to count distinct positions out of range(size)."""
+    count = max(0, min(count, size))
+    return random.Random(seed).sample(range(size), count)
+
+
+def sample_paper(sections, paper, student_id):
+    """
+    sections: [{lesson_id, qtype, count}, ...]
+    Returns the drawn Question objects (choices prefetched) per section, in draw order.
+    Costs one query for the pools plus two for the chosen questions and their choices.
+    """
+    pools = {
+        (lesson_id, qtype): (pk, size)
+        for pk, lesson_id, qtype, size in QuestionPool.objects.filter(
+            lesson_id__in={s["lesson_id"] for s in sections}
+        ).values_list("id", "lesson_id", "qtype", "size")
+    }
+
+    drawn = []
+    for index, section in enumerate(sections):
+        pool_id, size = pools.get((section["lesson_id"], section["qtype"]), (None, 0))
+        drawn.append((pool_id, draw(size, section["count"], f"{paper}:{student_id}:{index}")))
+
+    wanted = Q(pk__in=[])
+    for pool_id, positions in drawn:
+        if positions:
+            wanted |= Q(pool_entry__pool_id=pool_id, pool_entry__position__in=positions)
+    by_slot = {
+        (q.slot_pool, q.slot): q
+        for q in Question.objects.filter(wanted).annotate(
+            slot_pool=F("pool_entry__pool_id"), slot=F("pool_entry__position")
+        ).prefetch_related(
+            Prefetch("choices", queryset=Choice.objects.order_by("pk").only("id", "text", "question_id"))
+        )
+    }
+    return [[by_slot[(pool_id, p)] for p in positions if (pool_id, p) in by_slot] for pool_id, positions in drawn]
@@ -0,0 +1,213 @@
+"""
+Full-text search over Lesson.content_text, Topic.content and Question.text.
+
+The backend is chosen by settings.CONTENT_SEARCH_BACKEND (a dotted path) so a
+deployment on another database can plug in its own. Without the setting,
+SQLite databases get FTS5 and anything else gets NullSearchBackend, because
+the FTS5 table only exists on SQLite. Rows are kept in sync by signals in content/signals.py and can be
+rebuilt with manage.py rebuild_search_index.
+
+FTS5 notes:
+  * unicode61 treats only L*, N* and Co as token characters by default, so
+    Devanagari/Odia vowel signs and viramas (Mn/Mc) would split words in the
+    middle. The tokenizer adds M* and keeps diacritics so matras are not
+    stripped either.
+  * Board and class are folded into one indexed "scope" token, so restricting
+    results to a student's syllabus is part of the MATCH and ORDER BY rank
+    LIMIT n stays on the FTS index instead of filtering every hit afterwards.
+  * rank is configured as bm25 with titles weighted above bodies.
+"""
+import hashlib
+import html
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from .models import Lesson, Topic, Question
+
+TABLE = "content_search"
+TOKENIZER = "unicode61 remove_diacritics 0 categories 'L* N* Co M*'"
+# Column order matters for bm25() weights and snippet() column numbers
+COLUMNS = ("kind", "object_id", "subject_id", "lesson_id", "scope", "title", "body")
+RANK = "bm25(0, 0, 0, 0, 0, 10.0, 1.0)"
+BODY_COLUMN = 6
+
+KIND_CODES = {"lesson": 1, "topic": 2, "question": 3}
+MAX_TERMS = 8
+MIN_PREFIX = 3
+HIT_START, HIT_END = "\x02", "\x03"
+
+
+def scope_token(board, class_level):
+    """A single alphanumeric token standing for (board, class_level)."""
+    return "s" + hashlib.sha1(f"{board}|{class_level}".encode("utf-8")).hexdigest()[:16]
+
+
+def match_expression(query, scope):
+    """
+    Turn free text into an FTS5 expression. Every term is quoted, so user
+    input can never inject FTS5 syntax. The last term is a prefix match when
+    it is long enough to be selective (for search-as-you-type).
+    Returns None when the query has no terms.
+    """
+    terms = query.split()[:MAX_TERMS]
+    if not terms:
+        return None
+    quoted = ['"%s"' % t.replace('"', '""') for t in terms]
+    if len(terms[-1]) >= MIN_PREFIX:
+        quoted[-1] += "*"
+    return 'scope : "%s" AND (%s)' % (scope, " ".join(quoted))
+
+
+def _documents(kind, ids=None):
+    """Yield index rows (rowid, kind, object_id, subject_id, lesson_id, scope, title, body)."""
+    code = KIND_CODES[kind]
+    if kind == "lesson":
+        qs = Lesson.objects.values_list("id", "subject_id", "id", "subject__board", "subject__class_level", "title", "content_text")
+    elif kind == "topic":
+        qs = Topic.objects.values_list(
+            "id", "lesson__subject_id", "lesson_id", "lesson__subject__board", "lesson__subject__class_level", "title", "content"
+        )
+    else:
+        qs = Question.objects.values_list(
+            "id", "quiz__lesson__subject_id", "quiz__lesson_id",
+            "quiz__lesson__subject__board", "quiz__lesson__subject__class_level", "quiz__title", "text",
+        )
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    for pk, subject_id, lesson_id, board, class_level, title, body in qs.order_by("pk").iterator(chunk_size=2000):
+        yield (pk * 4 + code, kind, pk, subject_id, lesson_id, scope_token(board, class_level), title or "", body or "")
+
+
+class SearchBackend:
+    """Interface for content search backends."""
+
+    def index(self, kind, ids):
+        raise NotImplementedError
+
+    def remove(self, kind, ids):
+        raise NotImplementedError
+
+    def rescope_subject(self, subject_id, board, class_level):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, board, class_level, limit=20):
+        """Return [{kind, id, subject_id, lesson_id, title, snippet}] best match first."""
+        raise NotImplementedError
+
+
+class NullSearchBackend(SearchBackend):
+    """Indexes nothing and finds nothing; the default off SQLite."""
+
+    def index(self, kind, ids):
+        pass
+
+    def remove(self, kind, ids):
+        pass
+
+    def rescope_subject(self, subject_id, board, class_level):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, query, board, class_level, limit=20):
+        return []
+
+
+class SQLiteFTSBackend(SearchBackend):
+    def __init__(self, using="default"):
+        self.using = using
+
+    def _cursor(self):
+        return connections[self.using].cursor()
+
+    def create(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        unindexed = ", ".join(f"{c} UNINDEXED" for c in COLUMNS[:4])
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5({unindexed}, scope, title, body, tokenize=\"{TOKENIZER}\")"
+        )
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('rank', %s)", [RANK])
+
+    def _insert(self, cursor, rows):
+        placeholders = ", ".join(["%s"] * (len(COLUMNS) + 1))
+        cursor.executemany(f"INSERT INTO {TABLE}(rowid, {', '.join(COLUMNS)}) VALUES ({placeholders})", rows)
+
+    def index(self, kind, ids):
+        rows = list(_documents(kind, ids))
+        code = KIND_CODES[kind]
+        with transaction.atomic(using=self.using), self._cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(pk * 4 + code,) for pk in ids])
+            self._insert(cursor, rows)
+
+    def remove(self, kind, ids):
+        code = KIND_CODES[kind]
+        with self._cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(pk * 4 + code,) for pk in ids])
+
+    def rescope_subject(self, subject_id, board, class_level):
+        scope = scope_token(board, class_level)
+        with self._cursor() as cursor:
+            cursor.execute(f"UPDATE {TABLE} SET scope = %s WHERE subject_id = %s AND scope != %s", [scope, subject_id, scope])
+
+    def rebuild(self):
+        """Drop and refill the index. Returns the number of rows indexed."""
+        count = 0
+        with transaction.atomic(using=self.using), self._cursor() as cursor:
+            self.create(cursor)
+            for kind in KIND_CODES:
+                batch = []
+                for row in _documents(kind):
+                    batch.append(row)
+                    if len(batch) >= 2000:
+                        self._insert(cursor, batch)
+                        count += len(batch)
+                        batch = []
+                self._insert(cursor, batch)
+                count += len(batch)
+            cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        return count
+
+    def search(self, query, board, class_level, limit=20):
+        expression = match_expression(query, scope_token(board, class_level))
+        if expression is None:
+            return []
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"SELECT kind, object_id, subject_id, lesson_id, title, "
+                f"snippet({TABLE}, {BODY_COLUMN}, %s, %s, '…', 16) "
+                f"FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [HIT_START, HIT_END, expression, limit],
+            )
+            rows = cursor.fetchall()
+        return [
+            {
+                "kind": kind,
+                "id": object_id,
+                "subject_id": subject_id,
+                "lesson_id": lesson_id,
+                "title": title,
+                "snippet": highlight(snippet),
+            }
+            for kind, object_id, subject_id, lesson_id, title, snippet in rows
+        ]
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the hit markers into <mark> tags."""
+    return html.escape(snippet).replace(HIT_START, "<mark>").replace(HIT_END, "</mark>")
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, "CONTENT_SEARCH_BACKEND", None)
+    if path is None:
+        sqlite = connections["default"].vendor == "sqlite"
+        path = "content.search.SQLiteFTSBackend" if sqlite else "content.search.NullSearchBackend"
+    return import_string(path)()
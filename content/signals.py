@@ -0,0 +1,194 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_content_version, bump_quiz_version
+from .hierarchy import PARENTS, descendants, node_of, parent_of, add_node, move_node, remove_node
+from .models import Subject, Lesson, Topic, Quiz, Question, Choice, CurriculumClosure
+from .rendering import bump_render_version
+from .sampling import add_to_pool, remove_from_pool, rebuild_pools
+from .search import get_search_backend
+from .storage import track_blob_field
+
+
+# ------------------ CONTENT TREE VERSION ------------------
+@receiver([post_save, post_delete], sender=Subject)
+@receiver([post_save, post_delete], sender=Lesson)
+@receiver([post_save, post_delete], sender=Topic)
+@receiver([post_save, post_delete], sender=Quiz)
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=Choice)
+def invalidate_content_tree(sender, instance, **kwargs):
+    bump_content_version()
+
+
+# ------------------ RENDERED HTML CACHE ------------------
+@receiver([post_save, post_delete], sender=Topic)
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_rendered(sender, instance, **kwargs):
+    bump_render_version(sender._meta.model_name, instance.pk)
+
+
+# ------------------ QUIZ PAYLOAD CACHE INVALIDATION ------------------
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz(sender, instance, **kwargs):
+    bump_quiz_version(instance.pk)
+
+
+def _question_quiz_id(question_id):
+    return Question.objects.filter(pk=question_id).values_list("quiz_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Question)
+def remember_question_quiz(sender, instance, raw=False, **kwargs):
+    instance._previous_quiz_id = _question_quiz_id(instance.pk) if instance.pk and not raw else None
+
+
+@receiver(pre_save, sender=Choice)
+def remember_choice_quiz(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = Choice.objects.filter(pk=instance.pk).values_list("question__quiz_id", flat=True).first()
+    instance._previous_quiz_id = previous
+
+
+def _bump_quizzes(*quiz_ids):
+    # A question or choice moved to another parent leaves stale payloads on both quizzes
+    for quiz_id in {q for q in quiz_ids if q is not None}:
+        bump_quiz_version(quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_quiz(sender, instance, **kwargs):
+    _bump_quizzes(getattr(instance, "_previous_quiz_id", None), instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def invalidate_choice_quiz(sender, instance, **kwargs):
+    _bump_quizzes(getattr(instance, "_previous_quiz_id", None), _question_quiz_id(instance.question_id))
+
+
+# ------------------ QUESTION POOLS (SAMPLING) ------------------
+def _quiz_lesson_id(quiz_id):
+    return Quiz.objects.filter(pk=quiz_id).values_list("lesson_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Question)
+def remember_question_pool(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = Question.objects.filter(pk=instance.pk).values_list("quiz__lesson_id", "qtype").first()
+    instance._previous_pool = previous
+
+
+@receiver(post_save, sender=Question)
+def sync_question_pool(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = (_quiz_lesson_id(instance.quiz_id), instance.qtype)
+    previous = getattr(instance, "_previous_pool", None)
+    if previous == current:
+        return
+    if previous is not None:
+        remove_from_pool(instance.pk)
+    add_to_pool(current[0], current[1], instance.pk)
+
+
+@receiver(pre_delete, sender=Question)
+def drop_question_from_pool(sender, instance, **kwargs):
+    # Before the delete cascades to the QuestionPoolEntry, so its slot can be refilled
+    remove_from_pool(instance.pk)
+
+
+@receiver(pre_save, sender=Quiz)
+def remember_quiz_lesson(sender, instance, raw=False, **kwargs):
+    instance._previous_lesson_id = _quiz_lesson_id(instance.pk) if instance.pk and not raw else None
+
+
+@receiver(post_save, sender=Quiz)
+def move_quiz_pools(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_lesson_id", None)
+    if not created and previous != instance.lesson_id:
+        rebuild_pools([previous, instance.lesson_id])
+
+
+# ------------------ SEARCH INDEX ------------------
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Question)
+def index_for_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Question)
+def remove_from_search(sender, instance, **kwargs):
+    get_search_backend().remove(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_save, sender=Quiz)
+def reindex_quiz_questions(sender, instance, created, raw=False, **kwargs):
+    # Questions are indexed under their quiz title
+    if not created and not raw:
+        get_search_backend().index("question", list(instance.questions.values_list("pk", flat=True)))
+
+
+@receiver(post_save, sender=Lesson)
+def reindex_lesson_descendants(sender, instance, created, raw=False, **kwargs):
+    # Topics and questions are indexed under their lesson's subject and board/class;
+    # _previous_parent_id comes from remember_parent() below
+    if created or raw or getattr(instance, "_previous_parent_id", None) == instance.subject_id:
+        return
+    backend = get_search_backend()
+    backend.index("topic", list(descendants(CurriculumClosure.LESSON, instance.pk, CurriculumClosure.TOPIC)))
+    backend.index("question", list(descendants(CurriculumClosure.LESSON, instance.pk, CurriculumClosure.QUESTION)))
+
+
+@receiver(post_save, sender=Subject)
+def rescope_subject_search(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        get_search_backend().rescope_subject(instance.pk, instance.board, instance.class_level)
+
+
+# ------------------ MEDIA BLOB REFERENCES ------------------
+track_blob_field(Lesson, "content_file")
+
+
+# ------------------ CURRICULUM CLOSURE TABLE ------------------
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Topic)
+@receiver(pre_save, sender=Quiz)
+@receiver(pre_save, sender=Question)
+def remember_parent(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        node_type, _ = node_of(instance)
+        previous = sender.objects.filter(pk=instance.pk).values_list(PARENTS[node_type][1], flat=True).first()
+    instance._previous_parent_id = previous
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Question)
+def sync_closure(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    parent = parent_of(instance)
+    if created:
+        add_node(*node_of(instance), parent)
+    elif parent is not None and getattr(instance, "_previous_parent_id", None) != parent[1]:
+        move_node(*node_of(instance), parent)
+
+
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_delete, sender=Question)
+def drop_closure(sender, instance, **kwargs):
+    remove_node(*node_of(instance))
@@ -0,0 +1,184 @@
+"""
+Content-addressed, deduplicated media storage.
+
+Uploads are hashed (SHA-256) and stored once at cas/ab/cd/<sha256><ext>, so
+the same worksheet uploaded to twenty lessons occupies disk once. MediaBlob
+counts how many model fields point at each blob; the file is deleted when
+the last reference goes away. Because a name never changes content, the hash
+doubles as a strong ETag and the files can be cached as immutable.
+
+Fields opt in with storage=content_addressed_storage and are registered with
+track_blob_field() so saves and deletes keep the reference counts right.
+The reference for a new upload is taken by the storage itself, under a row
+lock on its MediaBlob, so a concurrent release cannot delete the file between
+the upload and the model row being written. A reference taken for an upload
+whose model save then fails is left over until `manage.py dedupe_media`
+recounts.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+
+CAS_PREFIX = "cas/"
+MAX_EXT_LENGTH = 10
+
+
+def blob_name(sha256, original_name=""):
+    ext = os.path.splitext(original_name)[1].lower()
+    if len(ext) > MAX_EXT_LENGTH:
+        ext = ""
+    return f"{CAS_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def blob_hash(name):
+    """Return the SHA-256 a CAS name was derived from, or None for other names."""
+    if not name or not name.startswith(CAS_PREFIX):
+        return None
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage under MEDIA_ROOT that names files by the hash of their bytes."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            from django.core.files import File
+            content = File(content, name)
+
+        h = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            h.update(chunk)
+            size += len(chunk)
+        sha = h.hexdigest()
+        name = blob_name(sha, name)
+
+        from .models import MediaBlob
+        with transaction.atomic():
+            # Locked so delete_if_unreferenced() cannot remove the file underneath us
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                sha256=sha, defaults={"name": name, "size": size, "refs": 1}
+            )
+            if not created:
+                MediaBlob.objects.filter(pk=sha).update(refs=F("refs") + 1)
+            if not self.exists(name):
+                self._write(name, content)
+        _taken_refs()[name] += 1
+        return name
+
+    def _write(self, name, content):
+        # Write to a temp file and rename: concurrent uploads of the same
+        # bytes race harmlessly to the same final path.
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp, self.file_permissions_mode)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+
+_storage = None
+
+
+def content_addressed_storage():
+    """Callable used as FileField(storage=...) so migrations reference it by path."""
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
+
+
+# ------------------ REFERENCE COUNTS ------------------
+_local = threading.local()
+
+
+def _taken_refs():
+    """Names whose reference save() already took in this thread, for track_blob_field's post_save."""
+    if not hasattr(_local, "refs"):
+        _local.refs = Counter()
+    return _local.refs
+
+
+def _consume_ref(name):
+    refs = _taken_refs()
+    if refs[name] > 0:
+        refs[name] -= 1
+        return True
+    return False
+
+
+def retain(name):
+    sha = blob_hash(name)
+    if sha:
+        from .models import MediaBlob
+        MediaBlob.objects.filter(sha256=sha).update(refs=F("refs") + 1)
+
+
+def release(name):
+    sha = blob_hash(name)
+    if not sha:
+        return
+    from .models import MediaBlob
+    MediaBlob.objects.filter(sha256=sha, refs__gt=0).update(refs=F("refs") - 1)
+    transaction.on_commit(lambda: delete_if_unreferenced(sha))
+
+
+def delete_if_unreferenced(sha):
+    from .models import MediaBlob
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(sha256=sha, refs=0).first()
+        if blob is None:
+            return False
+        content_addressed_storage().delete(blob.name)
+        blob.delete()
+    return True
+
+
+def track_blob_field(model, field_name):
+    """Keep MediaBlob.refs in step with model.<field_name> across saves and deletes."""
+    uid = f"{model._meta.label}.{field_name}"
+
+    def remember(sender, instance, raw=False, **kwargs):
+        previous = None
+        if instance.pk and not raw:
+            previous = sender._default_manager.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        instance.__dict__[f"_previous_{field_name}"] = previous
+
+    def update(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        previous = instance.__dict__.pop(f"_previous_{field_name}", None) or ""
+        current = getattr(instance, field_name).name or ""
+        taken = current and _consume_ref(current)  # a fresh upload: storage took its ref
+        if previous != current:
+            if not taken:
+                retain(current)
+            release(previous)
+        elif taken:
+            # Identical bytes re-uploaded to the same row, which already held a ref
+            release(current)
+
+    def drop(sender, instance, **kwargs):
+        release(getattr(instance, field_name).name or "")
+
+    pre_save.connect(remember, sender=model, weak=False, dispatch_uid=f"{uid}.remember")
+    post_save.connect(update, sender=model, weak=False, dispatch_uid=f"{uid}.update")
+    post_delete.connect(drop, sender=model, weak=False, dispatch_uid=f"{uid}.drop")
@@ -0,0 +1,131 @@
+"""
+File responses with HTTP Range and conditional-request support.
+
+Whole files and open-ended ranges ("bytes=N-", the usual resume request) are
+returned as FileResponse, so the WSGI server's file_wrapper can sendfile()
+them without Python reading the data. Bounded ranges are streamed in chunks.
+Only single ranges are honoured; multi-range requests get the full file.
+"""
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single-range header, None when the
+    header should be ignored, or False when it is unsatisfiable.
+    """
+    m = RANGE_RE.match(header.strip()) if header else None
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if not m.group(1):
+        # Suffix range: the last N bytes
+        length = int(m.group(2))
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(m.group(1))
+    end = int(m.group(2)) if m.group(2) else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def accepted_encodings(header, available):
+    """
+    Return the codings from `available` the Accept-Encoding header allows, best
+    first: by q-value, then in the order given. Codings with q=0 (explicitly or
+    through "*;q=0") are refused; "*" covers codings not listed by name.
+    """
+    weights = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    ranked = []
+    for index, coding in enumerate(available):
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > 0:
+            ranked.append((-q, index, coding))
+    return [coding for _, _, coding in sorted(ranked)]
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return etag is not None and etag in parse_etags(value)
+    return last_modified is not None and value == http_date(last_modified)
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path, content_type=None, etag=None, cache_control=None, headers=None):
+    """
+    Serve the file at path honouring If-None-Match/If-Modified-Since,
+    Range and If-Range. etag should be a quoted strong ETag when available.
+    """
+    stat = os.stat(path)
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    content_type = content_type or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        if request.method == "GET" and _if_range_matches(request, etag, last_modified):
+            byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range is None or byte_range == (0, size - 1):
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+        else:
+            start, end = byte_range
+            if end == size - 1:
+                fh = open(path, "rb")
+                fh.seek(start)
+                # FileResponse measures Content-Length from the current offset
+                response = FileResponse(fh, content_type=content_type, status=206)
+            else:
+                response = StreamingHttpResponse(_read_range(path, start, end - start + 1), content_type=content_type, status=206)
+                response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["Last-Modified"] = http_date(last_modified)
+    if etag:
+        response["ETag"] = etag
+    if cache_control:
+        response["Cache-Control"] = cache_control
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
@@ -1,3 +1,435 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import AttemptAnswer, QuizAttempt, User
+
+from .cache import get_quiz_version
+from .hierarchy import (
+    ancestors_of, descendant_counts, descendants, descendants_in_class, rebuild_closure,
+)
+from .importer import import_file
+from .models import Choice, CurriculumClosure as C, ItemStatsRun, Lesson, Question, QuestionStats, Quiz, Subject, Topic
+from .search import SQLiteFTSBackend
+from .streaming import accepted_encodings, parse_range
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# ------------------ CURRICULUM CLOSURE TABLE ------------------
+class CurriculumClosureTests(TestCase):
+    def setUp(self):
+        self.science = Subject.objects.create(name="Science", board="CBSE", class_level="9")
+        self.maths = Subject.objects.create(name="Maths", board="CBSE", class_level="10")
+        self.lesson = Lesson.objects.create(subject=self.science, title="Electricity")
+        self.topic = Topic.objects.create(lesson=self.lesson, title="Charge")
+        self.quiz = Quiz.objects.create(lesson=self.lesson, title="Quiz 1")
+        self.questions = [Question.objects.create(quiz=self.quiz, text=f"Q{i}") for i in range(3)]
+
+    def question_ids(self, subject):
+        return sorted(descendants(C.SUBJECT, subject.pk, C.QUESTION))
+
+    def test_descendants_and_ancestors(self):
+        self.assertEqual(self.question_ids(self.science), sorted(q.pk for q in self.questions))
+        self.assertEqual(list(descendants_in_class("CBSE", "9", C.TOPIC)), [self.topic.pk])
+        self.assertEqual(list(descendants_in_class("CBSE", "10", C.TOPIC)), [])
+        chain = ancestors_of(C.QUESTION, [self.questions[0].pk])[self.questions[0].pk]
+        self.assertEqual(chain, {
+            C.QUESTION: self.questions[0].pk, C.QUIZ: self.quiz.pk, C.LESSON: self.lesson.pk, C.SUBJECT: self.science.pk,
+        })
+        self.assertEqual(descendant_counts(C.SUBJECT, C.LESSON), {self.science.pk: 1})
+
+    def test_moving_a_lesson_moves_its_subtree(self):
+        self.lesson.subject = self.maths
+        self.lesson.save()
+
+        self.assertEqual(self.question_ids(self.science), [])
+        self.assertEqual(self.question_ids(self.maths), sorted(q.pk for q in self.questions))
+        self.assertEqual(ancestors_of(C.TOPIC, [self.topic.pk])[self.topic.pk][C.SUBJECT], self.maths.pk)
+        self.assertEqual(descendant_counts(C.SUBJECT, C.LESSON), {self.maths.pk: 1})
+
+    def test_moving_a_question_between_quizzes(self):
+        other_lesson = Lesson.objects.create(subject=self.maths, title="Algebra")
+        other_quiz = Quiz.objects.create(lesson=other_lesson, title="Quiz 2")
+        question = self.questions[0]
+        question.quiz = other_quiz
+        question.save()
+
+        self.assertEqual(list(descendants(C.QUIZ, other_quiz.pk, C.QUESTION)), [question.pk])
+        self.assertNotIn(question.pk, descendants(C.LESSON, self.lesson.pk, C.QUESTION))
+        self.assertEqual(ancestors_of(C.QUESTION, [question.pk])[question.pk][C.SUBJECT], self.maths.pk)
+
+    def test_deleting_removes_the_subtree(self):
+        self.quiz.delete()
+        self.assertEqual(self.question_ids(self.science), [])
+        self.assertFalse(C.objects.filter(descendant_type=C.QUESTION).exists())
+        self.assertFalse(C.objects.filter(descendant_type=C.QUIZ).exists())
+
+        self.science.delete()
+        self.assertFalse(C.objects.filter(ancestor_type=C.SUBJECT, ancestor_id=self.science.pk).exists())
+        self.assertEqual(ancestors_of(C.TOPIC, [self.topic.pk]), {})
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        self.lesson.subject = self.maths
+        self.lesson.save()
+        fields = ("ancestor_type", "ancestor_id", "descendant_type", "descendant_id", "depth")
+        maintained = sorted(C.objects.values_list(*fields))
+        rebuild_closure()
+        self.assertEqual(sorted(C.objects.values_list(*fields)), maintained)
+
+
+# ------------------ SEARCH INDEX ------------------
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.backend = SQLiteFTSBackend()
+        self.science = Subject.objects.create(name="Science", board="CBSE", class_level="9")
+        self.physics = Subject.objects.create(name="Physics", board="CBSE", class_level="10")
+        self.lesson = Lesson.objects.create(subject=self.science, title="Electricity")
+        self.topic = Topic.objects.create(lesson=self.lesson, title="Charge", content="Coulomb's law")
+        quiz = Quiz.objects.create(lesson=self.lesson, title="Quiz 1")
+        self.question = Question.objects.create(quiz=quiz, text="State Coulomb's law")
+
+    def hits(self, class_level):
+        return sorted((h["kind"], h["id"], h["subject_id"]) for h in self.backend.search("coulomb", "CBSE", class_level))
+
+    def test_moving_a_lesson_reindexes_its_subtree(self):
+        self.assertEqual(self.hits("9"), [("question", self.question.pk, self.science.pk), ("topic", self.topic.pk, self.science.pk)])
+        self.lesson.subject = self.physics
+        self.lesson.save()
+
+        self.assertEqual(self.hits("9"), [])
+        self.assertEqual(self.hits("10"), [("question", self.question.pk, self.physics.pk), ("topic", self.topic.pk, self.physics.pk)])
+
+
+# ------------------ QUIZ PAYLOAD CACHE INVALIDATION ------------------
+class QuizVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        subject = Subject.objects.create(name="Science", board="CBSE", class_level="9")
+        lesson = Lesson.objects.create(subject=subject, title="Electricity")
+        self.old, self.new = (Quiz.objects.create(lesson=lesson, title=t) for t in ("Quiz 1", "Quiz 2"))
+        self.question = Question.objects.create(quiz=self.old, text="Unit of charge?")
+        self.choice = Choice.objects.create(question=self.question, text="Coulomb", is_correct=True)
+
+    def versions(self):
+        return get_quiz_version(self.old.pk), get_quiz_version(self.new.pk)
+
+    def assertBothBumped(self, before):
+        after = self.versions()
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_moving_a_question_bumps_both_quizzes(self):
+        before = self.versions()
+        self.question.quiz = self.new
+        self.question.save()
+        self.assertBothBumped(before)
+
+    def test_moving_a_choice_bumps_both_quizzes(self):
+        other = Question.objects.create(quiz=self.new, text="Unit of current?")
+        before = self.versions()
+        self.choice.question = other
+        self.choice.save()
+        self.assertBothBumped(before)
+
+
+# ------------------ RANDOM PAPERS ------------------
+class SamplePaperTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user(username="student", email="student@example.com", password=None))
+        subject = Subject.objects.create(name="Science", board="CBSE", class_level="9")
+        self.lesson = Lesson.objects.create(subject=subject, title="Electricity")
+        quiz = Quiz.objects.create(lesson=self.lesson, title="Quiz 1")
+        for i in range(3):
+            Question.objects.create(quiz=quiz, text=f"Q{i}")
+
+    def sample(self, *counts):
+        body = {"paper": "unit-1", "sections": [{"lesson_id": self.lesson.pk, "count": c} for c in counts]}
+        return self.client.post("/content/api/paper/sample/", json.dumps(body), content_type="application/json")
+
+    def test_draws_from_the_pool(self):
+        response = self.sample(2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["sections"][0]["questions"]), 2)
+
+    def test_negative_count_is_rejected(self):
+        # A negative section must not offset the total limit
+        self.assertEqual(self.sample(-1000, 1000).status_code, 400)
+        self.assertEqual(self.sample(-1).status_code, 400)
+
+
+# ------------------ ITEM STATISTICS ------------------
+@unittest.skipIf(numpy is None, "item statistics need NumPy")
+class ItemStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        subject = Subject.objects.create(name="Science", board="CBSE", class_level="9")
+        quiz = Quiz.objects.create(lesson=Lesson.objects.create(subject=subject, title="Electricity"), title="Quiz 1")
+        self.quiz = quiz
+        self.q1, self.q2 = (Question.objects.create(quiz=quiz, text=t) for t in ("Q1", "Q2"))
+        self.right, self.wrong = (Choice.objects.create(question=self.q1, text=t, is_correct=t == "A") for t in "AB")
+
+    def attempt(self, q1_choice, q2_correct):
+        q1_correct = q1_choice == self.right
+        attempt = QuizAttempt.objects.create(
+            uid=uuid.uuid4(), user=self.user, quiz=self.quiz,
+            score=int(q1_correct) + int(q2_correct), total=2, submitted_at=timezone.now(),
+        )
+        AttemptAnswer.objects.create(attempt=attempt, question=self.q1, choice=q1_choice, correct=q1_correct)
+        AttemptAnswer.objects.create(attempt=attempt, question=self.q2, correct=q2_correct)
+
+    def stats(self):
+        fields = ("question_id", "responses", "correct_count", "score_sum", "score_sq_sum", "correct_score_sum", "choice_stats")
+        return sorted(QuestionStats.objects.values_list(*fields))
+
+    def test_incremental_runs_match_a_full_run(self):
+        from .item_stats import run
+
+        self.attempt(self.right, False)
+        self.attempt(self.wrong, False)
+        self.attempt(self.right, True)
+        first = run(chunk_size=2)
+        self.assertEqual(first.answers_processed, 6)
+        self.assertAlmostEqual(QuestionStats.objects.get(pk=self.q1.pk).p_value, 2 / 3)
+
+        self.attempt(self.wrong, True)
+        self.attempt(None, False)
+        second = run(chunk_size=2)
+        # Only the answers after the cursor are read
+        self.assertEqual(second.answers_processed, 4)
+        self.assertEqual(ItemStatsRun.objects.first(), second)
+        self.assertEqual(run().answers_processed, 0)
+
+        q1 = QuestionStats.objects.get(pk=self.q1.pk)
+        self.assertEqual((q1.responses, q1.correct_count), (5, 2))
+        self.assertEqual(
+            {key: c["count"] for key, c in q1.choice_stats.items()},
+            {str(self.right.pk): 2, str(self.wrong.pk): 2, "none": 1},
+        )
+        self.assertIsNotNone(q1.point_biserial)
+
+        incremental = self.stats()
+        run(full=True)
+        for got, want in zip(self.stats(), incremental):
+            self.assertEqual(got[:3], want[:3])
+            for a, b in zip(got[3:6], want[3:6]):
+                self.assertAlmostEqual(a, b)
+            self.assertEqual(got[6].keys(), want[6].keys())
+
+
+# ------------------ OFFLINE BUNDLES ------------------
+class AcceptEncodingTests(SimpleTestCase):
+    def test_accepted_encodings(self):
+        available = ["br", "gzip"]
+        self.assertEqual(accepted_encodings("gzip, deflate, br", available), ["br", "gzip"])
+        self.assertEqual(accepted_encodings("br;q=0.5, gzip", available), ["gzip", "br"])
+        self.assertEqual(accepted_encodings("GZIP", available), ["gzip"])
+        self.assertEqual(accepted_encodings("*;q=0.1, br;q=0", available), ["gzip"])
+        self.assertEqual(accepted_encodings("gzip;q=bogus", available), [])
+        self.assertEqual(accepted_encodings("", available), [])
+        self.assertEqual(accepted_encodings(None, available), [])
+
+
+class BundleDownloadTests(TestCase):
+    SHA = "ab" * 32
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        for suffix, data in (("", b"plain tar"), (".gz", b"gzip bytes"), (".br", b"brotli bytes")):
+            (root / f"{self.SHA}.tar{suffix}").write_bytes(data)
+        self.root = root
+        settings = override_settings(CONTENT_BUNDLE_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client.force_login(User.objects.create_user(username="student", email="student@example.com", password=None))
+
+    def download(self, accept=None, **headers):
+        if accept is not None:
+            headers["HTTP_ACCEPT_ENCODING"] = accept
+        return self.client.get(f"/content/bundles/{self.SHA}.tar", **headers)
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_negotiates_the_best_variant(self):
+        response = self.download("gzip, br")
+        self.assertEqual((response["Content-Encoding"], self.body(response)), ("br", b"brotli bytes"))
+        self.assertEqual(response["ETag"], f'"{self.SHA}-br"')
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+        response = self.download("br;q=0.2, gzip")
+        self.assertEqual((response["Content-Encoding"], self.body(response)), ("gzip", b"gzip bytes"))
+
+        response = self.download("identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(self.body(response), b"plain tar")
+        self.assertEqual(response["ETag"], f'"{self.SHA}"')
+
+    def test_falls_back_when_a_variant_is_missing(self):
+        (self.root / f"{self.SHA}.tar.br").unlink()
+        response = self.download("br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_range_applies_to_the_chosen_variant(self):
+        response = self.download("gzip", HTTP_RANGE="bytes=5-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 5-9/10")
+        self.assertEqual(self.body(response), b"bytes")
+
+    def test_unknown_bundle(self):
+        response = self.client.get(f"/content/bundles/{'cd' * 32}.tar", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 404)
+
+
+# ------------------ MEDIA ------------------
+class ParseRangeTests(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+        self.assertIs(parse_range("bytes=1000-", 1000), False)
+        self.assertIs(parse_range("bytes=10-5", 1000), False)
+        self.assertIs(parse_range("bytes=-0", 1000), False)
+        for ignored in (None, "", "bytes=-", "bytes=0-1,5-9", "items=0-1"):
+            self.assertIsNone(parse_range(ignored, 1000))
+
+
+class ServeMediaTests(TestCase):
+    DATA = bytes(range(256)) * 4
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        (Path(tmp.name) / "lessons").mkdir()
+        (Path(tmp.name) / "lessons" / "intro.pdf").write_bytes(self.DATA)
+        settings = override_settings(MEDIA_ROOT=tmp.name, MEDIA_SERVE_MODE="django")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client.force_login(User.objects.create_user(username="student", email="student@example.com", password=None))
+
+    def get(self, path="lessons/intro.pdf", **headers):
+        return self.client.get(f"/media/{path}", **headers)
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_full_file_and_conditional_get(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.DATA)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        etag = response["ETag"]
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_ranges(self):
+        response = self.get(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.DATA)}")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(self.body(response), self.DATA[10:20])
+
+        response = self.get(HTTP_RANGE="bytes=1000-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), self.DATA[1000:])
+
+        response = self.get(HTTP_RANGE=f"bytes={len(self.DATA)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.DATA)}")
+
+    def test_if_range(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag).status_code, 206)
+        # The file changed since the client's partial download: send all of it
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.DATA)
+
+    def test_missing_and_outside_media_root(self):
+        self.assertEqual(self.get("lessons/missing.pdf").status_code, 404)
+        self.assertEqual(self.get("../settings.py").status_code, 404)
+
+    @override_settings(MEDIA_SERVE_MODE="x-accel", MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_x_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/lessons/intro.pdf")
+        self.assertEqual(response.content, b"")
+
+
+# ------------------ BULK IMPORT ------------------
+CURRICULUM_CSV = """board,class_level,subject,lesson,topic,quiz,question,choices,correct
+CBSE,9,Science,Electricity,Charge,,,,
+CBSE,9,Science,Electricity,Current,,,,
+CBSE,9,Science,Electricity,,Quiz 1,Unit of charge?,Coulomb|Volt,Coulomb
+CBSE,9,Science,Electricity,,Quiz 1,Unit of current?,Ampere|Ohm,Ampere
+CBSE,9,Science,Magnetism,Poles,,,,
+CBSE,9,Science,,Orphan topic,,,,
+CBSE,9,Science,Magnetism,,Quiz 2,Like poles?,Attract|Repel,Push
+"""
+
+
+class ImporterTests(TestCase):
+    def run_import(self, **kwargs):
+        return import_file(io.BytesIO(CURRICULUM_CSV.encode("utf-8")), "csv", chunk_size=2, **kwargs)
+
+    def counts(self):
+        return [model.objects.count() for model in (Subject, Lesson, Topic, Quiz, Question, Choice)]
+
+    def question_ids(self, subject):
+        return list(descendants(C.SUBJECT, subject.pk, C.QUESTION))
+
+    def test_dry_run_writes_nothing_and_counts_like_a_real_run(self):
+        dry = self.run_import(dry_run=True)
+        self.assertTrue(dry["dry_run"])
+        self.assertEqual(self.counts(), [0] * 6)
+        self.assertFalse(C.objects.exists())
+
+        real = self.run_import()
+        # Parents recreated in later rolled-back chunks are still counted once
+        self.assertEqual(dry["created"], real["created"])
+        self.assertEqual(real["created"], {
+            "subject": 1, "lesson": 2, "topic": 3, "quiz": 1, "question": 2, "choice": 4,
+        })
+        self.assertEqual(self.counts(), [1, 2, 3, 1, 2, 4])
+
+    def test_invalid_rows_are_reported(self):
+        stats = self.run_import()
+        self.assertEqual(stats["rows"], 7)
+        self.assertEqual(stats["invalid"], 2)
+        self.assertEqual([e["line"] for e in stats["errors"]], [7, 8])
+        self.assertIn("topic given without lesson", stats["errors"][0]["error"])
+
+    def test_reimport_is_idempotent(self):
+        self.run_import()
+        before = self.counts()
+        closure = C.objects.count()
+
+        stats = self.run_import()
+        self.assertEqual(set(stats["created"].values()), {0})
+        self.assertEqual(stats["existing"]["question"], 2)
+        self.assertEqual(self.counts(), before)
+        self.assertEqual(C.objects.count(), closure)
+
+        # What signals would have maintained is maintained by the importer
+        subject = Subject.objects.get()
+        self.assertEqual(len(self.question_ids(subject)), 2)
+        correct = Choice.objects.filter(is_correct=True).values_list("text", flat=True)
+        self.assertEqual(sorted(correct), ["Ampere", "Coulomb"])
+        hits = SQLiteFTSBackend().search("charge", "CBSE", "9")
+        self.assertIn(("topic", Topic.objects.get(title="Charge").pk), [(h["kind"], h["id"]) for h in hits])
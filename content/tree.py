@@ -0,0 +1,98 @@
+"""
+Versioned content tree for one (board, class_level).
+
+The tree (subjects -> lessons -> topics / quizzes -> questions -> choices)
+is loaded with a fixed six prefetch queries, serialized once and cached as
+JSON bytes under the curriculum version, which also forms the ETag.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .cache import QUIZ_CACHE_TIMEOUT, get_content_version
+from .models import Subject, Lesson, Topic, Quiz, Question, Choice
+
+TREE_KEY = "content:tree:{digest}"
+# Bumped when the tree's shape changes, so cached bodies and ETags of the old shape are not reused
+TREE_FORMAT = 2
+
+
+def tree_etag(board, class_level, version=None):
+    version = version or get_content_version()
+    digest = hashlib.sha1(f"{TREE_FORMAT}|{version}|{board}|{class_level}".encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def build_content_tree(board, class_level):
+    """Return the tree for (board, class_level) as a dict."""
+    subjects = (
+        Subject.objects.filter(board=board, class_level=class_level)
+        .order_by("name", "pk")
+        .prefetch_related(
+            Prefetch("lessons", queryset=Lesson.objects.order_by("order", "pk")),
+            Prefetch("lessons__topics", queryset=Topic.objects.order_by("order", "pk")),
+            Prefetch("lessons__quizzes", queryset=Quiz.objects.order_by("pk")),
+            Prefetch("lessons__quizzes__questions", queryset=Question.objects.order_by("pk")),
+            Prefetch("lessons__quizzes__questions__choices", queryset=Choice.objects.order_by("pk").only("id", "text", "question_id")),
+        )
+    )
+    return {
+        "board": board,
+        "class_level": class_level,
+        "subjects": [
+            {
+                "id": s.id,
+                "name": s.name,
+                "code": s.code,
+                "class_level": s.class_level,
+                "lessons": [
+                    {
+                        "id": l.id,
+                        "title": l.title,
+                        "order": l.order,
+                        "duration": l.duration,
+                        "content_text": l.content_text,
+                        "topics": [
+                            {"id": t.id, "title": t.title, "content": t.content} for t in l.topics.all()
+                        ],
+                        "quizzes": [
+                            {
+                                "id": qz.id,
+                                "title": qz.title,
+                                "time_limit": qz.time_limit or 0,
+                                "questions": [
+                                    {
+                                        "id": q.id,
+                                        "text": q.text,
+                                        "qtype": q.qtype,
+                                        "marks": q.marks,
+                                        # No is_correct: answers are graded by api_submit_quiz
+                                        "choices": [{"id": c.id, "text": c.text} for c in q.choices.all()],
+                                    }
+                                    for q in qz.questions.all()
+                                ],
+                            }
+                            for qz in l.quizzes.all()
+                        ],
+                    }
+                    for l in s.lessons.all()
+                ],
+            }
+            for s in subjects
+        ],
+    }
+
+
+def get_content_tree(board, class_level):
+    """
+    Return (etag, JSON bytes) for (board, class_level), serving from the cache where possible.
+    """
+    etag = tree_etag(board, class_level)
+    key = TREE_KEY.format(digest=etag.strip('"'))
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(build_content_tree(board, class_level), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cache.set(key, body, QUIZ_CACHE_TIMEOUT)
+    return etag, body
@@ -2,5 +2,12 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    # abhi ke liye blank, baad me add karenge
+    path("api/bundle/", views.api_bundle_manifest, name="api_bundle_manifest"),
+    path("bundles/<str:sha256>.tar", views.download_bundle, name="download_bundle"),
+    path("api/tree/", views.api_content_tree, name="api_content_tree"),
+    path("api/import/", views.api_import_curriculum, name="api_import_curriculum"),
+    path("api/export/", views.api_export_curriculum, name="api_export_curriculum"),
+    path("api/render/<str:kind>/<int:obj_id>/", views.api_render_content, name="api_render_content"),
+    path("api/search/", views.api_search, name="api_search"),
+    path("api/paper/sample/", views.api_sample_paper, name="api_sample_paper"),
 ]
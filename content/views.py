@@ -1,3 +1,316 @@
 from django.shortcuts import render
 
 # Create your views here.
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.translation import get_language
+from django.views.decorators.http import require_http_methods
+
+from accounts.tokens import api_login_required
+
+
+MAX_PAPER_QUESTIONS = 500
+MAX_SEARCH_RESULTS = 50
+
+
+# ------------------ CONTENT TREE ------------------
+@api_login_required
+@require_http_methods(["GET"])
+def api_content_tree(request):
+    """
+    Return the content tree for the student's board and class:
+    {board, class_level, subjects: [{id, name, lessons: [{topics, quizzes: [{questions: [{choices}]}]}]}]}
+    Sent with an ETag; a matching If-None-Match gets a 304 without rebuilding anything.
+    """
+    from accounts.context import get_student_context
+    from .tree import get_content_tree, tree_etag
+
+    profile = get_student_context(request)
+    if profile is None:
+        return JsonResponse({"error": "Student profile not found"}, status=404)
+    board, class_level = profile.board, profile.student_class
+
+    etag = tree_etag(board, class_level)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        etag, body = get_content_tree(board, class_level)
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    # Always revalidate: the tree changes whenever an editor saves content
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ------------------ BULK IMPORT ------------------
+@login_required
+@require_http_methods(["POST"])
+def api_import_curriculum(request):
+    """
+    Staff only. Multipart upload: file=<CSV or JSONL>, optional format=csv|jsonl, dry_run=1.
+    Streams the file through content.importer and returns its stats:
+    {rows, invalid, errors: [{line, error}], created: {...}, existing: {...}, seconds, rows_per_sec, dry_run}
+    """
+    from .importer import detect_format, import_file
+
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    upload = request.FILES.get("file")
+    if upload is None:
+        return HttpResponseBadRequest("file is required")
+    fmt = request.POST.get("format") or detect_format(upload.name)
+    if fmt not in ("csv", "jsonl"):
+        return HttpResponseBadRequest("format must be csv or jsonl")
+
+    dry_run = request.POST.get("dry_run") in ("1", "true", "on")
+    upload.open("rb")
+    return JsonResponse(import_file(upload.file, fmt, dry_run=dry_run))
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_export_curriculum(request):
+    """
+    Staff only. GET ?board=<board>&class_level=<optional>
+    Streams the curriculum as gzipped JSONL (see content/export.py).
+    """
+    from django.http import StreamingHttpResponse
+    from django.utils.text import slugify
+    from .export import export_records, gzip_stream, jsonl_chunks
+
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    board = request.GET.get("board")
+    if not board:
+        return HttpResponseBadRequest("board is required")
+    class_level = request.GET.get("class_level") or None
+
+    response = StreamingHttpResponse(gzip_stream(jsonl_chunks(export_records(board, class_level))), content_type="application/gzip")
+    filename = slugify(f"{board} {class_level or 'all'}") + ".jsonl.gz"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ------------------ SEARCH ------------------
+@api_login_required
+@require_http_methods(["GET"])
+def api_search(request):
+    """
+    GET ?q=<text>&limit=<n>
+    Full-text search over the student's lessons, topics and questions, best match first:
+    {query, results: [{kind, id, subject_id, lesson_id, title, snippet}]}
+    snippet is HTML-escaped with matches wrapped in <mark>.
+    """
+    from accounts.context import get_student_context
+    from .search import get_search_backend
+
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 20)), MAX_SEARCH_RESULTS))
+    except ValueError:
+        return HttpResponseBadRequest("limit must be an integer")
+
+    profile = get_student_context(request)
+    if profile is None:
+        return JsonResponse({"error": "Student profile not found"}, status=404)
+
+    results = get_search_backend().search(query, profile.board, profile.student_class, limit) if query else []
+    return JsonResponse({"query": query, "results": results})
+
+
+# ------------------ RENDERED CONTENT ------------------
+@api_login_required
+@require_http_methods(["GET"])
+def api_render_content(request, kind, obj_id):
+    """
+    Return {kind, id, html} for a topic's content or a lesson's content_text,
+    rendered to sanitized HTML (content/rendering.py) and cached until the object changes.
+    html is "" when there is no text. Sent with an ETag for 304 revalidation.
+    """
+    from .rendering import SOURCES, get_rendered, render_etag
+
+    if kind not in SOURCES:
+        raise Http404("Unknown content kind")
+    language = get_language() or "en"
+
+    etag = render_etag(kind, obj_id, language)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        rendered = get_rendered(kind, obj_id, language)
+        if rendered is None:
+            raise Http404("Content not found")
+        response = JsonResponse({"kind": kind, "id": obj_id, "html": rendered})
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ------------------ RANDOM PAPERS ------------------
+@api_login_required
+@require_http_methods(["POST"])
+def api_sample_paper(request):
+    """
+    Accepts JSON: { paper: "<paper key>", sections: [{lesson_id, qtype, count}, ...] }
+    Draws count random questions per section from the precomputed question pools.
+    The draw is reproducible per (paper, student).
+    Returns: {paper, sections: [{lesson_id, qtype, questions: [{id, text, marks, qtype, choices}]}]}
+    """
+    from .sampling import sample_paper
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        paper = str(payload["paper"])
+        sections = [
+            {"lesson_id": int(s["lesson_id"]), "qtype": str(s.get("qtype", "mcq")), "count": int(s["count"])}
+            for s in payload["sections"]
+        ]
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid paper specification")
+    if any(s["count"] < 0 for s in sections):
+        return HttpResponseBadRequest("Section counts must not be negative")
+    if sum(s["count"] for s in sections) > MAX_PAPER_QUESTIONS:
+        return HttpResponseBadRequest(f"At most {MAX_PAPER_QUESTIONS} questions per paper")
+
+    drawn = sample_paper(sections, paper, request.user.pk)
+    return JsonResponse({
+        "paper": paper,
+        "sections": [
+            {
+                "lesson_id": section["lesson_id"],
+                "qtype": section["qtype"],
+                "questions": [
+                    {
+                        "id": q.id,
+                        "text": q.text,
+                        "marks": q.marks,
+                        "qtype": q.qtype,
+                        "choices": [{"id": c.id, "text": c.text} for c in q.choices.all()],
+                    }
+                    for q in questions
+                ],
+            }
+            for section, questions in zip(sections, drawn)
+        ],
+    })
+
+
+# ------------------ MEDIA ------------------
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, path):
+    """
+    Serve a file under MEDIA_ROOT (lesson files, note drawings, badge icons).
+    settings.MEDIA_SERVE_MODE:
+      "django"     - stream it here with Range/ETag support (FileResponse, sendfile-capable)
+      "x-accel"    - hand it to nginx via X-Accel-Redirect under MEDIA_ACCEL_PREFIX
+      "x-sendfile" - hand it to Apache/lighttpd via X-Sendfile
+    """
+    import mimetypes
+    import os
+    from urllib.parse import quote
+
+    from django.conf import settings
+    from django.core.exceptions import SuspiciousFileOperation
+    from django.utils._os import safe_join
+    from .storage import blob_hash
+    from .streaming import ranged_file_response
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    mode = getattr(settings, "MEDIA_SERVE_MODE", "django")
+    if mode == "x-accel":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/") + quote(path)
+        return response
+    if mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return response
+
+    sha = blob_hash(path)
+    if sha:
+        # Content-addressed: the name is the content, so it never goes stale
+        etag, cache_control = f'"{sha}"', "private, max-age=31536000, immutable"
+    else:
+        stat = os.stat(full_path)
+        # Same shape as nginx's ETag: changes whenever the file is replaced
+        etag, cache_control = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"', "private, max-age=3600"
+    return ranged_file_response(request, full_path, content_type=content_type, etag=etag, cache_control=cache_control)
+
+
+# ------------------ OFFLINE BUNDLES ------------------
+@api_login_required
+@require_http_methods(["GET"])
+def api_bundle_manifest(request):
+    """
+    Return the current offline bundle for the student's board and class:
+    {sha256, size, gzip_size, brotli_size, url}. ?language= defaults to the active language.
+    """
+    from accounts.context import get_student_context
+    from django.urls import reverse
+    from .models import ContentBundle
+
+    profile = get_student_context(request)
+    if profile is None:
+        return JsonResponse({"error": "Student profile not found"}, status=404)
+    language = request.GET.get("language") or get_language() or "en"
+    bundle = ContentBundle.objects.filter(
+        board=profile.board, class_level=profile.student_class, language=language
+    ).first()
+    if bundle is None:
+        return JsonResponse({"error": "No bundle built for this class"}, status=404)
+    return JsonResponse({
+        "board": bundle.board,
+        "class_level": bundle.class_level,
+        "language": bundle.language,
+        "sha256": bundle.sha256,
+        "size": bundle.size,
+        "gzip_size": bundle.gzip_size,
+        "brotli_size": bundle.brotli_size,
+        "built_at": bundle.built_at.isoformat(),
+        "url": reverse("download_bundle", args=[bundle.sha256]),
+    })
+
+
+@api_login_required
+@require_http_methods(["GET", "HEAD"])
+def download_bundle(request, sha256):
+    """
+    Serve an immutable bundle file. Picks the precompressed variant the client
+    accepts with the highest q-value (br before gzip on ties) and supports
+    resumable Range requests on it.
+    """
+    from .bundles import ENCODINGS, bundle_path
+    from .streaming import accepted_encodings, ranged_file_response
+
+    accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for encoding in accepted_encodings(accept, [encoding for encoding, _ in ENCODINGS]):
+        path = bundle_path(sha256, encoding)
+        if path.exists():
+            break
+    else:
+        encoding, path = None, bundle_path(sha256)
+        if not path.exists():
+            raise Http404("Bundle not found")
+
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    # Each encoding is a different representation, so it gets its own ETag
+    etag = f'"{sha256}{"-" + encoding if encoding else ""}"'
+    return ranged_file_response(
+        request,
+        path,
+        content_type="application/x-tar",
+        etag=etag,
+        cache_control="private, max-age=31536000, immutable",
+        headers=headers,
+    )
@@ -1,10 +1,35 @@
-
-
 # Register your models here.
 from django.contrib import admin
-from .models import PointsTransaction, Progress, Badge, UserBadge
+from .models import PointsTransaction, PointsBalance, PointsCheckpoint, Progress, Badge, UserBadge
+
+
+@admin.register(PointsTransaction)
+class PointsTransactionAdmin(admin.ModelAdmin):
+    """Append-only: rows can be added but not edited or deleted (see gamify/points.py)."""
+    list_display = ("profile", "points", "reason", "created_at")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PointsBalance)
+class PointsBalanceAdmin(admin.ModelAdmin):
+    list_display = ("profile", "balance", "updated_at")
+    readonly_fields = ("profile", "balance", "updated_at")
+
+
+@admin.register(PointsCheckpoint)
+class PointsCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("profile", "points", "balance", "transactions", "last_at", "created_at")
+    readonly_fields = [f.name for f in PointsCheckpoint._meta.fields]
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
-admin.site.register(PointsTransaction)
 admin.site.register(Progress)
 admin.site.register(Badge)
 admin.site.register(UserBadge)
@@ -0,0 +1,48 @@
+import gzip
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gamify.points import compact_ledger, rebuild_balances, verify_ledger
+
+
+class Command(BaseCommand):
+    help = "Roll old PointsTransactions into hash-chained PointsCheckpoints and verify balances."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Only compact transactions older than this many days")
+        parser.add_argument("--archive-dir", help="Write the compacted transactions to a gzipped JSONL file here first")
+        parser.add_argument("--verify", action="store_true", help="Check checkpoint chains and balances afterwards")
+        parser.add_argument(
+            "--rebuild-balances", action="store_true",
+            help="Recompute every PointsBalance from checkpoints + ledger instead of compacting",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["rebuild_balances"]:
+            count = rebuild_balances()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} points balance(s)."))
+        else:
+            before = timezone.now() - timedelta(days=opts["days"])
+            if opts["archive_dir"]:
+                path = Path(opts["archive_dir"]) / f"points-ledger-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with gzip.open(path, "wt", encoding="utf-8") as archive:
+                    stats = compact_ledger(before, archive=archive)
+                self.stdout.write(f"Archived compacted transactions to {path}")
+            else:
+                stats = compact_ledger(before)
+            self.stdout.write(self.style.SUCCESS(
+                f"Rolled {stats['transactions']} transaction(s) into checkpoints for {stats['profiles']} profile(s)."
+            ))
+
+        if opts["verify"]:
+            report = verify_ledger()
+            for profile_id, problems in report.items():
+                for problem in problems:
+                    self.stderr.write(f"profile {profile_id}: {problem}")
+            if report:
+                raise CommandError(f"{len(report)} profile(s) failed verification")
+            self.stdout.write(self.style.SUCCESS("Checkpoint chains and balances verified."))
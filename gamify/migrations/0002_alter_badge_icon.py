@@ -0,0 +1,17 @@
+import content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamify', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='badge',
+            name='icon',
+            field=models.ImageField(blank=True, null=True, storage=content.storage.content_addressed_storage, upload_to='badges/'),
+        ),
+    ]
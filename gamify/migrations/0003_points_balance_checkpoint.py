@@ -0,0 +1,57 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_balances(apps, schema_editor):
+    PointsTransaction = apps.get_model('gamify', 'PointsTransaction')
+    PointsBalance = apps.get_model('gamify', 'PointsBalance')
+
+    totals = PointsTransaction.objects.values('profile_id').annotate(s=models.Sum('points')).values_list('profile_id', 's')
+    PointsBalance.objects.bulk_create(
+        [PointsBalance(profile_id=profile_id, balance=total or 0) for profile_id, total in totals],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_enrollment'),
+        ('gamify', '0002_alter_badge_icon'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pointstransaction',
+            index=models.Index(fields=['created_at'], name='gamify_ptx_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='PointsBalance',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='points_balance', serialize=False, to='accounts.profile')),
+                ('balance', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PointsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.BigIntegerField()),
+                ('balance', models.BigIntegerField(help_text='Total of this and all earlier checkpoints')),
+                ('transactions', models.PositiveIntegerField()),
+                ('last_transaction_id', models.BigIntegerField()),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('transactions_digest', models.CharField(max_length=64)),
+                ('prev_digest', models.CharField(blank=True, max_length=64)),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_checkpoints', to='accounts.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', 'id'], name='gamify_pcp_profile_id_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@
 from django.db import models
 from django.conf import settings
 from content.models import Lesson
+from content.storage import content_addressed_storage
 
 class PointsTransaction(models.Model):
     profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='transactions')
@@ -11,9 +12,52 @@ class PointsTransaction(models.Model):
     reason = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["created_at"], name="gamify_ptx_created_idx")]
+
     def __str__(self):
         return f"{self.profile.unique_name} +{self.points} pts"
 
+
+class PointsBalance(models.Model):
+    """
+    Running points total per profile, updated in the same transaction as each
+    PointsTransaction insert (gamify/points.py), so reading it is one row.
+    Repair drift with `manage.py compact_points_ledger --rebuild-balances`.
+    """
+    profile = models.OneToOneField('accounts.Profile', on_delete=models.CASCADE, primary_key=True, related_name='points_balance')
+    balance = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.profile_id}: {self.balance} pts"
+
+
+class PointsCheckpoint(models.Model):
+    """
+    A run of old PointsTransactions rolled into one row by compaction.
+    Each checkpoint's digest covers its own fields, the digest of the rolled
+    transactions and the previous checkpoint's digest, so the chain can be
+    re-verified after the transactions themselves are gone.
+    """
+    profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='points_checkpoints')
+    points = models.BigIntegerField()
+    balance = models.BigIntegerField(help_text="Total of this and all earlier checkpoints")
+    transactions = models.PositiveIntegerField()
+    last_transaction_id = models.BigIntegerField()
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    transactions_digest = models.CharField(max_length=64)
+    prev_digest = models.CharField(max_length=64, blank=True)
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["profile", "id"], name="gamify_pcp_profile_id_idx")]
+
+    def __str__(self):
+        return f"{self.profile_id}: {self.points} pts in {self.transactions} txn(s) to #{self.last_transaction_id}"
+
 class Progress(models.Model):
     profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='progress')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
@@ -30,7 +74,7 @@ class Badge(models.Model):
     code = models.CharField(max_length=50, unique=True)
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
-    icon = models.ImageField(upload_to='badges/', null=True, blank=True)
+    icon = models.ImageField(upload_to='badges/', storage=content_addressed_storage, null=True, blank=True)
     criteria = models.JSONField(default=dict, blank=True)  # e.g., {"points":100}
 
     def __str__(self):
@@ -0,0 +1,194 @@
+"""
+Points balances and ledger compaction.
+
+PointsTransaction is an append-only ledger. Each insert also adds its points
+to the profile's PointsBalance row in the same database transaction
+(award_points(), or the post_save receiver in gamify/signals.py for rows
+created elsewhere such as the admin), so reading a balance never sums the
+ledger.
+
+compact_ledger() rolls each profile's transactions older than a cutoff into
+one PointsCheckpoint and deletes them, which keeps the ledger bounded. The
+invariant
+
+    balance == latest checkpoint.balance + SUM(points of remaining transactions)
+
+holds before and after compaction. Checkpoints form a hash chain per profile
+and verify_profile() re-checks the chain, the running totals and the balance.
+"""
+import hashlib
+import json
+from datetime import timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from .models import PointsBalance, PointsCheckpoint, PointsTransaction
+
+COMPACT_BATCH = 500
+
+
+# ------------------ BALANCES ------------------
+def add_to_balance(profile_id, points):
+    """Add points to profile's balance row, creating it if needed. Call inside the ledger insert's transaction."""
+    balances = PointsBalance.objects.filter(profile_id=profile_id)
+    if balances.update(balance=F("balance") + points, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            PointsBalance.objects.create(profile_id=profile_id, balance=points)
+    except IntegrityError:
+        # Another request created the row first
+        balances.update(balance=F("balance") + points, updated_at=timezone.now())
+
+
+def award_points(profile, points, reason=""):
+    """Append a ledger row and update the balance atomically. Returns the PointsTransaction."""
+    with transaction.atomic():
+        return PointsTransaction.objects.create(profile=profile, points=points, reason=reason[:255])
+
+
+def get_balance(profile_id):
+    return PointsBalance.objects.filter(profile_id=profile_id).values_list("balance", flat=True).first() or 0
+
+
+def get_balances(profile_ids):
+    """{profile_id: balance} for many profiles in one query; missing profiles have 0."""
+    balances = dict(PointsBalance.objects.filter(profile_id__in=profile_ids).values_list("profile_id", "balance"))
+    return {pk: balances.get(pk, 0) for pk in profile_ids}
+
+
+def rebuild_balances():
+    """Recompute every balance from checkpoints + ledger. Returns the number of balance rows written."""
+    totals = {}
+    for model in (PointsCheckpoint, PointsTransaction):
+        for profile_id, points in model.objects.values("profile_id").annotate(s=Sum("points")).values_list("profile_id", "s"):
+            totals[profile_id] = totals.get(profile_id, 0) + (points or 0)
+    with transaction.atomic():
+        PointsBalance.objects.exclude(profile_id__in=list(totals)).update(balance=0, updated_at=timezone.now())
+        PointsBalance.objects.bulk_create(
+            [PointsBalance(profile_id=pk, balance=total) for pk, total in totals.items()],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["profile"],
+            update_fields=["balance", "updated_at"],
+        )
+    return len(totals)
+
+
+# ------------------ CHECKPOINTS ------------------
+def _ts(value):
+    return value.astimezone(dt_timezone.utc).isoformat()
+
+
+def transactions_digest(rows):
+    """sha256 over (id, points, reason, created_at) rows in id order."""
+    h = hashlib.sha256()
+    for tx_id, points, reason, created_at in rows:
+        h.update(f"{tx_id}|{points}|{_ts(created_at)}|{reason}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def checkpoint_digest(cp):
+    payload = "|".join(str(v) for v in (
+        cp.prev_digest, cp.profile_id, cp.points, cp.balance, cp.transactions, cp.last_transaction_id,
+        _ts(cp.first_at), _ts(cp.last_at), cp.transactions_digest,
+    ))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _latest_checkpoints(profile_ids):
+    ids = (
+        PointsCheckpoint.objects.filter(profile_id__in=profile_ids)
+        .values("profile_id").annotate(m=Max("id")).values_list("m", flat=True)
+    )
+    return {cp.profile_id: cp for cp in PointsCheckpoint.objects.filter(id__in=list(ids))}
+
+
+def compact_ledger(before, archive=None, batch_size=COMPACT_BATCH):
+    """
+    Roll every profile's transactions created before `before` into a checkpoint
+    and delete them, batch_size profiles per database transaction.
+    archive: optional text stream; the rolled-up rows are written to it as
+    JSON lines (with their checkpoint digest) before they are deleted.
+    Returns {profiles, transactions}.
+    """
+    stats = {"profiles": 0, "transactions": 0}
+    old = PointsTransaction.objects.filter(created_at__lt=before)
+    profile_ids = list(old.order_by("profile_id").values_list("profile_id", flat=True).distinct())
+
+    for start in range(0, len(profile_ids), batch_size):
+        chunk = profile_ids[start:start + batch_size]
+        with transaction.atomic():
+            rows = {}
+            for profile_id, *row in old.filter(profile_id__in=chunk).order_by("profile_id", "id").values_list(
+                "profile_id", "id", "points", "reason", "created_at"
+            ):
+                rows.setdefault(profile_id, []).append(row)
+            previous = _latest_checkpoints(list(rows))
+
+            checkpoints = []
+            for profile_id, txs in rows.items():
+                prev = previous.get(profile_id)
+                points = sum(tx[1] for tx in txs)
+                cp = PointsCheckpoint(
+                    profile_id=profile_id,
+                    points=points,
+                    balance=(prev.balance if prev else 0) + points,
+                    transactions=len(txs),
+                    last_transaction_id=txs[-1][0],
+                    first_at=txs[0][3],
+                    last_at=txs[-1][3],
+                    transactions_digest=transactions_digest(txs),
+                    prev_digest=prev.digest if prev else "",
+                )
+                cp.digest = checkpoint_digest(cp)
+                checkpoints.append(cp)
+                if archive is not None:
+                    for tx_id, tx_points, reason, created_at in txs:
+                        archive.write(json.dumps({
+                            "profile": profile_id, "id": tx_id, "points": tx_points, "reason": reason,
+                            "created_at": _ts(created_at), "checkpoint": cp.digest,
+                        }) + "\n")
+            PointsCheckpoint.objects.bulk_create(checkpoints)
+
+            for cp in checkpoints:
+                PointsTransaction.objects.filter(
+                    profile_id=cp.profile_id, created_at__lt=before, id__lte=cp.last_transaction_id
+                ).delete()
+            stats["profiles"] += len(checkpoints)
+            stats["transactions"] += sum(cp.transactions for cp in checkpoints)
+    return stats
+
+
+def verify_profile(profile_id):
+    """Return a list of problems with a profile's checkpoint chain and balance; empty if consistent."""
+    problems = []
+    prev_digest, total = "", 0
+    for cp in PointsCheckpoint.objects.filter(profile_id=profile_id).order_by("id"):
+        if cp.prev_digest != prev_digest:
+            problems.append(f"checkpoint {cp.id}: does not follow the previous checkpoint")
+        if cp.balance != total + cp.points:
+            problems.append(f"checkpoint {cp.id}: running balance {cp.balance} != {total + cp.points}")
+        if cp.digest != checkpoint_digest(cp):
+            problems.append(f"checkpoint {cp.id}: digest mismatch")
+        prev_digest, total = cp.digest, cp.balance
+    total += PointsTransaction.objects.filter(profile_id=profile_id).aggregate(s=Sum("points"))["s"] or 0
+    balance = get_balance(profile_id)
+    if balance != total:
+        problems.append(f"balance {balance} != checkpoints + ledger {total}")
+    return problems
+
+
+def verify_ledger():
+    """verify_profile() for every profile with points. Returns {profile_id: [problems]} for the inconsistent ones."""
+    profile_ids = set(PointsBalance.objects.values_list("profile_id", flat=True))
+    profile_ids |= set(PointsCheckpoint.objects.values_list("profile_id", flat=True).distinct())
+    profile_ids |= set(PointsTransaction.objects.values_list("profile_id", flat=True).distinct())
+    report = {}
+    for profile_id in sorted(profile_ids):
+        problems = verify_profile(profile_id)
+        if problems:
+            report[profile_id] = problems
+    return report
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from content.storage import track_blob_field
+
+from .models import Badge, PointsTransaction
+from .points import add_to_balance
+
+
+# ------------------ MEDIA BLOB REFERENCES ------------------
+track_blob_field(Badge, "icon")
+
+
+# ------------------ POINTS BALANCE ------------------
+# The ledger is append-only: edits and deletes are not reflected here (the
+# admin forbids them; compaction keeps balances unchanged by design).
+@receiver(post_save, sender=PointsTransaction)
+def add_transaction_to_balance(sender, instance, created, raw=False, **kwargs):
+    # Fixtures load ledger and balance rows as they are; rebuild with --rebuild-balances if needed
+    if created and not raw:
+        add_to_balance(instance.profile_id, instance.points)
@@ -1,3 +1,97 @@
+import io
+import json
+from datetime import timedelta
+
+from django.db.models import Sum
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Profile, User
+
+from .models import PointsCheckpoint, PointsTransaction
+from .points import award_points, compact_ledger, get_balance, rebuild_balances, verify_ledger, verify_profile
+
+
+# ------------------ POINTS LEDGER ------------------
+class PointsLedgerTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="student", email="student@example.com", password=None)
+        self.profile = Profile.objects.create(user=user, role="student")
+        self.now = timezone.now()
+
+    def award(self, points, days_ago):
+        tx = award_points(self.profile, points, f"{points} pts")
+        PointsTransaction.objects.filter(pk=tx.pk).update(created_at=self.now - timedelta(days=days_ago))
+        return tx
+
+    def assertInvariant(self):
+        """balance == latest checkpoint.balance + SUM(remaining transactions)"""
+        latest = PointsCheckpoint.objects.filter(profile=self.profile).order_by("-id").first()
+        remaining = PointsTransaction.objects.filter(profile=self.profile).aggregate(s=Sum("points"))["s"] or 0
+        self.assertEqual(get_balance(self.profile.pk), (latest.balance if latest else 0) + remaining)
+        self.assertEqual(verify_profile(self.profile.pk), [])
+
+    def test_balance_follows_ledger(self):
+        self.award(10, 3)
+        self.award(-4, 2)
+        self.assertEqual(get_balance(self.profile.pk), 6)
+        self.assertInvariant()
+
+    def test_compaction_keeps_balance(self):
+        for points, days_ago in ((10, 40), (5, 35), (7, 5), (3, 1)):
+            self.award(points, days_ago)
+        self.assertInvariant()
+
+        archive = io.StringIO()
+        stats = compact_ledger(self.now - timedelta(days=30), archive=archive)
+
+        self.assertEqual(stats, {"profiles": 1, "transactions": 2})
+        self.assertEqual(get_balance(self.profile.pk), 25)
+        self.assertEqual(PointsTransaction.objects.filter(profile=self.profile).count(), 2)
+        checkpoint = PointsCheckpoint.objects.get(profile=self.profile)
+        self.assertEqual((checkpoint.points, checkpoint.balance, checkpoint.transactions), (15, 15, 2))
+        rows = [json.loads(line) for line in archive.getvalue().splitlines()]
+        self.assertEqual([row["points"] for row in rows], [10, 5])
+        self.assertTrue(all(row["checkpoint"] == checkpoint.digest for row in rows))
+        self.assertInvariant()
+
+    def test_checkpoints_chain(self):
+        self.award(10, 40)
+        compact_ledger(self.now - timedelta(days=30))
+        self.award(4, 20)
+        self.award(1, 0)
+        compact_ledger(self.now - timedelta(days=10))
+
+        first, second = PointsCheckpoint.objects.filter(profile=self.profile).order_by("id")
+        self.assertEqual(second.prev_digest, first.digest)
+        self.assertEqual((second.points, second.balance), (4, 14))
+        self.assertEqual(get_balance(self.profile.pk), 15)
+        self.assertInvariant()
+        self.assertEqual(verify_ledger(), {})
+
+    def test_compaction_with_nothing_old(self):
+        self.award(3, 1)
+        self.assertEqual(compact_ledger(self.now - timedelta(days=30)), {"profiles": 0, "transactions": 0})
+        self.assertFalse(PointsCheckpoint.objects.exists())
+        self.assertInvariant()
+
+    def test_verify_detects_tampering(self):
+        self.award(10, 40)
+        compact_ledger(self.now - timedelta(days=30))
+        PointsCheckpoint.objects.filter(profile=self.profile).update(points=20, balance=20)
+
+        problems = verify_profile(self.profile.pk)
+        self.assertTrue(any("digest mismatch" in p for p in problems))
+        self.assertTrue(any("balance 10 != " in p for p in problems))
+        self.assertIn(self.profile.pk, verify_ledger())
+
+    def test_rebuild_balances_repairs_drift(self):
+        self.award(10, 40)
+        self.award(2, 1)
+        compact_ledger(self.now - timedelta(days=30))
+        self.profile.points_balance.balance = 999
+        self.profile.points_balance.save()
 
-# Create your tests here.
+        rebuild_balances()
+        self.assertEqual(get_balance(self.profile.pk), 12)
+        self.assertInvariant()
@@ -4,4 +4,6 @@ from . import views
 
 urlpatterns = [
     path("chatbot_api/", views.chatbot_api, name="chatbot_api"),
+    path("api/points/", views.api_points_balance, name="api_points_balance"),
+    path("api/points/balances/", views.api_points_balances, name="api_points_balances"),
 ]
@@ -1,11 +1,15 @@
 # gamify/views.py
 import os
 import json
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 import requests
 
+from accounts.tokens import api_login_required
+
+MAX_BALANCE_LOOKUPS = 500
+
 @require_http_methods(["GET"])
 def chatbot_api(request):
     q = request.GET.get("q", "").strip()
@@ -63,3 +67,33 @@ def chatbot_api(request):
         return JsonResponse({"reply": "A capacitor stores electrical energy in an electric field, typically two conductors separated by an insulator."})
 
     return JsonResponse({"reply":"I couldn't find an exact match offline. Try: 'explain topic <name>' or use online mode by setting OPENAI_API_KEY in settings."})
+
+
+# ------------------ POINTS ------------------
+@api_login_required
+@require_http_methods(["GET"])
+def api_points_balance(request):
+    """Returns {balance} for the current user; 0 before their first points."""
+    from accounts.models import Profile
+    from .points import get_balance
+
+    profile_id = Profile.objects.filter(user=request.user).values_list("id", flat=True).first()
+    return JsonResponse({"balance": get_balance(profile_id) if profile_id else 0})
+
+
+@api_login_required
+@require_http_methods(["GET"])
+def api_points_balances(request):
+    """Staff only. ?profile=<id>&profile=<id>... Returns {balances: {profile_id: balance}}."""
+    from .points import get_balances
+
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    try:
+        profile_ids = [int(v) for v in request.GET.getlist("profile")]
+    except ValueError:
+        return HttpResponseBadRequest("profile must be an integer")
+    if len(profile_ids) > MAX_BALANCE_LOOKUPS:
+        return HttpResponseBadRequest(f"At most {MAX_BALANCE_LOOKUPS} profiles per request")
+    return JsonResponse({"balances": {str(pk): balance for pk, balance in get_balances(profile_ids).items()}})
+
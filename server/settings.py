@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,6 +52,24 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
 }
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=14),   # tablets can stay offline for days
+}
+# Bearer-token API auth caches users per process (see accounts/tokens.py).
+TOKEN_AUTH = {
+    "USER_CACHE_TTL": 60,      # seconds; deactivation takes effect within this
+    "USER_CACHE_SIZE": 2048,
+}
+# Login attempts are throttled before password hashing (see accounts/throttle.py).
+# CACHE names the cache holding the counters. It must be shared by every worker:
+# with the LocMemCache below the limits and metrics are per process.
+LOGIN_THROTTLE = {
+    "WINDOW": 300,       # seconds
+    "EMAIL_LIMIT": 10,
+    "IP_LIMIT": 200,
+    "CACHE": "default",
+}
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -94,6 +113,37 @@ DATABASES = {
 }
 
 
+# Cache
+# Quiz payloads and other derived content are cached here. Use a shared backend
+# (Redis/Memcached) in production so invalidation reaches every worker.
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gamified-learning',
+    }
+}
+
+# Quiz attempts are journaled to disk and bulk-inserted in the background
+# (see accounts/attempts.py for the durability guarantees).
+ATTEMPT_BUFFER = {
+    'ENABLED': True,
+    'JOURNAL_DIR': BASE_DIR / 'var' / 'attempt_journal',
+    'MAX_BATCH': 500,
+    'FLUSH_INTERVAL': 2.0,   # seconds
+    'FSYNC_EVERY': 32,       # attempts; max loss on power failure is FSYNC_EVERY - 1
+}
+
+# Timed quiz sessions are expired by an in-process timer wheel
+# (see accounts/quiz_sessions.py).
+QUIZ_SESSIONS = {
+    'TICK': 1.0,    # seconds per wheel slot
+    'SLOTS': 512,
+    'GRACE': 5,     # seconds allowed after the deadline for network latency
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -143,6 +193,19 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# How /media/ is delivered: "django" (Range-capable FileResponse),
+# "x-accel" (nginx internal location at MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT) or "x-sendfile" (Apache mod_xsendfile / lighttpd).
+MEDIA_SERVE_MODE = "django"
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+
+# Full-text search backend for lessons, topics and questions (see content/search.py).
+# Left unset, it follows the database: SQLite FTS5 on SQLite, a no-op elsewhere.
+# CONTENT_SEARCH_BACKEND = "content.search.SQLiteFTSBackend"
+
+# Offline content bundles (manage.py build_content_bundles)
+CONTENT_BUNDLE_ROOT = BASE_DIR / "var" / "bundles"
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
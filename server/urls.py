@@ -1,8 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from accounts import views as account_views
+from content import views as content_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -23,6 +23,7 @@ urlpatterns = [
     # path("parent/dashboard/", account_views.parent_dashboard, name="parent_dashboard"),
 ]
 
-# 🔹 Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# 🔹 Media files (Range/ETag aware; see MEDIA_SERVE_MODE in settings)
+urlpatterns += [
+    re_path(r"^%s(?P<path>.+)$" % settings.MEDIA_URL.lstrip("/"), content_views.serve_media, name="serve_media"),
+]
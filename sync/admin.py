@@ -1,8 +1,15 @@
-
-
 # Register your models here.
 from django.contrib import admin
-from .models import Device, ChangeLog
+from .models import Device, ChangeLog, ContentChange, JournalCompaction
 
 admin.site.register(Device)
 admin.site.register(ChangeLog)
+
+
+@admin.register(ContentChange)
+class ContentChangeAdmin(admin.ModelAdmin):
+    list_display = ("id", "op", "model_name", "object_id", "board", "class_level", "created_at")
+    list_filter = ("op", "model_name", "board", "class_level")
+
+
+admin.site.register(JournalCompaction)
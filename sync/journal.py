@@ -0,0 +1,216 @@
+"""
+Content change journal for delta curriculum sync.
+
+Every save/delete of a content model appends a ContentChange row tagged with
+the board and class it belongs to. A device that holds cursor N asks for
+changes since N and gets back only the current state of the objects that
+changed plus the ids that were deleted, so a one-word Topic fix costs one
+small record instead of a whole bundle.
+
+When an object moves to another board/class (a Subject is re-tagged, or a
+Lesson is moved under a Subject of another class, ...), the old scope gets
+DELETE entries for it and everything below it and the new scope gets UPSERT
+entries for everything below it, so devices on either side stay consistent.
+
+Compaction removes entries superseded by a newer entry for the same object
+that the same devices can see, which never changes what any cursor sees. Old delete markers can also be
+dropped; that raises the journal floor and devices below it are told to
+resync from a full bundle.
+"""
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+
+from .models import ContentChange, JournalCompaction
+
+# model name -> fields sent to devices. Never Choice.is_correct: answers are graded on the server.
+SYNC_FIELDS = {
+    "subject": ("id", "name", "code", "board", "class_level"),
+    "lesson": ("id", "subject_id", "title", "order", "content_text", "content_file", "duration"),
+    "topic": ("id", "lesson_id", "title", "order", "content"),
+    "quiz": ("id", "lesson_id", "title", "time_limit", "total_marks"),
+    "question": ("id", "quiz_id", "text", "qtype", "marks"),
+    "choice": ("id", "question_id", "text"),
+}
+
+# model name -> path from the model to its Subject, for board/class tagging
+SUBJECT_PATH = {
+    "subject": "",
+    "lesson": "subject__",
+    "topic": "lesson__subject__",
+    "quiz": "lesson__subject__",
+    "question": "quiz__lesson__subject__",
+    "choice": "question__quiz__lesson__subject__",
+}
+
+# model name -> (parent model name, parent FK attribute)
+PARENTS = {
+    "lesson": ("subject", "subject_id"),
+    "topic": ("lesson", "lesson_id"),
+    "quiz": ("lesson", "lesson_id"),
+    "question": ("quiz", "quiz_id"),
+    "choice": ("question", "question_id"),
+}
+
+
+def _model(name):
+    from django.apps import apps
+    return apps.get_model("content", name)
+
+
+def _scope(model_name, instance):
+    """Return (board, class_level) of the subject instance belongs to, or (None, None)."""
+    if model_name == "subject":
+        return instance.board, instance.class_level
+    # Look up through the parent: on delete the instance row itself is gone
+    parent_name, parent_attr = PARENTS[model_name]
+    parent_path = SUBJECT_PATH[parent_name]
+    row = (
+        _model(parent_name).objects.filter(pk=getattr(instance, parent_attr))
+        .values_list(f"{parent_path}board", f"{parent_path}class_level")
+        .first()
+    )
+    return row or (None, None)
+
+
+def stored_scope(instance):
+    """(board, class_level) instance is saved under in the database, or None if it is not saved yet."""
+    if instance.pk is None:
+        return None
+    model_name = instance._meta.model_name
+    path = SUBJECT_PATH[model_name]
+    return _model(model_name).objects.filter(pk=instance.pk).values_list(f"{path}board", f"{path}class_level").first()
+
+
+def _descendant_ids(model_name, pk):
+    """{model name: [ids]} of the content below one object."""
+    suffix = f"{model_name}__{SUBJECT_PATH[model_name]}"
+    found = {}
+    for name, path in SUBJECT_PATH.items():
+        if name != model_name and path.endswith(suffix):
+            lookup = path[: len(path) - len(SUBJECT_PATH[model_name])] + "id"
+            ids = list(_model(name).objects.filter(**{lookup: pk}).values_list("id", flat=True))
+            if ids:
+                found[name] = ids
+    return found
+
+
+def record_rescope(instance, previous):
+    """
+    Journal a move of instance out of scope `previous`: DELETE it and its
+    descendants for the old scope, UPSERT its descendants for the new one
+    (instance itself is journaled by record_change). No-op if the scope is unchanged.
+    """
+    model_name = instance._meta.model_name
+    board, class_level = _scope(model_name, instance)
+    if previous is None or tuple(previous) == (board, class_level):
+        return
+    old_board, old_class = previous
+    changes = [ContentChange(
+        model_name=model_name, object_id=instance.pk, op=ContentChange.DELETE, board=old_board, class_level=old_class
+    )]
+    for name, ids in _descendant_ids(model_name, instance.pk).items():
+        for object_id in ids:
+            changes.append(ContentChange(
+                model_name=name, object_id=object_id, op=ContentChange.DELETE, board=old_board, class_level=old_class
+            ))
+            changes.append(ContentChange(
+                model_name=name, object_id=object_id, op=ContentChange.UPSERT, board=board, class_level=class_level
+            ))
+    ContentChange.objects.bulk_create(changes, batch_size=1000)
+
+
+def record_change(instance, op):
+    model_name = instance._meta.model_name
+    board, class_level = _scope(model_name, instance)
+    ContentChange.objects.create(
+        model_name=model_name, object_id=instance.pk, op=op, board=board, class_level=class_level
+    )
+
+
+def record_changes(model_name, items, op=ContentChange.UPSERT):
+    """Bulk record_change for writes that bypass signals. items: [(object_id, board, class_level)]."""
+    ContentChange.objects.bulk_create(
+        [
+            ContentChange(model_name=model_name, object_id=object_id, op=op, board=board, class_level=class_level)
+            for object_id, board, class_level in items
+        ],
+        batch_size=1000,
+    )
+
+
+def journal_floor():
+    return JournalCompaction.objects.aggregate(m=Max("floor"))["m"] or 0
+
+
+def latest_cursor(board=None, class_level=None):
+    qs = ContentChange.objects.all()
+    if board is not None:
+        qs = qs.filter(Q(board=board, class_level=class_level) | Q(board__isnull=True))
+    return qs.aggregate(m=Max("id"))["m"] or 0
+
+
+def changes_since(cursor, board, class_level, limit=1000):
+    """
+    Return the delta for a device at cursor:
+    {cursor, more, reset, upserts: {model: [rows]}, deletes: {model: [ids]}}
+    """
+    if cursor < journal_floor():
+        return {"cursor": latest_cursor(board, class_level), "more": False, "reset": True, "upserts": {}, "deletes": {}}
+
+    entries = list(
+        ContentChange.objects.filter(id__gt=cursor)
+        .filter(Q(board=board, class_level=class_level) | Q(board__isnull=True))
+        .order_by("id")
+        .values_list("id", "model_name", "object_id", "op")[: limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Last entry per object wins
+    final = {}
+    for _, model_name, object_id, op in entries:
+        final[(model_name, object_id)] = op
+
+    upsert_ids, deletes = {}, {}
+    for (model_name, object_id), op in final.items():
+        target = upsert_ids if op == ContentChange.UPSERT else deletes
+        target.setdefault(model_name, []).append(object_id)
+
+    upserts = {}
+    for model_name, ids in upsert_ids.items():
+        rows = list(_model(model_name).objects.filter(pk__in=ids).values(*SYNC_FIELDS[model_name]))
+        upserts[model_name] = rows
+        # Deleted after being journaled but before this entry was compacted away
+        missing = set(ids) - {r["id"] for r in rows}
+        if missing:
+            deletes.setdefault(model_name, []).extend(sorted(missing))
+
+    return {
+        "cursor": entries[-1][0] if entries else cursor,
+        "more": more,
+        "reset": False,
+        "upserts": upserts,
+        "deletes": deletes,
+    }
+
+
+def compact(before, drop_deletes=False):
+    """
+    Compact journal entries created before `before`.
+    An entry is superseded by a newer entry for the same object in the same
+    scope (or a global one), so moving an object between scopes never hides
+    the DELETE from the old scope. Superseded entries are always removed; with drop_deletes, delete markers
+    are removed too and the floor is raised past them.
+    Returns the JournalCompaction row.
+    """
+    newer = ContentChange.objects.filter(
+        model_name=OuterRef("model_name"), object_id=OuterRef("object_id"), id__gt=OuterRef("id")
+    ).filter(Q(board=OuterRef("board"), class_level=OuterRef("class_level")) | Q(board__isnull=True))
+    with transaction.atomic():
+        removed, _ = ContentChange.objects.filter(created_at__lt=before).filter(Exists(newer)).delete()
+        floor = journal_floor()
+        if drop_deletes:
+            old_deletes = ContentChange.objects.filter(created_at__lt=before, op=ContentChange.DELETE)
+            floor = max(floor, old_deletes.aggregate(m=Max("id"))["m"] or 0)
+            removed += old_deletes.delete()[0]
+        return JournalCompaction.objects.create(floor=floor, removed=removed)
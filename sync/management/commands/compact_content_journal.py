@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.journal import compact
+
+
+class Command(BaseCommand):
+    help = "Remove superseded ContentChange entries (and optionally old delete markers)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Only compact entries older than this many days")
+        parser.add_argument(
+            "--drop-deletes", action="store_true",
+            help="Also drop old delete markers; devices behind them will need a full resync",
+        )
+
+    def handle(self, *args, **opts):
+        before = timezone.now() - timedelta(days=opts["days"])
+        run = compact(before, drop_deletes=opts["drop_deletes"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {run.removed} journal entr(ies); floor is {run.floor}."))
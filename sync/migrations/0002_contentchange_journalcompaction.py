@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('U', 'Upsert'), ('D', 'Delete')], max_length=1)),
+                ('board', models.CharField(blank=True, max_length=50, null=True)),
+                ('class_level', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['board', 'class_level', 'id'], name='sync_conten_board_94c38d_idx'),
+                    models.Index(fields=['model_name', 'object_id'], name='sync_conten_model_n_1fd255_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='JournalCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('floor', models.BigIntegerField(default=0)),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('ran_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
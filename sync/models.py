@@ -24,3 +24,39 @@ class ChangeLog(models.Model):
 
     def __str__(self):
         return f"{self.model_name} {self.object_id} ({'synced' if self.synced else 'pending'})"
+
+
+class ContentChange(models.Model):
+    """
+    Monotonic journal of curriculum writes (content.Subject ... content.Choice).
+    The id is the sync cursor handed to devices; see sync/journal.py.
+    """
+    UPSERT = "U"
+    DELETE = "D"
+    OP_CHOICES = ((UPSERT, "Upsert"), (DELETE, "Delete"))
+
+    model_name = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=1, choices=OP_CHOICES)
+    board = models.CharField(max_length=50, null=True, blank=True)
+    class_level = models.CharField(max_length=50, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["board", "class_level", "id"]),
+            models.Index(fields=["model_name", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.op} {self.model_name} {self.object_id}"
+
+
+class JournalCompaction(models.Model):
+    """
+    One compaction run. Cursors below the highest floor can no longer be
+    replayed exactly and must resync from a full bundle.
+    """
+    floor = models.BigIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    ran_at = models.DateTimeField(auto_now_add=True)
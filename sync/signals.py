@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from content.models import Subject, Lesson, Topic, Quiz, Question, Choice
+
+from .journal import record_change, record_rescope, stored_scope
+from .models import ContentChange
+
+
+# ------------------ CONTENT CHANGE JOURNAL ------------------
+@receiver(pre_save, sender=Subject)
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Topic)
+@receiver(pre_save, sender=Quiz)
+@receiver(pre_save, sender=Question)
+@receiver(pre_save, sender=Choice)
+def remember_scope(sender, instance, raw=False, **kwargs):
+    instance._previous_scope = None if raw else stored_scope(instance)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Choice)
+def journal_content_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_rescope(instance, getattr(instance, "_previous_scope", None))
+    record_change(instance, ContentChange.UPSERT)
+
+
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Choice)
+def journal_content_delete(sender, instance, **kwargs):
+    record_change(instance, ContentChange.DELETE)
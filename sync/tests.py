@@ -1,3 +1,114 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from content.models import Choice, Lesson, Question, Quiz, Subject, Topic
+
+from .journal import changes_since, compact, latest_cursor
+from .models import ContentChange
+
+
+# ------------------ CONTENT CHANGE JOURNAL ------------------
+class ContentJournalTests(TestCase):
+    def setUp(self):
+        self.subject = Subject.objects.create(name="Science", board="CBSE", class_level="9")
+        self.lesson = Lesson.objects.create(subject=self.subject, title="Electricity")
+        self.topic = Topic.objects.create(lesson=self.lesson, title="Charge")
+        self.quiz = Quiz.objects.create(lesson=self.lesson, title="Quiz 1")
+        self.question = Question.objects.create(quiz=self.quiz, text="Unit of charge?")
+        self.choice = Choice.objects.create(question=self.question, text="Coulomb", is_correct=True)
+        self.other = Subject.objects.create(name="Science", board="CBSE", class_level="10")
+
+    def ids(self, delta, kind):
+        return {name: sorted(ids) for name, ids in delta[kind].items()} if kind == "deletes" else {
+            name: sorted(row["id"] for row in rows) for name, rows in delta[kind].items()
+        }
+
+    def test_writes_are_journaled_per_scope(self):
+        delta = changes_since(0, "CBSE", "9")
+        self.assertEqual(self.ids(delta, "upserts")["choice"], [self.choice.pk])
+        self.assertNotIn("is_correct", delta["upserts"]["choice"][0])
+        self.assertEqual(self.ids(delta, "upserts")["subject"], [self.subject.pk])
+        self.assertEqual(self.ids(changes_since(0, "CBSE", "10"), "upserts"), {"subject": [self.other.pk]})
+
+        cursor = delta["cursor"]
+        self.topic.delete()
+        delta = changes_since(cursor, "CBSE", "9")
+        self.assertEqual(delta["deletes"], {"topic": [self.topic.pk]})
+        self.assertEqual(delta["upserts"], {})
+
+    def test_last_entry_per_object_wins(self):
+        cursor = latest_cursor("CBSE", "9")
+        self.topic.title = "Electric charge"
+        self.topic.save()
+        self.topic.save()
+        delta = changes_since(cursor, "CBSE", "9")
+        self.assertEqual(delta["upserts"]["topic"][0]["title"], "Electric charge")
+        self.assertEqual(len(delta["upserts"]["topic"]), 1)
+
+    def test_moving_a_lesson_rescopes_its_subtree(self):
+        old_cursor, new_cursor = latest_cursor("CBSE", "9"), latest_cursor("CBSE", "10")
+        self.lesson.subject = self.other
+        self.lesson.save()
+
+        old = changes_since(old_cursor, "CBSE", "9")
+        self.assertEqual(old["upserts"], {})
+        self.assertEqual(self.ids(old, "deletes"), {
+            "lesson": [self.lesson.pk], "topic": [self.topic.pk], "quiz": [self.quiz.pk],
+            "question": [self.question.pk], "choice": [self.choice.pk],
+        })
+        new = changes_since(new_cursor, "CBSE", "10")
+        self.assertEqual(new["deletes"], {})
+        self.assertEqual(self.ids(new, "upserts"), {
+            "lesson": [self.lesson.pk], "topic": [self.topic.pk], "quiz": [self.quiz.pk],
+            "question": [self.question.pk], "choice": [self.choice.pk],
+        })
+
+    def test_retagging_a_subject_rescopes_it(self):
+        cursor = latest_cursor("CBSE", "9")
+        self.subject.class_level = "10"
+        self.subject.save()
+        old = changes_since(cursor, "CBSE", "9")
+        self.assertEqual(old["deletes"]["subject"], [self.subject.pk])
+        self.assertEqual(old["deletes"]["choice"], [self.choice.pk])
+        self.assertIn(self.subject.pk, self.ids(changes_since(cursor, "CBSE", "10"), "upserts")["subject"])
+
+    def test_save_within_scope_is_not_a_move(self):
+        cursor = latest_cursor("CBSE", "9")
+        self.lesson.title = "Current electricity"
+        self.lesson.save()
+        delta = changes_since(cursor, "CBSE", "9")
+        self.assertEqual(delta["deletes"], {})
+        self.assertEqual(self.ids(delta, "upserts"), {"lesson": [self.lesson.pk]})
+
+    def test_compaction_drops_superseded_entries_only(self):
+        cursor = latest_cursor("CBSE", "9")
+        for _ in range(3):
+            self.topic.save()
+        before = changes_since(0, "CBSE", "9")
+
+        run = compact(timezone.now() + timedelta(seconds=1))
+        self.assertEqual(run.removed, 3)  # the create and first two saves
+        self.assertEqual(run.floor, 0)
+        self.assertEqual(changes_since(0, "CBSE", "9")["upserts"], before["upserts"])
+        self.assertEqual(changes_since(cursor, "CBSE", "9")["upserts"]["topic"][0]["id"], self.topic.pk)
+
+    def test_compaction_keeps_the_old_scope_delete_after_a_move(self):
+        cursor = latest_cursor("CBSE", "9")
+        self.lesson.subject = self.other
+        self.lesson.save()
+        self.lesson.save()  # newer UPSERTs in the new scope only
+
+        compact(timezone.now() + timedelta(seconds=1))
+        self.assertIn(self.lesson.pk, changes_since(cursor, "CBSE", "9")["deletes"]["lesson"])
+
+    def test_dropping_deletes_raises_the_floor(self):
+        self.topic.delete()
+        stale = latest_cursor("CBSE", "9") - 1
+        run = compact(timezone.now() + timedelta(seconds=1), drop_deletes=True)
 
-# Create your tests here.
+        self.assertGreater(run.floor, stale)
+        self.assertFalse(ContentChange.objects.filter(op=ContentChange.DELETE).exists())
+        self.assertTrue(changes_since(stale, "CBSE", "9")["reset"])
+        self.assertFalse(changes_since(run.floor, "CBSE", "9")["reset"])
@@ -2,5 +2,5 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    # abhi ke liye blank, baad me add karenge
+    path("api/content/changes/", views.api_content_changes, name="api_content_changes"),
 ]
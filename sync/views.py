@@ -1,3 +1,39 @@
 from django.shortcuts import render
 
 # Create your views here.
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.views.decorators.http import require_http_methods
+
+from accounts.tokens import api_login_required
+
+
+MAX_CHANGES = 1000
+
+
+# ------------------ DELTA CONTENT SYNC ------------------
+@api_login_required
+@require_http_methods(["GET"])
+def api_content_changes(request):
+    """
+    GET ?since=<cursor>&limit=<n>
+    Returns the content changes for the student's board and class after cursor:
+    {cursor, more, reset, upserts: {model: [rows]}, deletes: {model: [ids]}}
+    Keep calling with the returned cursor while more is true. reset means the
+    cursor is older than the compacted journal and a full bundle is needed.
+    """
+    from accounts.context import get_student_context
+    from .journal import changes_since
+
+    try:
+        since = int(request.GET.get("since", 0))
+        limit = min(int(request.GET.get("limit", MAX_CHANGES)), MAX_CHANGES)
+    except ValueError:
+        return HttpResponseBadRequest("since and limit must be integers")
+    if since < 0 or limit < 1:
+        return HttpResponseBadRequest("since and limit must be positive")
+
+    profile = get_student_context(request)
+    if profile is None:
+        return JsonResponse({"error": "Student profile not found"}, status=404)
+
+    return JsonResponse(changes_since(since, profile.board, profile.student_class, limit))